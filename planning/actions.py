@@ -5,6 +5,12 @@ class Action(object):
     name = None
     preconditions = None
     effects = None
+    # The chance that performing the action has its effects. Otherwise it
+    # has its failure_effects, which by default change nothing.
+    probability = 1.0
+    failure_effects = []
+    # The cost of attempting the action, whether or not it succeeds
+    cost = 1
 
     def __init__(self):
         if any(
@@ -49,14 +55,7 @@ class Action(object):
         all_objects = {'actor': actor}
         all_objects.update(objects_dict)
 
-        # The object arguments must match those required by the preconditions
-        if set(objects_dict.keys()) != set(cls.object_keys()):
-            raise ValueError(
-                "Input objects and action objects mismatch."
-                " Input objects: %s. Output objects: %s." % (
-                    set(objects_dict.keys()), set(cls.object_keys())
-                )
-            )
+        cls._check_object_keys(objects_dict)
 
         # Check all the preconditions
         all_preconditions_met = True
@@ -76,6 +75,33 @@ class Action(object):
         log.debug("Preconditions met? %s" % all_preconditions_met)
         return all_preconditions_met
 
+    @classmethod
+    def preconditions_met(cls, state, actor=None, **objects_dict):
+        """Check if the preconditions for this action are met in a state.
+
+        Like check_preconditions(), but conditions are looked up in state,
+        a WorldSnapshot, rather than evaluated on the live objects.
+        """
+        cls._check_object_keys(objects_dict)
+        for precondition_tuple in cls.calculate_preconditions(
+                actor=actor, **objects_dict):
+            condition_class, objects_tuple, expected_value = precondition_tuple
+            actual_value = state.value((condition_class, objects_tuple))
+            if expected_value != actual_value:
+                return False
+        return True
+
+    @classmethod
+    def _check_object_keys(cls, objects_dict):
+        """The object arguments must match those required by the action."""
+        if set(objects_dict.keys()) != set(cls.object_keys()):
+            raise ValueError(
+                "Input objects and action objects mismatch."
+                " Input objects: %s. Output objects: %s." % (
+                    set(objects_dict.keys()), set(cls.object_keys())
+                )
+            )
+
     @classmethod
     def apply_action(cls, actor=None, **objects):
         """Stub for subclasses to implement."""
@@ -84,11 +110,36 @@ class Action(object):
     @classmethod
     def calculate_effects(cls, actor=None, **objects):
         """Create an effects dict for planning activities."""
+        return cls._calculate_effects(cls.effects, actor=actor, **objects)
+
+    @classmethod
+    def calculate_outcomes(cls, actor=None, **objects):
+        """Create a list of the possible outcomes of the action.
+
+        Outcomes are tuples like (probability, effects_dict). Outcomes that
+        can not happen are left out.
+        """
+        outcomes = []
+        if cls.probability > 0:
+            outcomes.append((
+                cls.probability,
+                cls.calculate_effects(actor=actor, **objects)
+            ))
+        if cls.probability < 1:
+            outcomes.append((
+                1 - cls.probability,
+                cls._calculate_effects(
+                    cls.failure_effects, actor=actor, **objects)
+            ))
+        return outcomes
+
+    @classmethod
+    def _calculate_effects(cls, effect_tuples, actor=None, **objects):
         all_objects_dict = {'actor': actor}
         all_objects_dict.update(objects)
 
         calculated_effects = {}
-        for action_effect_tuple in cls.effects:
+        for action_effect_tuple in effect_tuples:
             condition_class, object_names, effect_value = action_effect_tuple
             if isinstance(object_names, basestring):
                 object_names = [object_names]
@@ -5,3 +5,17 @@ class Agent(object):
 
     def __repr__(self):
         return "<%s>" % self._name
+
+
+class TrackedAgent(Agent):
+    """An Agent that records attribute writes with a ChangeTracker."""
+    def __init__(self, name, tracker=None):
+        super(TrackedAgent, self).__init__(name)
+        # Set last, so that initial attributes are not recorded as changes
+        self._tracker = tracker
+
+    def __setattr__(self, attribute, value):
+        super(TrackedAgent, self).__setattr__(attribute, value)
+        tracker = getattr(self, '_tracker', None)
+        if tracker is not None and not attribute.startswith('_'):
+            tracker.record_attribute(self, attribute)
@@ -0,0 +1,156 @@
+from array import array
+import cPickle as pickle
+from cStringIO import StringIO
+import hashlib
+import os
+import struct
+
+from planning import mutex, patterns, relevance
+from planning.settings import log
+
+# Bump whenever the layout of the cache file or its contents changes
+CACHE_VERSION = 3
+_MAGIC = 'SPCACHE'
+# Magic, version, the sha1 digest of the domain and that of the payload
+_HEADER = struct.Struct('<7sI20s20s')
+
+
+def _class_path(cls):
+    return '%s.%s' % (cls.__module__, cls.__name__)
+
+
+def _schema_description(condition_tuples):
+    return [
+        (_class_path(condition_class), object_names, value)
+        for condition_class, object_names, value in condition_tuples
+    ]
+
+
+def domain_hash(available_actions):
+    """Return a digest of the definitions of a list of actions.
+
+    Any change to the name, preconditions, effects or outcomes of an
+    action, or to the order of the actions, changes the digest.
+    """
+    description = []
+    for action in available_actions:
+        description.append((
+            _class_path(action),
+            action.name,
+            _schema_description(action.preconditions),
+            _schema_description(action.effects),
+            _schema_description(action.failure_effects),
+            action.probability,
+            action.cost,
+        ))
+    return hashlib.sha1(repr(description)).digest()
+
+
+def _derived_structures(available_actions):
+    """Collect what has been derived for these actions so far.
+
+    Returns the structures to pickle and a list of the distance arrays of
+    pattern databases, which are written after them as they are.
+    """
+    actions_key = tuple(available_actions)
+    relevance_entries = dict(
+        (key, value)
+        for key, value in relevance._relevance_cache.iteritems()
+        if key[2] == actions_key
+    )
+    invariants = mutex._invariant_cache.get(actions_key)
+    # Pattern databases are described here and their distances are written
+    # after the structures, in the same order
+    pattern_databases = [
+        (key, database)
+        for key, database in patterns._database_cache.iteritems()
+        if key[1] == actions_key
+    ]
+    return {
+        'relevance': relevance_entries,
+        'invariants': invariants,
+        'patterns': [
+            (key[0], key[2], len(database.distances))
+            for key, database in pattern_databases
+        ],
+    }, [database.distances for key, database in pattern_databases]
+
+
+def save_cache(path, available_actions):
+    """Write the structures derived for available_actions to path.
+
+    This covers the relevant actions of every goal type planned for with
+    prune_irrelevant, the invariants found with prune_mutex and the
+    distances of the pattern databases built for these actions. The file
+    is replaced atomically.
+    """
+    structures, pattern_distances = _derived_structures(available_actions)
+    payload = pickle.dumps(structures, pickle.HIGHEST_PROTOCOL) + ''.join(
+        distances.tostring() for distances in pattern_distances)
+    header = _HEADER.pack(
+        _MAGIC, CACHE_VERSION, domain_hash(available_actions),
+        hashlib.sha1(payload).digest())
+    temporary_path = '%s.%d.tmp' % (path, os.getpid())
+    with open(temporary_path, 'wb') as cache_file:
+        cache_file.write(header)
+        cache_file.write(payload)
+    os.rename(temporary_path, path)
+    log.debug("Saved plan cache to %s" % path)
+
+
+def load_cache(path, available_actions):
+    """Load structures saved by save_cache() for available_actions.
+
+    Returns False, loading nothing, if there is no cache file, it was
+    written by another version or for different action definitions, or it
+    is truncated or corrupt. Only the header is read before deciding on
+    the version and definitions, so stale files are cheap to skip. The
+    payload is checked against its digest before it is unpickled. The
+    distances of pattern databases are read straight into arrays, so
+    their databases are rebuilt without searching the abstraction again.
+    """
+    if not os.path.exists(path) or os.path.getsize(path) <= _HEADER.size:
+        return False
+    with open(path, 'rb') as cache_file:
+        magic, version, digest, payload_digest = _HEADER.unpack(
+            cache_file.read(_HEADER.size))
+        if magic != _MAGIC or version != CACHE_VERSION:
+            log.debug("Ignoring cache %s of another version" % path)
+            return False
+        if digest != domain_hash(available_actions):
+            log.debug("Ignoring stale cache %s" % path)
+            return False
+        payload = cache_file.read()
+    if hashlib.sha1(payload).digest() != payload_digest:
+        log.debug("Ignoring corrupt cache %s" % path)
+        return False
+
+    actions_key = tuple(available_actions)
+    try:
+        payload_file = StringIO(payload)
+        structures = pickle.load(payload_file)
+        relevance_entries = dict(structures['relevance'])
+        invariants = structures['invariants']
+        offset = payload_file.tell()
+        databases = {}
+        for pattern_conditions, number_of_roles, length in (
+                structures['patterns']):
+            distances = array('B', payload[offset:offset + length])
+            offset += length
+            key = (pattern_conditions, actions_key, number_of_roles)
+            databases[key] = patterns.PatternDatabase(
+                pattern_conditions=list(pattern_conditions),
+                available_actions=available_actions,
+                number_of_roles=number_of_roles, distances=distances)
+    except Exception as e:
+        # A cache only saves work, so anything wrong with it means
+        # starting cold rather than failing
+        log.debug("Ignoring unreadable cache %s: %s" % (path, e))
+        return False
+
+    relevance._relevance_cache.update(relevance_entries)
+    if invariants is not None:
+        mutex._invariant_cache[actions_key] = invariants
+    patterns._database_cache.update(databases)
+    log.debug("Loaded plan cache from %s" % path)
+    return True
@@ -0,0 +1,224 @@
+from planning.actions import Action
+from planning.settings import log
+
+# Maps each Action class to its CompiledAction
+_compiled_cache = {}
+
+
+class CompiledAction(object):
+    """Functions specialized to one Action class, generated from its schema.
+
+    The functions behave like the action's calculate_effects() and
+    calculate_preconditions(), and like plans._action_effects_match_
+    possible_plan(), but with the loops over the action's preconditions
+    and effects unrolled into straight-line code. They take the actor and
+    an objects dict rather than keyword arguments:
+    * calculate_effects(actor, objects)
+    * calculate_preconditions(actor, objects)
+    * effects_match(conditions, actor, objects), where conditions are the
+      conditions of a possible plan.
+
+    Actions that override calculate_effects() or calculate_preconditions()
+    are not compiled, and their functions call the action's own methods.
+    """
+
+    def __init__(self, action):
+        self.action = action
+        self.object_keys = action.object_keys()
+        self.source = None
+        overridden = (
+            _overrides(action, 'calculate_effects') or
+            _overrides(action, 'calculate_preconditions')
+        )
+        if overridden:
+            self._use_action_methods()
+        else:
+            self._generate()
+
+    def __repr__(self):
+        return "<CompiledAction %s>" % self.action.name
+
+    def _use_action_methods(self):
+        action = self.action
+
+        def calculate_effects(actor, objects):
+            return action.calculate_effects(actor=actor, **objects)
+
+        def calculate_preconditions(actor, objects):
+            return action.calculate_preconditions(actor=actor, **objects)
+
+        def effects_match(conditions, actor, objects):
+            return _effects_match(
+                conditions, calculate_effects(actor, objects))
+
+        self.calculate_effects = calculate_effects
+        self.calculate_preconditions = calculate_preconditions
+        self.effects_match = effects_match
+
+    def _generate(self):
+        generator = _SourceGenerator(self.action)
+        self.source = generator.source()
+        namespace = generator.namespace
+        exec compile(
+            self.source, '<compiled %s>' % self.action.__name__, 'exec'
+        ) in namespace
+        self.calculate_effects = namespace['calculate_effects']
+        self.calculate_preconditions = namespace['calculate_preconditions']
+        self.effects_match = namespace['effects_match']
+
+
+def compile_action(action):
+    """Return the CompiledAction for action, generating it once."""
+    try:
+        return _compiled_cache[action]
+    except KeyError:
+        pass
+    compiled_action = CompiledAction(action)
+    _compiled_cache[action] = compiled_action
+    log.debug("Compiled %s" % action.name)
+    return compiled_action
+
+
+def _overrides(action, method_name):
+    return (
+        getattr(action, method_name).__func__ is not
+        getattr(Action, method_name).__func__
+    )
+
+
+def _effects_match(conditions, effects):
+    """No effect may contradict conditions, but at least one must match."""
+    some_effects_match = False
+    for condition, value in effects.iteritems():
+        if condition in conditions:
+            if conditions[condition] != value:
+                return False
+            some_effects_match = True
+    return some_effects_match
+
+
+class _SourceGenerator(object):
+    """Writes the source of an action's specialized functions.
+
+    Roles become local variables named o0, o1, ..., with o0 the actor, and
+    condition classes and values are bound in the functions' namespace as
+    c0, c1, ... and v0, v1, ...
+    """
+
+    def __init__(self, action):
+        self.action = action
+        self.namespace = {'_MISSING': object()}
+        self._names = {}
+        self._roles = {'actor': 'o0'}
+
+    def source(self):
+        effects = [
+            self._term(condition_class, object_names, value)
+            for condition_class, object_names, value in self.action.effects
+        ]
+        preconditions = [
+            self._term(condition_class, object_names, value)
+            for condition_class, object_names, value in (
+                self.action.preconditions)
+        ]
+        effects_source = ', '.join(
+            '%s: %s' % (key, value) for key, value, roles in effects)
+        preconditions_source = ', '.join(
+            '(%s, %s)' % (key[1:-1], value)
+            for key, value, roles in preconditions)
+        lines = []
+        lines.extend(self._function(
+            'calculate_effects', '(actor, objects)', effects,
+            ['    return {%s}' % effects_source]))
+        lines.extend(self._function(
+            'calculate_preconditions', '(actor, objects)', preconditions,
+            ['    return [%s]' % preconditions_source]))
+        lines.extend(self._function(
+            'effects_match', '(conditions, actor, objects)', effects,
+            self._effects_match_body(effects)))
+        return '\n'.join(lines) + '\n'
+
+    def _function(self, name, arguments, terms, body):
+        """Return the lines of a function looking up the roles of terms."""
+        lines = ['def %s%s:' % (name, arguments), '    o0 = actor']
+        roles = set()
+        for key, value, term_roles in terms:
+            roles.update(term_roles)
+        roles.discard('actor')
+        for role in sorted(roles, key=self._roles.get):
+            lines.append('    %s = objects[%r]' % (self._roles[role], role))
+        lines.extend(body)
+        lines.append('')
+        return lines
+
+    def _effects_match_body(self, effects):
+        body = ['    some_effects_match = False']
+        for number, (key, value, roles) in enumerate(effects):
+            condition_class = self.action.effects[number][0]
+            # A later effect of the same condition class takes precedence
+            # whenever its objects are the same, so this effect is skipped
+            # when they are, and left out if they always are.
+            aliases = []
+            for later_number in xrange(number + 1, len(effects)):
+                if self.action.effects[later_number][0] is not condition_class:
+                    continue
+                later_roles = effects[later_number][2]
+                comparisons = [
+                    '%s == %s' % (self._roles[role], self._roles[later_role])
+                    for role, later_role in zip(roles, later_roles)
+                    if role != later_role
+                ]
+                if not comparisons:
+                    break
+                aliases.append(' and '.join(comparisons))
+            else:
+                indent = '    '
+                if len(aliases) == 1:
+                    body.append('    if not (%s):' % aliases[0])
+                    indent = '        '
+                elif aliases:
+                    body.append('    if not (%s):' % ' or '.join(
+                        '(%s)' % alias for alias in aliases))
+                    indent = '        '
+                body.extend([
+                    indent + line for line in [
+                        'value = conditions.get(%s, _MISSING)' % key,
+                        'if value is not _MISSING:',
+                        '    if value != %s:' % value,
+                        '        return False',
+                        '    some_effects_match = True',
+                    ]
+                ])
+        body.append('    return some_effects_match')
+        return body
+
+    def _term(self, condition_class, object_names, value):
+        """Return (key, value, roles) with source for the planning tuple of
+        a condition and for its value, and the roles it is about.
+        """
+        if isinstance(object_names, basestring):
+            object_names = [object_names]
+        if condition_class.name is None:
+            raise ValueError("Must specify a name")
+        if len(object_names) != condition_class.number_of_objects:
+            raise ValueError("Must use %d objects, got %d objects." % (
+                condition_class.number_of_objects, len(object_names)))
+        for role in object_names:
+            self._roles.setdefault(role, 'o%d' % len(self._roles))
+        objects_source = ''.join(
+            '%s, ' % self._roles[role] for role in object_names)
+        if len(object_names) > 1:
+            objects_source = objects_source[:-2]
+        key = '(%s, (%s))' % (self._bind(condition_class), objects_source)
+        return key, self._bind(value), object_names
+
+    def _bind(self, constant):
+        """Return the name constant is bound to in the namespace."""
+        for name, bound in self._names.iteritems():
+            if bound is constant:
+                return name
+        prefix = 'c' if isinstance(constant, type) else 'v'
+        name = '%s%d' % (prefix, len(self._names))
+        self._names[name] = constant
+        self.namespace[name] = constant
+        return name
@@ -1,3 +1,6 @@
+from planning.entities import common_store
+
+
 class Condition(object):
     # Name of the condition
     name = None
@@ -35,6 +38,21 @@ class Condition(object):
         # will never return True, regardless of any actions evaluated prior.
         raise NotImplementedError
 
+    @classmethod
+    def evaluate_many(cls, objects_lists):
+        """Evaluate this condition on many lists of objects in one call.
+
+        Returns a list of truth values, one per list of objects.
+        Subclasses that can evaluate a whole population at once should
+        override this, the default evaluates one instance at a time.
+
+        PARAMETERS
+        * objects_lists - A list of lists of objects.
+        """
+        return [
+            cls(list(objects)).evaluate() for objects in objects_lists
+        ]
+
     @property
     def planning_tuple(self):
         """Return the tuple to be used for planning.
@@ -58,3 +76,28 @@ class Is(Condition):
             return True
         else:
             return False
+
+
+class AttributeCondition(Condition):
+    """A condition backed by an attribute of a single object.
+
+    Subclasses set attribute to the name of the attribute to read, and
+    default to the value used for objects without that attribute.
+    """
+    number_of_objects = 1
+    attribute = None
+    default = False
+
+    def evaluate(self):
+        return getattr(self.objects[0], self.attribute, self.default)
+
+    @classmethod
+    def evaluate_many(cls, objects_lists):
+        attribute = cls.attribute
+        default = cls.default
+        # Read entity store populations straight out of the column
+        objects = [objects_list[0] for objects_list in objects_lists]
+        store = common_store(objects)
+        if store is not None and store.has_column(attribute):
+            return store.gather(attribute, objects)
+        return [getattr(obj, attribute, default) for obj in objects]
@@ -0,0 +1,146 @@
+from collections import OrderedDict
+import json
+import sys
+import types
+
+from planning.actions import Action
+from planning.conditions import AttributeCondition, Is
+from planning.settings import log
+
+# Conditions that domains can use without declaring them
+BUILTIN_CONDITIONS = {
+    'Is': Is,
+}
+
+
+class Domain(object):
+    """The conditions and actions loaded from a domain file.
+
+    Loaded classes are also attributes of a module named after the domain,
+    so they can be pickled, for instance by planning.cache.
+    """
+
+    def __init__(self, name, conditions, actions):
+        self.name = name
+        self.conditions = conditions
+        self.actions = actions
+
+    def __repr__(self):
+        return "<Domain %s: %d conditions, %d actions>" % (
+            self.name, len(self.conditions), len(self.actions))
+
+    def action(self, class_name):
+        """Return the action class declared as class_name."""
+        for action in self.actions:
+            if action.__name__ == class_name:
+                return action
+        raise KeyError(class_name)
+
+
+def _make_apply_action(effects):
+    """Return an apply_action() setting the attributes of the effects."""
+    def apply_action(cls, actor=None, **objects):
+        all_objects = {'actor': actor}
+        all_objects.update(objects)
+        for condition_class, object_name, value in effects:
+            if not isinstance(object_name, basestring):
+                object_name = object_name[0]
+            setattr(
+                all_objects[object_name], condition_class.attribute, value)
+    return classmethod(apply_action)
+
+
+def _compile_condition_tuples(condition_tuples, conditions, where):
+    compiled_tuples = []
+    for condition_tuple in condition_tuples:
+        if len(condition_tuple) != 3:
+            raise ValueError(
+                "%s: expected [condition, objects, value], got %s." % (
+                    where, condition_tuple))
+        condition_name, object_names, value = condition_tuple
+        if condition_name not in conditions:
+            raise ValueError(
+                "%s: unknown condition %s." % (where, condition_name))
+        if not isinstance(object_names, basestring):
+            object_names = tuple(str(name) for name in object_names)
+        else:
+            object_names = str(object_names)
+        compiled_tuples.append(
+            (conditions[condition_name], object_names, value))
+    return compiled_tuples
+
+
+def _compile_action(class_name, declaration, conditions):
+    where = "Action %s" % class_name
+    preconditions = _compile_condition_tuples(
+        declaration.get('preconditions', []), conditions, where)
+    effects = _compile_condition_tuples(
+        declaration.get('effects', []), conditions, where)
+    failure_effects = _compile_condition_tuples(
+        declaration.get('failure_effects', []), conditions, where)
+    for condition_class, object_names, value in effects:
+        if not issubclass(condition_class, AttributeCondition):
+            raise ValueError(
+                "%s: effects must be on declared conditions." % where)
+    attributes = {
+        'name': declaration.get('name', class_name),
+        'preconditions': preconditions,
+        'effects': effects,
+        'failure_effects': failure_effects,
+        'probability': declaration.get('probability', Action.probability),
+        'cost': declaration.get('cost', Action.cost),
+        'apply_action': _make_apply_action(effects),
+    }
+    return type(str(class_name), (Action,), attributes)
+
+
+def parse_domain(data):
+    """Return a Domain from a parsed domain declaration.
+
+    PARAMETERS:
+    * data - A dict with a 'name', and 'conditions' and 'actions' dicts
+      keyed by class name. Conditions are attribute-backed, declared like
+      {"name": "has sword", "attribute": "has_sword", "default": false}.
+      Actions are declared like {"name": "kill", "preconditions": [...],
+      "effects": [...]}, with tuples like [condition, objects, value]
+      where condition is the class name of a declared or built-in
+      condition, and optionally with "probability", "cost" and
+      "failure_effects".
+    """
+    if 'name' not in data:
+        raise ValueError("A domain must have a name.")
+    domain_name = str(data['name'])
+    module_name = '%s.%s' % (__name__, domain_name)
+    module = types.ModuleType(module_name)
+
+    conditions = OrderedDict(BUILTIN_CONDITIONS)
+    for class_name, declaration in data.get('conditions', {}).iteritems():
+        if 'attribute' not in declaration:
+            raise ValueError(
+                "Condition %s must have an attribute." % class_name)
+        condition = type(str(class_name), (AttributeCondition,), {
+            'name': declaration.get('name', class_name),
+            'attribute': str(declaration['attribute']),
+            'default': declaration.get('default', False),
+            '__module__': module_name,
+        })
+        conditions[class_name] = condition
+        setattr(module, class_name, condition)
+
+    actions = []
+    for class_name, declaration in data.get('actions', {}).iteritems():
+        action = _compile_action(class_name, declaration, conditions)
+        action.__module__ = module_name
+        actions.append(action)
+        setattr(module, class_name, action)
+
+    sys.modules[module_name] = module
+    log.debug("Loaded domain %s" % domain_name)
+    return Domain(domain_name, conditions, actions)
+
+
+def load_domain(path):
+    """Return a Domain loaded from a JSON domain file. See parse_domain()."""
+    with open(path) as domain_file:
+        data = json.load(domain_file, object_pairs_hook=OrderedDict)
+    return parse_domain(data)
@@ -0,0 +1,171 @@
+from array import array
+
+# Array typecodes for the supported column types
+COLUMN_TYPECODES = {
+    bool: 'b',
+    int: 'l',
+    float: 'd',
+}
+
+
+class EntityStore(object):
+    """Stores entity attributes in typed, array-backed columns.
+
+    Entities are handed out as EntityHandle objects, which read and write
+    their attributes through the store, so conditions and actions written
+    for plain Agent objects work on them unchanged.
+
+    Writes through handles are recorded with tracker, a ChangeTracker,
+    when one is set.
+    """
+
+    def __init__(self, tracker=None):
+        self.tracker = tracker
+        self._names = []
+        self._handles = []
+        self._columns = {}
+        self._column_types = {}
+        self._defaults = {}
+
+    def __len__(self):
+        return len(self._handles)
+
+    def __repr__(self):
+        return "<EntityStore: %d entities, columns: %s>" % (
+            len(self), sorted(self._columns.keys()))
+
+    def add_column(self, attribute, column_type=bool, default=False):
+        """Add a column, filled with default for existing entities."""
+        if attribute in self._columns:
+            raise ValueError("Column %s already exists." % attribute)
+        if column_type not in COLUMN_TYPECODES:
+            raise ValueError(
+                "Unsupported column type %s. Use one of %s." % (
+                    column_type, COLUMN_TYPECODES.keys())
+            )
+        typecode = COLUMN_TYPECODES[column_type]
+        self._columns[attribute] = array(typecode, [default] * len(self))
+        self._column_types[attribute] = column_type
+        self._defaults[attribute] = default
+
+    def has_column(self, attribute):
+        return attribute in self._columns
+
+    def column(self, attribute):
+        """Return the array backing a column."""
+        return self._columns[attribute]
+
+    def create(self, name, **attributes):
+        """Create an entity and return its handle.
+
+        Columns that are not given in attributes take their default value.
+        """
+        for attribute in attributes:
+            if attribute not in self._columns:
+                raise ValueError("No column named %s." % attribute)
+        entity_id = len(self._handles)
+        for attribute, column in self._columns.iteritems():
+            column.append(attributes.get(
+                attribute, self._defaults[attribute]))
+        self._names.append(name)
+        handle = EntityHandle(self, entity_id)
+        self._handles.append(handle)
+        return handle
+
+    def handle(self, entity_id):
+        return self._handles[entity_id]
+
+    def handles(self):
+        """Return a list of the handles of every entity."""
+        return list(self._handles)
+
+    def name(self, entity_id):
+        return self._names[entity_id]
+
+    def get(self, entity_id, attribute):
+        column_type = self._column_types[attribute]
+        return column_type(self._columns[attribute][entity_id])
+
+    def set(self, entity_id, attribute, value):
+        self._columns[attribute][entity_id] = value
+        if self.tracker is not None:
+            self.tracker.record_attribute(
+                self._handles[entity_id], attribute)
+
+    def gather(self, attribute, handles):
+        """Return the values of a column for a list of handles."""
+        column_type = self._column_types[attribute]
+        column = self._columns[attribute]
+        return [column_type(column[handle._entity_id]) for handle in handles]
+
+    def snapshot(self):
+        """Return a copy of the store with its own copy of every column.
+
+        Handles from the copy refer to the copy, at the same entity ids.
+        """
+        _copy = EntityStore()
+        _copy._names = list(self._names)
+        for attribute, column in self._columns.iteritems():
+            _copy._columns[attribute] = column[:]
+        _copy._column_types = dict(self._column_types)
+        _copy._defaults = dict(self._defaults)
+        _copy._handles = [
+            EntityHandle(_copy, entity_id) for entity_id in xrange(len(self))
+        ]
+        return _copy
+
+
+class EntityHandle(object):
+    """A lightweight reference to an entity in an EntityStore.
+
+    Attribute reads and writes go to the store's columns. Reading an
+    attribute without a column raises AttributeError, as for a plain object.
+    """
+    __slots__ = ('_store', '_entity_id')
+
+    def __init__(self, store, entity_id):
+        object.__setattr__(self, '_store', store)
+        object.__setattr__(self, '_entity_id', entity_id)
+
+    def __repr__(self):
+        return "<%s>" % self._name
+
+    @property
+    def _name(self):
+        return self._store.name(self._entity_id)
+
+    @property
+    def entity_id(self):
+        return self._entity_id
+
+    @property
+    def store(self):
+        return self._store
+
+    def __getattr__(self, attribute):
+        if attribute.startswith('_'):
+            raise AttributeError(attribute)
+        store = self._store
+        if not store.has_column(attribute):
+            raise AttributeError(attribute)
+        return store.get(self._entity_id, attribute)
+
+    def __setattr__(self, attribute, value):
+        store = self._store
+        if not store.has_column(attribute):
+            raise AttributeError(
+                "No column named %s in the entity store." % attribute)
+        store.set(self._entity_id, attribute, value)
+
+
+def common_store(objects):
+    """Return the EntityStore of objects if they are all its handles."""
+    store = None
+    for obj in objects:
+        if not isinstance(obj, EntityHandle):
+            return None
+        if store is None:
+            store = obj._store
+        elif obj._store is not store:
+            return None
+    return store
@@ -1,8 +1,10 @@
-from itertools import permutations
 import random
 
 from planning.settings import log
 
+# How many random goals to draw before giving up on a predicate
+MAX_GOAL_ATTEMPTS = 100
+
 
 class Goal(object):
     """Utility class for goals."""
@@ -11,13 +13,17 @@ class Goal(object):
     # A condition instance
     _goal_condition = None
     _goal_value = None
+    # How much the agent wants the goal, used to choose between goals
+    utility = 1.0
 
-    def __init__(self, name, condition=None, value=None):
+    def __init__(self, name, condition=None, value=None, utility=None):
         if any(val is None for val in [condition, value]):
             raise ValueError("Must specify condition, and value")
         self.name = name
         self._goal_condition = condition
         self._goal_value = value
+        if utility is not None:
+            self.utility = utility
 
     def __repr__(self):
         return "<%s: %s>" % (
@@ -38,22 +44,56 @@ class Goal(object):
         return actual_value == self._goal_value
 
 
-def generate_goal(conditions, objects):
+def generate_goal(conditions, objects, rng=None, predicate=None):
     """Returns a Goal object.
     PARAMETERS:
     * conditions - A list of Condition classes.
     * objects - A list of objects on which the conditions could be calculated.
+    * rng - An optional random.Random instance to draw the goal with.
+    * predicate - An optional function taking a Goal and returning whether
+      it is acceptable. Goals are drawn until one is accepted.
 
     Note: Currently assumes that all objects can be used with all conditions.
     """
     log.debug("Generating goal.")
+    if rng is None:
+        rng = random
+    for attempt in xrange(MAX_GOAL_ATTEMPTS):
+        goal = _random_goal(conditions, objects, rng)
+        if predicate is None or predicate(goal):
+            return goal
+    raise ValueError(
+        "No goal accepted by the predicate in %d attempts." %
+        MAX_GOAL_ATTEMPTS
+    )
+
+
+def generate_goals(
+        number_of_goals, conditions, objects, seed=None, predicate=None):
+    """Returns a list of Goal objects, for instance one for each agent.
+    PARAMETERS:
+    * number_of_goals - How many goals to generate.
+    * conditions - A list of Condition classes.
+    * objects - A list of objects on which the conditions could be calculated.
+    * seed - An optional seed, so that the same goals can be generated again.
+    * predicate - An optional function taking a Goal and returning whether
+      it is acceptable.
+    """
+    rng = random.Random(seed)
+    return [
+        generate_goal(conditions, objects, rng=rng, predicate=predicate)
+        for goal_number in xrange(number_of_goals)
+    ]
+
+
+def _random_goal(conditions, objects, rng):
+    """Return a goal to change a random condition on random objects."""
     # Select a random condition
-    selected_condition = random.choice(conditions)
-    # Select a random set of objects for the condition
+    selected_condition = rng.choice(conditions)
+    # Draw distinct objects for the condition directly, rather than
+    # enumerating every permutation of the objects to choose from
     number_of_objects = selected_condition.number_of_objects
-    object_tuples = [tup for tup in permutations(objects, number_of_objects)]
-    object_tuple = random.choice(object_tuples)
-    object_list = list(object_tuple)
+    object_list = rng.sample(objects, number_of_objects)
     # Get the current value of the condition
     condition_instance = selected_condition(object_list)
     current_value = condition_instance.evaluate()
@@ -0,0 +1,182 @@
+from itertools import product
+
+from planning.actions import Action
+from planning.settings import log
+from planning.snapshots import WorldSnapshot
+
+# How deeply compound tasks may be nested, for tasks that refer to themselves
+MAX_DECOMPOSITION_DEPTH = 20
+
+
+class DecompositionDepthException(Exception):
+    pass
+
+
+class Method(object):
+    """One way of decomposing a compound task into sub-tasks.
+
+    PARAMETERS
+    * name - The name of the method.
+    * subtasks - A list of tuples like (task, role_map), where task is an
+      Action or Task class and role_map is a dict mapping each of the
+      sub-task's roles to one of this method's roles. 'actor' is always
+      passed through.
+    * preconditions - A list of tuples like (condition_class, roles, value),
+      as for actions, that must hold for the method to be used.
+    * free_roles - Roles used by the method that are not roles of its task.
+      They are bound by trying each object in turn.
+    """
+
+    def __init__(self, name, subtasks=None, preconditions=None,
+                 free_roles=None):
+        if subtasks is None:
+            raise ValueError("Must specify subtasks")
+        self.name = name
+        self.subtasks = subtasks
+        self.preconditions = preconditions or []
+        self.free_roles = free_roles or []
+
+    def __repr__(self):
+        return "<Method %s>" % self.name
+
+
+class Task(object):
+    """A compound task, decomposed by the first of its methods that works.
+
+    Subclasses set roles, the names of the objects the task is about
+    excluding 'actor', and methods, a list of Method objects.
+    """
+    name = None
+    roles = None
+    methods = None
+
+    def __init__(self):
+        if any(val is None for val in [self.name, self.roles, self.methods]):
+            raise ValueError("roles and methods must be specified.")
+
+    @classmethod
+    def object_keys(cls):
+        """A list of all objects involved in the task, excluding 'actor'."""
+        return list(cls.roles)
+
+
+def _bind_subtask(subtask, role_map, bindings):
+    """Return the objects dict for a sub-task from its parent's bindings."""
+    objects_dict = {}
+    for role in subtask.object_keys():
+        if role not in role_map:
+            raise ValueError(
+                "No binding for role %s of %s." % (role, subtask.name))
+        objects_dict[role] = bindings[role_map[role]]
+    return objects_dict
+
+
+def _conditions_met(preconditions, state, bindings):
+    for condition_class, object_names, value in preconditions:
+        if isinstance(object_names, basestring):
+            object_names = [object_names]
+        objects_tuple = tuple(bindings[name] for name in object_names)
+        if state.value((condition_class, objects_tuple)) != value:
+            return False
+    return True
+
+
+class TaskPlanner(object):
+    """Plans by decomposing compound tasks down to primitive actions.
+
+    Every primitive step is checked against the world as simulated by the
+    steps before it. The method a task was last decomposed by, and the
+    objects bound to its free roles, are remembered per (task, actor,
+    objects). That method is tried again first when its preconditions still
+    hold, which skips the search over methods and free role bindings.
+    """
+
+    def __init__(self, objects=None):
+        """TaskPlanner constructor.
+
+        PARAMETERS
+        * objects - A list of objects to bind free roles of methods to.
+        """
+        if objects is None:
+            raise ValueError("Must specify objects")
+        self.objects = objects
+        self._decompositions = {}
+
+    def plan(self, task, actor=None, state=None, **objects):
+        """Return a list of (actor, action, objects_dict) tuples, or None.
+
+        PARAMETERS:
+        * task - A Task or Action class.
+        * actor - The agent performing the task.
+        * state - An optional WorldSnapshot, by default the live world.
+        * objects - The objects bound to the task's roles.
+        """
+        if state is None:
+            state = WorldSnapshot()
+        for steps, end_state in self._decompose(
+                task, actor, objects, state, depth=0):
+            return steps
+        return None
+
+    def _decompose(self, task, actor, objects_dict, state, depth):
+        """Yield (steps, state) for each way of performing task in state."""
+        if issubclass(task, Action):
+            if task.preconditions_met(state, actor=actor, **objects_dict):
+                end_state = state.copy()
+                end_state.apply(
+                    task.calculate_effects(actor=actor, **objects_dict))
+                yield [(actor, task, objects_dict)], end_state
+            return
+
+        if depth > MAX_DECOMPOSITION_DEPTH:
+            raise DecompositionDepthException
+
+        key = (task, actor, tuple(sorted(objects_dict.items())))
+        remembered_steps = None
+        remembered = self._decompositions.get(key)
+        if remembered is not None:
+            method, free_objects = remembered
+            for remembered_steps, end_state in self._apply_bound_method(
+                    method, actor, objects_dict, free_objects, state, depth):
+                log.debug("Reusing decomposition of %s" % task.name)
+                yield remembered_steps, end_state
+                break
+
+        for method in task.methods:
+            for free_objects, steps, end_state in self._apply_method(
+                    method, actor, objects_dict, state, depth):
+                if steps == remembered_steps:
+                    continue
+                self._decompositions[key] = (method, free_objects)
+                yield steps, end_state
+
+    def _apply_method(self, method, actor, objects_dict, state, depth):
+        """Yield (free_objects, steps, state) for each use of method."""
+        free_role_values = product(self.objects, repeat=len(method.free_roles))
+        for free_objects in free_role_values:
+            for steps, end_state in self._apply_bound_method(
+                    method, actor, objects_dict, free_objects, state, depth):
+                yield free_objects, steps, end_state
+
+    def _apply_bound_method(self, method, actor, objects_dict, free_objects,
+                            state, depth):
+        bindings = {'actor': actor}
+        bindings.update(objects_dict)
+        bindings.update(zip(method.free_roles, free_objects))
+        if not _conditions_met(method.preconditions, state, bindings):
+            return
+        for steps, end_state in self._apply_subtasks(
+                method.subtasks, actor, bindings, state, depth):
+            yield steps, end_state
+
+    def _apply_subtasks(self, subtasks, actor, bindings, state, depth):
+        if not subtasks:
+            yield [], state
+            return
+        subtask, role_map = subtasks[0]
+        subtask_objects = _bind_subtask(subtask, role_map, bindings)
+        for steps, next_state in self._decompose(
+                subtask, actor, subtask_objects, state, depth + 1):
+            for rest_steps, end_state in self._apply_subtasks(
+                    subtasks[1:], actor, bindings, next_state, depth):
+                yield steps + rest_steps, end_state
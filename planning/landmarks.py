@@ -0,0 +1,156 @@
+from planning.settings import log
+from planning.snapshots import WorldSnapshot
+
+# Maps (actions, goal condition class, goal value) to the lifted landmarks
+# of goals of that type
+_landmark_cache = {}
+
+
+def _role_names(object_names):
+    if isinstance(object_names, basestring):
+        return (object_names,)
+    return tuple(object_names)
+
+
+def _goal_roles(number_of_objects):
+    return tuple('goal_%d' % number for number in xrange(number_of_objects))
+
+
+def _achiever_preconditions(action, landmark):
+    """Return the preconditions of each way action can achieve landmark.
+
+    Returns a list with a set of preconditions for each effect of action
+    that achieves the landmark. The preconditions are renamed to the roles
+    of the landmark, and those on objects the landmark does not fix are
+    left out, as they could be met by any object.
+    """
+    condition_class, roles, value = landmark
+    achievers = []
+    for effect_class, object_names, effect_value in action.effects:
+        if effect_class is not condition_class or effect_value != value:
+            continue
+        binding = {'actor': 'actor'}
+        binding.update(zip(_role_names(object_names), roles))
+        preconditions = set()
+        for precondition_class, precondition_names, precondition_value in (
+                action.preconditions):
+            precondition_roles = _role_names(precondition_names)
+            if any(role not in binding for role in precondition_roles):
+                continue
+            preconditions.add((
+                precondition_class,
+                tuple(binding[role] for role in precondition_roles),
+                precondition_value
+            ))
+        achievers.append(preconditions)
+    return achievers
+
+
+def lifted_landmarks(available_actions, goal_condition_class, goal_value):
+    """Return the landmarks of goals of a type, in terms of roles.
+
+    Returns a dict mapping each landmark, a tuple like
+    (condition_class, roles, value), to the landmarks that must be met
+    before it whenever it is not met to begin with. Roles are 'actor' and
+    'goal_0', 'goal_1', ... for the objects of the goal condition. A
+    landmark is needed before another when it is a precondition that every
+    action achieving the other has in common. Results are cached per
+    (actions, goal condition class, goal value).
+    """
+    key = (tuple(available_actions), goal_condition_class, goal_value)
+    try:
+        return _landmark_cache[key]
+    except KeyError:
+        pass
+    goal_landmark = (
+        goal_condition_class,
+        _goal_roles(goal_condition_class.number_of_objects),
+        goal_value
+    )
+    graph = {}
+    queue = [goal_landmark]
+    while queue:
+        landmark = queue.pop(0)
+        if landmark in graph:
+            continue
+        common_preconditions = None
+        for action in available_actions:
+            for preconditions in _achiever_preconditions(action, landmark):
+                if common_preconditions is None:
+                    common_preconditions = preconditions
+                else:
+                    common_preconditions &= preconditions
+        children = sorted(common_preconditions or [])
+        graph[landmark] = children
+        queue.extend(children)
+    _landmark_cache[key] = graph
+    return graph
+
+
+def ground_landmarks(actor, goal, available_actions, state=None):
+    """Return the ground landmarks of goal that are not met to begin with.
+
+    Every plan for goal makes each of the returned ground conditions hold
+    at some point. Returns a list of (planning_tuple, value) tuples.
+    Whether a landmark is met is read from state, an optional WorldSnapshot,
+    or from the live objects by default.
+    """
+    if state is None:
+        state = WorldSnapshot()
+    goal_condition = goal.goal_condition
+    graph = lifted_landmarks(
+        available_actions, goal_condition.__class__, goal.goal_value)
+    objects_by_role = {'actor': actor}
+    objects_by_role.update(zip(
+        _goal_roles(len(goal_condition.objects)), goal_condition.objects))
+
+    goal_landmark = (
+        goal_condition.__class__,
+        _goal_roles(len(goal_condition.objects)),
+        goal.goal_value
+    )
+    landmarks = []
+    seen = set()
+    queue = [goal_landmark]
+    while queue:
+        landmark = queue.pop(0)
+        if landmark in seen:
+            continue
+        seen.add(landmark)
+        condition_class, roles, value = landmark
+        objects_tuple = tuple(objects_by_role[role] for role in roles)
+        planning_tuple = (condition_class, objects_tuple)
+        if state.value(planning_tuple) == value:
+            # Already met, so nothing has to happen before it
+            continue
+        landmarks.append((planning_tuple, value))
+        queue.extend(graph[landmark])
+    log.debug("Landmarks: %s" % landmarks)
+    return landmarks
+
+
+def landmark_heuristic(actor=None, goal=None, available_actions=None,
+                       state=None):
+    """Return a landmark-count heuristic for possible plans of goal.
+
+    The heuristic counts the landmarks of goal that none of a possible
+    plan's actions achieve yet. Each of them needs at least one more
+    action before the plan can start from the initial conditions, read from
+    state if it is given. Use it with best_first_plan_search().
+    """
+    required_keys = [actor, goal, available_actions]
+    if any([keywrd is None for keywrd in required_keys]):
+        raise ValueError("Inputs must not be None.")
+    landmarks = ground_landmarks(actor, goal, available_actions, state)
+
+    def heuristic(possible_plan):
+        achieved = {}
+        for step_actor, action, objects_dict in (
+                possible_plan.actions_to_perform):
+            achieved.update(
+                action.calculate_effects(actor=step_actor, **objects_dict))
+        return sum(
+            1 for planning_tuple, value in landmarks
+            if achieved.get(planning_tuple) != value
+        )
+    return heuristic
@@ -0,0 +1,240 @@
+import sys
+import types
+
+from planning.actions import Action
+from planning.settings import log
+
+# Maps the steps and name of a macro to its class, so that the same sequence
+# of steps always gives the same macro
+_macro_cache = {}
+# Macro classes are also attributes of this module, so they can be pickled,
+# for instance by planning.cache
+MACRO_MODULE_NAME = '%s.generated' % __name__
+_macro_module = types.ModuleType(MACRO_MODULE_NAME)
+sys.modules[MACRO_MODULE_NAME] = _macro_module
+
+
+class MacroAction(Action):
+    """An action made of a sequence of other actions.
+
+    steps is a list of tuples like (action, role_map), where role_map maps
+    each role of the action to a role of the macro. Macros are made with
+    make_macro() rather than by subclassing.
+    """
+    steps = None
+
+    @classmethod
+    def expand(cls, actor=None, **objects):
+        """Return the steps as a list of (actor, action, objects_dict)."""
+        all_objects = {'actor': actor}
+        all_objects.update(objects)
+        expanded_steps = []
+        for action, role_map in cls.steps:
+            objects_dict = dict(
+                (role, all_objects[role_map.get(role, role)])
+                for role in action.object_keys()
+            )
+            expanded_steps.append((actor, action, objects_dict))
+        return expanded_steps
+
+    @classmethod
+    def apply_action(cls, actor=None, **objects):
+        for step_actor, action, objects_dict in cls.expand(
+                actor=actor, **objects):
+            action.apply_action(actor=step_actor, **objects_dict)
+
+
+def _rename(object_names, role_map):
+    if isinstance(object_names, basestring):
+        return role_map.get(object_names, object_names)
+    return tuple(role_map.get(name, name) for name in object_names)
+
+
+def make_macro(steps, name=None):
+    """Return a MacroAction class performing steps in order.
+
+    The macro's preconditions are those of its steps that are not met by
+    the effects of earlier steps, and its effects are the last effect of
+    any step on each condition. Raises ValueError when a step needs a
+    condition that an earlier step undoes, or that contradicts another
+    precondition, as the macro could then never be performed.
+
+    The macro's cost is the total cost of its steps and its probability
+    is the chance that every step succeeds, although its outcomes treat a
+    failed macro as changing nothing. rollout_plan() performs macros step
+    by step instead, to account for steps that succeed before one fails.
+
+    PARAMETERS:
+    * steps - A list of actions, or of tuples like (action, role_map)
+      where role_map maps roles of the action to roles of the macro.
+      Roles that are not mapped keep their name, so steps refer to the
+      same object wherever they use the same role name.
+    * name - An optional name for the macro.
+    """
+    normalized_steps = []
+    for step in steps:
+        if isinstance(step, tuple):
+            action, role_map = step
+        else:
+            action, role_map = step, {}
+        normalized_steps.append((action, dict(role_map)))
+    if len(normalized_steps) < 2:
+        raise ValueError("A macro needs at least two steps.")
+
+    cache_key = (_signature(normalized_steps), name)
+    if cache_key in _macro_cache:
+        return _macro_cache[cache_key]
+
+    preconditions = []
+    required = {}
+    effects = []
+    established = {}
+    for step_number, (action, role_map) in enumerate(normalized_steps):
+        for condition_class, object_names, value in action.preconditions:
+            object_names = _rename(object_names, role_map)
+            key = (condition_class, object_names)
+            if key in established:
+                if established[key] != value:
+                    raise ValueError(
+                        "Step %d of the macro needs %s to be %s, which an "
+                        "earlier step undoes." % (step_number, key, value))
+                continue
+            if key in required:
+                if required[key] != value:
+                    raise ValueError(
+                        "Step %d of the macro needs %s to be %s, which "
+                        "contradicts an earlier step." % (
+                            step_number, key, value))
+                continue
+            required[key] = value
+            preconditions.append((condition_class, object_names, value))
+        for condition_class, object_names, value in action.effects:
+            object_names = _rename(object_names, role_map)
+            established[(condition_class, object_names)] = value
+
+    # Keep the last effect on each condition, in the order first affected
+    for condition_class, object_names in _effect_keys(normalized_steps):
+        value = established[(condition_class, object_names)]
+        effects.append((condition_class, object_names, value))
+
+    if name is None:
+        name = ', '.join(action.name for action, role_map in normalized_steps)
+    class_name = _unused_class_name('Macro' + ''.join(
+        action.__name__ for action, role_map in normalized_steps))
+    probability = 1.0
+    for action, role_map in normalized_steps:
+        probability *= action.probability
+    macro = type(class_name, (MacroAction,), {
+        'name': name,
+        'preconditions': preconditions,
+        'effects': effects,
+        'steps': normalized_steps,
+        'cost': sum(action.cost for action, role_map in normalized_steps),
+        'probability': probability,
+        '__module__': MACRO_MODULE_NAME,
+    })
+    setattr(_macro_module, class_name, macro)
+    _macro_cache[cache_key] = macro
+    return macro
+
+
+def _unused_class_name(class_name):
+    """Return class_name, numbered if a macro already has that name."""
+    unused_name = class_name
+    number = 2
+    while hasattr(_macro_module, unused_name):
+        unused_name = '%s%d' % (class_name, number)
+        number += 1
+    return unused_name
+
+
+def _signature(steps):
+    return tuple(
+        (action, tuple(sorted(role_map.items())))
+        for action, role_map in steps
+    )
+
+
+def _effect_keys(steps):
+    keys = []
+    for action, role_map in steps:
+        for condition_class, object_names, value in action.effects:
+            key = (condition_class, _rename(object_names, role_map))
+            if key not in keys:
+                keys.append(key)
+    return keys
+
+
+def _step_signatures(plan_steps):
+    """Return the (action, role_map) steps that plan_steps are an instance of.
+
+    Each object is given the role name it first appears under, so steps
+    performed on the same object share a role in the macro.
+    """
+    role_names = {}
+    used_names = set(['actor'])
+    steps = []
+    for actor, action, objects_dict in plan_steps:
+        role_names.setdefault(actor, 'actor')
+        role_map = {}
+        for role in sorted(objects_dict.keys()):
+            obj = objects_dict[role]
+            if obj not in role_names:
+                macro_role = role
+                suffix = 2
+                while macro_role in used_names:
+                    macro_role = '%s_%d' % (role, suffix)
+                    suffix += 1
+                used_names.add(macro_role)
+                role_names[obj] = macro_role
+            role_map[role] = role_names[obj]
+        steps.append((action, role_map))
+    return steps
+
+
+def mine_macros(plans, min_count=2, max_length=3):
+    """Return macros for the step sequences that recur in plans.
+
+    Every run of two to max_length consecutive steps in each plan is
+    counted, and a macro is made for each run seen at least min_count
+    times. Macros are returned most frequent first.
+
+    PARAMETERS:
+    * plans - A list of action sequences as returned by select_plan().
+    * min_count - How many times a run must be seen.
+    * max_length - The longest run of steps to consider.
+    """
+    counts = {}
+    first_seen = {}
+    for plan in plans:
+        for start in xrange(len(plan)):
+            last_end = min(start + max_length, len(plan))
+            for end in xrange(start + 2, last_end + 1):
+                steps = _step_signatures(plan[start:end])
+                signature = _signature(steps)
+                counts[signature] = counts.get(signature, 0) + 1
+                first_seen.setdefault(signature, (len(first_seen), steps))
+
+    frequent = [
+        run_signature for run_signature, count in counts.iteritems()
+        if count >= min_count
+    ]
+    frequent.sort(key=lambda run_signature: (
+        -counts[run_signature], first_seen[run_signature][0]))
+    macros = []
+    for run_signature in frequent:
+        steps = first_seen[run_signature][1]
+        try:
+            macros.append(make_macro(steps))
+        except ValueError as e:
+            log.debug("Skipping macro: %s" % e)
+    return macros
+
+
+def add_macros(available_actions, macros):
+    """Return available_actions with the macros not already in it added."""
+    actions = list(available_actions)
+    for macro in macros:
+        if macro not in actions:
+            actions.append(macro)
+    return actions
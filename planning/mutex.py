@@ -0,0 +1,113 @@
+from planning.settings import log
+
+# Maps a tuple of actions to the invariants found for them
+_invariant_cache = {}
+
+
+def _role_names(object_names):
+    if isinstance(object_names, basestring):
+        return (object_names,)
+    return tuple(object_names)
+
+
+def _is_balanced(action, condition_class, value):
+    """Check that action never adds a second condition_class with value.
+
+    Every effect setting condition_class to value on some objects must be
+    paired with an effect taking value away from other objects, which the
+    preconditions require to have had value beforehand.
+    """
+    preconditions = set(
+        (_role_names(object_names), precondition_value)
+        for precondition_class, object_names, precondition_value
+        in action.preconditions
+        if precondition_class is condition_class
+    )
+    effects = [
+        (_role_names(object_names), effect_value)
+        for effect_class, object_names, effect_value in action.effects
+        if effect_class is condition_class
+    ]
+    added = [roles for roles, effect_value in effects if effect_value == value]
+    removed = [
+        roles for roles, effect_value in effects
+        if effect_value != value and (roles, value) in preconditions
+    ]
+    # Adding value where the preconditions say it already is changes nothing
+    added = [roles for roles in added if (roles, value) not in preconditions]
+    if len(added) > 1:
+        return False
+    if added and not [roles for roles in removed if roles != added[0]]:
+        return False
+    return True
+
+
+def find_invariants(available_actions):
+    """Return the invariants that the actions can never break.
+
+    Each invariant is a tuple like (condition_class, value), meaning that
+    if at most one ground condition of condition_class has value, no
+    sequence of the actions will lead to more than one having it. Two
+    ground conditions of an invariant both having value are then mutually
+    exclusive. Only conditions of a single object are considered.
+    Results are cached per tuple of actions.
+    """
+    key = tuple(available_actions)
+    try:
+        return _invariant_cache[key]
+    except KeyError:
+        pass
+    candidates = []
+    for action in available_actions:
+        for condition_class, object_names, value in action.effects:
+            candidate = (condition_class, value)
+            if condition_class.number_of_objects != 1:
+                continue
+            if candidate not in candidates:
+                candidates.append(candidate)
+    invariants = [
+        (condition_class, value) for condition_class, value in candidates
+        if all(
+            _is_balanced(action, condition_class, value)
+            for action in available_actions
+        )
+    ]
+    log.debug("Invariants: %s" % invariants)
+    _invariant_cache[key] = invariants
+    return invariants
+
+
+def holding_invariants(invariants, objects, state=None):
+    """Return the invariants that currently hold for objects.
+
+    Conditions are read from state when it is given, and otherwise
+    evaluated on the live objects.
+    """
+    holding = []
+    for condition_class, value in invariants:
+        if state is None:
+            results = condition_class.evaluate_many(
+                [[obj] for obj in objects])
+        else:
+            results = [
+                state.value((condition_class, (obj,))) for obj in objects]
+        if results.count(value) <= 1:
+            holding.append((condition_class, value))
+    return holding
+
+
+def violates_invariants(conditions, invariants):
+    """Check if a conditions dictionary breaks any invariant.
+
+    PARAMETERS:
+    * conditions - A dict like {planning_tuple: value}.
+    * invariants - A list of invariants that hold, like (class, value).
+    """
+    counts = {}
+    for (condition_class, objects_tuple), value in conditions.iteritems():
+        key = (condition_class, value)
+        counts[key] = counts.get(key, 0) + 1
+    for invariant in invariants:
+        if counts.get(invariant, 0) > 1:
+            return True
+    return False
@@ -0,0 +1,87 @@
+from planning.settings import log
+
+
+def _step_conditions(step):
+    """Return the condition keys a step reads and the ones it writes."""
+    actor, action, objects_dict = step
+    reads = set(
+        (condition_class, objects_tuple)
+        for condition_class, objects_tuple, value in (
+            action.calculate_preconditions(actor=actor, **objects_dict))
+    )
+    writes = set(action.calculate_effects(actor=actor, **objects_dict))
+    return reads, writes
+
+
+class PartialOrderPlan(object):
+    """A linear plan with only the orderings its steps depend on.
+
+    A step must come after an earlier step when it needs a condition the
+    earlier step changes, when it changes a condition the earlier step
+    needs, or when both change the same condition. Steps that touch no
+    common conditions, or only need the same ones, may be performed in
+    either order or at the same time, and every order the partial order
+    allows is as valid as the original plan.
+    """
+
+    def __init__(self, actions_sequence=None, serialize_actors=False):
+        """PartialOrderPlan constructor.
+
+        PARAMETERS
+        * actions_sequence - A list of (actor, action, objects_dict) tuples,
+          as returned by select_plan().
+        * serialize_actors - Whether each actor performs its steps one at a
+          time, in the order of the original plan.
+        """
+        if actions_sequence is None:
+            raise ValueError("Must specify actions_sequence")
+        self.steps = list(actions_sequence)
+        self.predecessors = [set() for step in self.steps]
+        step_conditions = [_step_conditions(step) for step in self.steps]
+        for later, (later_reads, later_writes) in enumerate(step_conditions):
+            for earlier in xrange(later):
+                earlier_reads, earlier_writes = step_conditions[earlier]
+                depends = (
+                    earlier_writes & (later_reads | later_writes) or
+                    earlier_reads & later_writes
+                )
+                same_actor = self.steps[earlier][0] is self.steps[later][0]
+                if depends or (serialize_actors and same_actor):
+                    self.predecessors[later].add(earlier)
+        log.debug("Step predecessors: %s" % self.predecessors)
+
+    def __repr__(self):
+        return "<PartialOrderPlan: %s>" % self.layers()
+
+    def __len__(self):
+        return len(self.steps)
+
+    def ready(self, completed=()):
+        """Return the numbers of the steps that can be performed next.
+
+        PARAMETERS:
+        * completed - The numbers of the steps already performed.
+        """
+        completed = set(completed)
+        return [
+            step_number
+            for step_number, predecessors in enumerate(self.predecessors)
+            if step_number not in completed and predecessors <= completed
+        ]
+
+    def layers(self):
+        """Return lists of step numbers that can be performed together.
+
+        Each step is in the first layer after all of its predecessors, so
+        performing the layers in order, one per turn, takes as few turns as
+        the orderings allow.
+        """
+        layer_numbers = []
+        for predecessors in self.predecessors:
+            layer_numbers.append(max(
+                [layer_numbers[predecessor] + 1
+                 for predecessor in predecessors] or [0]))
+        layers = [[] for layer in xrange(max(layer_numbers or [-1]) + 1)]
+        for step_number, layer_number in enumerate(layer_numbers):
+            layers[layer_number].append(step_number)
+        return layers
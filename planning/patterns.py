@@ -0,0 +1,298 @@
+from array import array
+from itertools import product
+
+from planning.settings import log
+from planning.snapshots import WorldSnapshot
+
+# The most conditions a pattern may cover. A pattern database holds a
+# distance between every pair of abstract states, 4 ** atoms bytes, and a
+# table of 3 ** atoms bytes for each state searches start from.
+MAX_PATTERN_ATOMS = 8
+# Distances are stored in bytes, with this marking states out of reach
+UNREACHABLE = 255
+
+# Maps (pattern conditions, actions, number of roles) to its PatternDatabase
+_database_cache = {}
+
+
+class PatternDatabase(object):
+    """Shortest distances between the states of an abstraction of a domain.
+
+    The abstraction is about a few roles rather than about particular
+    objects: role 0 is the actor and the others are the objects of a goal.
+    It keeps only the conditions of a few condition classes, the pattern,
+    on those roles and forgets the rest. Every action is projected onto
+    the pattern for each way of binding its objects to the roles or to
+    some other object, so each concrete step is one abstract step, and
+    abstract distances never overestimate concrete ones.
+
+    The distance between every pair of abstract states is found when the
+    database is built. For each state a search starts from, the fewest
+    steps to every partial abstract state is then tabulated once, so that
+    estimating a possible plan is a single array lookup.
+    """
+
+    def __init__(self, pattern_conditions=None, available_actions=None,
+                 number_of_roles=1, distances=None):
+        """PatternDatabase constructor.
+
+        PARAMETERS
+        * pattern_conditions - A list of condition classes to keep.
+        * available_actions - A list of possible actions.
+        * number_of_roles - How many distinct objects the abstraction is
+          about, including the actor.
+        * distances - Optionally, the distances of a database built before
+          for the same pattern, actions and roles, such as one loaded by
+          planning.cache.load_cache(), which are then not searched again.
+        """
+        if any(val is None for val in [pattern_conditions, available_actions]):
+            raise ValueError("Inputs must not be None.")
+        if number_of_roles < 1:
+            raise ValueError("number_of_roles must be one or greater.")
+        self.number_of_roles = number_of_roles
+        self.atoms = []
+        for condition_class in pattern_conditions:
+            for roles in product(
+                    xrange(number_of_roles),
+                    repeat=condition_class.number_of_objects):
+                self.atoms.append((condition_class, roles))
+        if len(self.atoms) > MAX_PATTERN_ATOMS:
+            raise ValueError(
+                "A pattern of %d conditions is more than the maximum of %d."
+                % (len(self.atoms), MAX_PATTERN_ATOMS))
+        self._atom_numbers = dict(
+            (atom, number) for number, atom in enumerate(self.atoms))
+        self.number_of_states = 1 << len(self.atoms)
+        self.operators = self._project_actions(available_actions)
+        if distances is None:
+            distances = self._find_distances()
+        elif len(distances) != self.number_of_states ** 2:
+            raise ValueError(
+                "Must have %d distances, got %d distances." % (
+                    self.number_of_states ** 2, len(distances)))
+        self.distances = distances
+        self._partial_distances = {}
+        log.debug("Built pattern database over %s" % self.atoms)
+
+    def __repr__(self):
+        return "<PatternDatabase: %d conditions, %d operators>" % (
+            len(self.atoms), len(self.operators))
+
+    def ground_atoms(self, role_objects):
+        """Return the planning tuple of each atom, with roles bound.
+
+        PARAMETERS:
+        * role_objects - A list of number_of_roles distinct objects, the
+          actor first.
+        """
+        return [
+            (condition_class, tuple(role_objects[role] for role in roles))
+            for condition_class, roles in self.atoms
+        ]
+
+    def partial_distances(self, start_state):
+        """Return the fewest steps from start_state to each partial state.
+
+        Partial states are numbered in base 3, with a digit per atom that
+        is 0 if the atom may have either value, 1 if it is False and 2 if
+        it is True. The table is built the first time it is asked for.
+        """
+        if start_state in self._partial_distances:
+            return self._partial_distances[start_state]
+        number_of_atoms = len(self.atoms)
+        offset = start_state * self.number_of_states
+        table = array('B', [UNREACHABLE]) * (3 ** number_of_atoms)
+        # Every partial state with an unknown atom is reached as soon as
+        # either of its completions is, and completing it gives a larger
+        # number, so go from the largest number down.
+        for partial_state in xrange(len(table) - 1, -1, -1):
+            remainder = partial_state
+            weight = 1
+            state = 0
+            for atom_number in xrange(number_of_atoms):
+                digit = remainder % 3
+                remainder //= 3
+                if digit == 0:
+                    table[partial_state] = min(
+                        table[partial_state + weight],
+                        table[partial_state + 2 * weight])
+                    break
+                if digit == 2:
+                    state |= 1 << atom_number
+                weight *= 3
+            else:
+                table[partial_state] = self.distances[offset + state]
+        self._partial_distances[start_state] = table
+        return table
+
+    def heuristic(self, role_objects, state=None):
+        """Return an admissible heuristic for possible plans.
+
+        The heuristic is the abstract distance from the world, as it is
+        now, to the pattern's part of a possible plan's conditions.
+        Plans whose conditions are out of reach are rated as infinite.
+
+        PARAMETERS:
+        * role_objects - A list of number_of_roles distinct objects, the
+          actor first.
+        * state - An optional WorldSnapshot of the world, by default the
+          live objects.
+        """
+        if state is None:
+            state = WorldSnapshot()
+        if len(role_objects) != self.number_of_roles:
+            raise ValueError("Must use %d objects, got %d objects." % (
+                self.number_of_roles, len(role_objects)))
+        weights = {}
+        start_state = 0
+        for atom_number, planning_tuple in enumerate(
+                self.ground_atoms(role_objects)):
+            weights[planning_tuple] = 3 ** atom_number
+            if state.value(planning_tuple):
+                start_state |= 1 << atom_number
+        table = self.partial_distances(start_state)
+
+        def heuristic(possible_plan):
+            partial_state = 0
+            for planning_tuple, value in possible_plan.conditions.iteritems():
+                weight = weights.get(planning_tuple)
+                if weight is not None:
+                    partial_state += weight * (2 if value else 1)
+            estimate = table[partial_state]
+            if estimate == UNREACHABLE:
+                return float('inf')
+            return estimate
+        return heuristic
+
+    def _project(self, condition_tuples, roles):
+        """Return {atom_number: value} for the pattern's part of
+        condition_tuples, or None if they contradict each other.
+        """
+        values = {}
+        for condition_class, object_names, value in condition_tuples:
+            if isinstance(object_names, basestring):
+                object_names = [object_names]
+            atom = (
+                condition_class, tuple(roles[name] for name in object_names))
+            atom_number = self._atom_numbers.get(atom)
+            if atom_number is None:
+                continue
+            if values.get(atom_number, value) != value:
+                return None
+            values[atom_number] = value
+        return values
+
+    def _project_actions(self, available_actions):
+        """Return the distinct abstract operators of every action.
+
+        Each object of an action is bound to one of the roles or to None,
+        meaning some object outside the abstraction. Operators are tuples
+        like (pre_mask, pre_values, effect_mask, effect_values). Bindings
+        that change nothing in the pattern are left out.
+        """
+        operators = set()
+        role_choices = range(self.number_of_roles) + [None]
+        for action in available_actions:
+            object_keys = action.object_keys()
+            for binding in product(role_choices, repeat=len(object_keys)):
+                bound_roles = [role for role in binding if role is not None]
+                if len(set(bound_roles)) != len(bound_roles):
+                    # Actions are performed on distinct objects
+                    continue
+                roles = {'actor': 0}
+                roles.update(zip(object_keys, binding))
+                preconditions = self._project(action.preconditions, roles)
+                if preconditions is None:
+                    continue
+                effects = {}
+                for condition_tuple in action.effects:
+                    # Later effects on the same condition win
+                    effects.update(self._project([condition_tuple], roles))
+                if not effects:
+                    continue
+                operators.add(
+                    _masks(preconditions) + _masks(effects))
+        return sorted(operators)
+
+    def _find_distances(self):
+        """Return the distance between every pair of abstract states."""
+        number_of_states = self.number_of_states
+        distances = array('B', [UNREACHABLE]) * (
+            number_of_states * number_of_states)
+        for start_state in xrange(number_of_states):
+            offset = start_state * number_of_states
+            distances[offset + start_state] = 0
+            frontier = [start_state]
+            distance = 0
+            while frontier and distance < UNREACHABLE - 1:
+                distance += 1
+                next_frontier = []
+                for state in frontier:
+                    for pre_mask, pre_values, effect_mask, effect_values in (
+                            self.operators):
+                        if state & pre_mask != pre_values:
+                            continue
+                        next_state = (state & ~effect_mask) | effect_values
+                        if distances[offset + next_state] != UNREACHABLE:
+                            continue
+                        distances[offset + next_state] = distance
+                        next_frontier.append(next_state)
+                frontier = next_frontier
+        return distances
+
+
+def _masks(values):
+    """Return (mask, values) bit masks for a dict {atom_number: value}."""
+    mask = 0
+    bits = 0
+    for atom_number, value in values.iteritems():
+        mask |= 1 << atom_number
+        if value:
+            bits |= 1 << atom_number
+    return mask, bits
+
+
+def role_objects(actor, goal):
+    """Return the distinct objects of the actor and the goal, actor first."""
+    objects = [actor]
+    for obj in goal.goal_condition.objects:
+        if obj not in objects:
+            objects.append(obj)
+    return objects
+
+
+def pattern_database(pattern_conditions=None, available_actions=None,
+                     number_of_roles=1):
+    """Return the PatternDatabase for a pattern, building it once.
+
+    Databases are cached per (pattern conditions, actions, number of
+    roles), so they can be built ahead of planning, when the actions are
+    known, and shared by every agent and goal of the domain.
+    """
+    if any(val is None for val in [pattern_conditions, available_actions]):
+        raise ValueError("Inputs must not be None.")
+    key = (
+        tuple(pattern_conditions), tuple(available_actions), number_of_roles)
+    if key not in _database_cache:
+        _database_cache[key] = PatternDatabase(
+            pattern_conditions=pattern_conditions,
+            available_actions=available_actions,
+            number_of_roles=number_of_roles)
+    return _database_cache[key]
+
+
+def pattern_heuristic(actor=None, goal=None, available_actions=None,
+                      pattern_conditions=None, state=None):
+    """Return a pattern-database heuristic for possible plans of goal.
+
+    The pattern is about the actor and the objects of goal. Use it with
+    best_first_plan_search(). See PatternDatabase.heuristic().
+    """
+    required_keys = [actor, goal, available_actions, pattern_conditions]
+    if any([keywrd is None for keywrd in required_keys]):
+        raise ValueError("Inputs must not be None.")
+    objects = role_objects(actor, goal)
+    database = pattern_database(
+        pattern_conditions=pattern_conditions,
+        available_actions=available_actions, number_of_roles=len(objects))
+    return database.heuristic(objects, state)
@@ -1,8 +1,20 @@
-from itertools import permutations
+import heapq
+from itertools import count, islice, permutations
 
+from planning.compiled import compile_action
+from planning.mutex import (
+    find_invariants, holding_invariants, violates_invariants)
+from planning.relevance import prune_search
 from planning.settings import log
+from planning.snapshots import WorldSnapshot
+from planning.states import ConditionIndex, ConditionState
+from planning.symmetry import SymmetryReducer
 
 MAX_SEARCH_DEPTH = 3
+# How many possible plans beam searches keep per depth by default
+BEAM_WIDTH = 10
+# No beam search may keep more possible plans than this per depth
+MAX_BEAM_WIDTH = 1000
 
 
 class PlanningDepthException(Exception):
@@ -10,30 +22,42 @@ class PlanningDepthException(Exception):
 
 
 class PossiblePlan(object):
-    """Helper class to track conditions when searching for plans."""
+    """Helper class to track conditions when searching for plans.
+
+    A plan created with a ConditionIndex also keeps its conditions encoded
+    as a ConditionState, so the search can compare them with integer
+    operations rather than by hashing planning tuples.
+    """
     conditions = None
     actions_to_perform = None
+    condition_index = None
+    state = None
 
-    def __init__(self):
+    def __init__(self, condition_index=None):
         self.conditions = {}
         self.actions_to_perform = []
+        if condition_index is not None:
+            self.condition_index = condition_index
+            self.state = ConditionState()
 
     def __repr__(self):
         return "<Possible Plan. Actions:%s, Conditions: %s>" % (
             self.actions_to_perform, self.conditions
         )
 
-    def matches_initial_conditions(self):
-        """Check if a possible plan matches initial conditions."""
-        all_conditions_match = True
-        for condition_tuple in self.conditions:
-            condition_class, objects_tuple = condition_tuple
-            condition_instance = condition_class(list(objects_tuple))
-            expected_value = self.conditions[condition_tuple]
-            actual_value = condition_instance.evaluate()
-            if expected_value != actual_value:
-                all_conditions_match = False
-        return all_conditions_match
+    def matches_initial_conditions(self, world_state=None):
+        """Check if a possible plan matches initial conditions.
+
+        PARAMETERS:
+        * world_state - An optional WorldSnapshot of the initial
+          conditions, by default the live world. Plans with a
+          ConditionIndex read the world of their index instead.
+        """
+        if self.condition_index is not None:
+            return self.condition_index.holds(self.state)
+        if world_state is None:
+            world_state = WorldSnapshot()
+        return world_state.matches(self.conditions)
 
     def copy(self):
         """Return a copy PossiblePlan that references the same objects."""
@@ -42,8 +66,24 @@ class PossiblePlan(object):
             _copy.conditions[condition] = value
         for action_to_perform in self.actions_to_perform:
             _copy.actions_to_perform.append(action_to_perform)
+        _copy.condition_index = self.condition_index
+        _copy.state = self.state
         return _copy
 
+    def condition_state(self, condition_index):
+        """Return the conditions encoded as a ConditionState.
+
+        Without a condition_index, returns the conditions as a frozenset
+        of (planning_tuple, value) items, which compares the same way.
+        PARAMETERS:
+        * condition_index - The ConditionIndex used to intern conditions.
+        """
+        if condition_index is None:
+            return frozenset(self.conditions.iteritems())
+        if condition_index is self.condition_index:
+            return self.state
+        return condition_index.encode(self.conditions)
+
     def prepend_action(self, action_tuple):
         """Prepend an action to actions_to_perform and update conditions.
         PARAMETERS:
@@ -55,35 +95,235 @@ class PossiblePlan(object):
         # Update the conditions for what they would need to be before the
         # action was performed
         actor, action, objects_dict = action_tuple
-        precondition_tuples = action.calculate_preconditions(
-            actor=actor, **objects_dict
-        )
+        precondition_tuples = compile_action(
+            action).calculate_preconditions(actor, objects_dict)
         for precondition_tuple in precondition_tuples:
             condition, object_tuple, value = precondition_tuple
             self.conditions[(condition, object_tuple)] = value
+        if self.condition_index is not None:
+            objects_tuple = tuple([
+                objects_dict[object_key]
+                for object_key in compile_action(action).object_keys])
+            self.state = self.state.update(
+                self.condition_index.encode_preconditions(
+                    actor, action, objects_tuple))
 
 
-def _create_initial_plan(goal):
+def _create_initial_plan(goal, condition_index=None):
     """Set up the conditions for the initial_plan."""
-    initial_plan = PossiblePlan()
+    initial_plan = PossiblePlan(condition_index)
     goal_condition = goal._goal_condition
     initial_plan.conditions[goal_condition.planning_tuple] = goal.goal_value
+    if condition_index is not None:
+        initial_plan.state = condition_index.encode(initial_plan.conditions)
     return initial_plan
 
 
-def select_plan(actor=None, goal=None, available_actions=None, objects=None):
+def _condition_index(goal, available_actions, state=None,
+                     cache_groundings=True):
+    """Return a ConditionIndex for a search, or None to search without one.
+
+    Only True and False can be encoded in a ConditionState, so searches for
+    goals or with actions that use other values compare conditions
+    dictionaries instead. See ConditionIndex for cache_groundings.
+    """
+    values = [goal.goal_value]
+    for action in available_actions:
+        for condition_tuple in action.preconditions + action.effects:
+            values.append(condition_tuple[2])
+    if any(value not in (True, False) for value in values):
+        log.debug("Searching without a condition index")
+        return None
+    return ConditionIndex(state, cache_groundings=cache_groundings)
+
+
+def select_plan(
+        actor=None, goal=None, available_actions=None, objects=None,
+        reduce_symmetry=False, prune_irrelevant=False, prune_mutex=False,
+        heuristic=None, beam_width=None, state=None):
+    """Return a list of actions to perform to satisfy goal.
+
+    When reduce_symmetry is True, interchangeable objects are collapsed
+    into representatives during the search. See SymmetryReducer.
+    When prune_irrelevant is True, actions and objects that can not
+    contribute to the goal are left out of the search. See prune_search().
+    When prune_mutex is True, possible plans that require mutually
+    exclusive conditions are dropped. See find_invariants().
+    When heuristic is given, possible plans are searched best first rather
+    than breadth first. See best_first_plan_search().
+    When beam_width is given, only that many possible plans are kept at
+    each depth, ranked by heuristic if it is given. See beam_plan_search().
+    When state is given, the world is read from that WorldSnapshot rather
+    than from the live objects, for instance from a SharedWorldSnapshot
+    in a planner worker.
+    """
     log.debug("Planning for goal: %s" % repr(goal))
     log.debug("Planning for actor: %s" % repr(actor))
-    selected_plan = breadth_first_plan_search(
-        actor=actor, goal=goal, available_actions=available_actions,
-        objects=objects)
+    if prune_irrelevant:
+        available_actions, objects = prune_search(
+            actor=actor, goal=goal, available_actions=available_actions,
+            objects=objects, state=state)
+    symmetry_reducer = None
+    if reduce_symmetry:
+        symmetry_reducer = SymmetryReducer(
+            actor=actor, available_actions=available_actions,
+            objects=objects, state=state)
+    invariants = None
+    if prune_mutex:
+        world_objects = list(objects)
+        if actor not in world_objects:
+            world_objects.append(actor)
+        invariants = holding_invariants(
+            find_invariants(available_actions), world_objects, state=state)
+    if beam_width is not None:
+        selected_plan = beam_plan_search(
+            actor=actor, goal=goal, available_actions=available_actions,
+            objects=objects, beam_width=beam_width, scoring=heuristic,
+            symmetry_reducer=symmetry_reducer, invariants=invariants,
+            state=state)
+    elif heuristic is not None:
+        selected_plan = best_first_plan_search(
+            actor=actor, goal=goal, available_actions=available_actions,
+            objects=objects, heuristic=heuristic,
+            symmetry_reducer=symmetry_reducer, invariants=invariants,
+            state=state)
+    else:
+        selected_plan = breadth_first_plan_search(
+            actor=actor, goal=goal, available_actions=available_actions,
+            objects=objects, symmetry_reducer=symmetry_reducer,
+            invariants=invariants, state=state)
     actions_sequence = selected_plan.actions_to_perform
     return actions_sequence
 
 
+def select_plans(
+        actor=None, goal=None, available_actions=None, objects=None,
+        number_of_plans=1):
+    """Return up to number_of_plans alternative action sequences for goal.
+
+    Shorter plans come first. See iter_plans().
+    """
+    possible_plans = iter_plans(
+        actor=actor, goal=goal, available_actions=available_actions,
+        objects=objects)
+    return [
+        possible_plan.actions_to_perform
+        for possible_plan in islice(possible_plans, number_of_plans)
+    ]
+
+
+def select_joint_plan(
+        team=None, goal=None, available_actions=None, objects=None,
+        max_depth=MAX_SEARCH_DEPTH):
+    """Return the steps each member of team performs to satisfy goal.
+
+    This is a breadth-first backwards search like
+    breadth_first_plan_search(), but each action may be performed by any
+    member of team, so members can act for one another, for instance by
+    giving each other things. Plans that regress to the same conditions
+    are only expanded once, whoever performs their actions.
+
+    Returns a dict mapping each member of team to a list of tuples like
+    (step_number, action, objects_dict), where step_number is the
+    position of the step in the joint plan. See assign_steps().
+
+    PARAMETERS:
+    * team - A list of agents planning together.
+    * goal - A Goal object.
+    * available_actions - A list of possible actions.
+    * objects - A list of possible objects to act upon, which should
+      include the members of team for them to act upon each other.
+    * max_depth - The largest number of actions in a plan.
+    """
+    required_keys = [team, goal, available_actions, objects]
+    if any([keywrd is None for keywrd in required_keys]):
+        raise ValueError("Inputs must not be None.")
+    if not team:
+        raise ValueError("team must have at least one member.")
+    log.debug("Joint planning for goal: %s" % repr(goal))
+
+    condition_index = _condition_index(goal, available_actions)
+    possible_plans = [_create_initial_plan(goal, condition_index)]
+    for depth in xrange(max_depth + 1):
+        for possible_plan in possible_plans:
+            if possible_plan.matches_initial_conditions():
+                log.debug("Plan match: %s" % possible_plan)
+                return assign_steps(team, possible_plan.actions_to_perform)
+        if depth == max_depth:
+            break
+        next_possible_plans = []
+        for possible_plan in possible_plans:
+            for member in team:
+                next_possible_plans.extend(_expand_possible_plans(
+                    [possible_plan], available_actions=available_actions,
+                    actor=member, objects=objects))
+        possible_plans = _unique_possible_plans(
+            next_possible_plans, condition_index)
+    raise PlanningDepthException
+
+
+def assign_steps(team, actions_sequence):
+    """Split an actions sequence into the steps of each member of team.
+
+    Returns a dict mapping each member to a list of tuples like
+    (step_number, action, objects_dict), in order.
+    """
+    assignments = dict((member, []) for member in team)
+    for step_number, (actor, action, objects_dict) in enumerate(
+            actions_sequence):
+        if actor not in assignments:
+            raise ValueError("%s is not a member of the team." % actor)
+        assignments[actor].append((step_number, action, objects_dict))
+    return assignments
+
+
+def iter_plans(
+        actor=None, goal=None, available_actions=None, objects=None,
+        max_depth=MAX_SEARCH_DEPTH):
+    """Yield every PossiblePlan that satisfies goal, shortest first.
+
+    This is the breadth-first search of breadth_first_plan_search(), but
+    rather than stopping at the first plan that matches the initial
+    conditions it yields each one and carries on when asked for the next.
+    Each depth is only searched once the plans of the previous depth have
+    all been yielded. Plans that match are not extended any further, and
+    the search ends after max_depth actions.
+
+    PARAMETERS:
+    * actor - The agent planning.
+    * goal - A Goal object.
+    * available_actions - A list of possible actions.
+    * objects - A list of possible objects to act upon.
+    * max_depth - The largest number of actions in a plan.
+    """
+    required_keys = [actor, goal, available_actions, objects]
+    if any([keywrd is None for keywrd in required_keys]):
+        raise ValueError("Inputs must not be None.")
+
+    possible_plans = [_create_initial_plan(goal)]
+    depth = 0
+    while possible_plans and depth <= max_depth:
+        unmatched_plans = []
+        for possible_plan in possible_plans:
+            if possible_plan.matches_initial_conditions():
+                log.debug("Plan match: %s" % possible_plan)
+                yield possible_plan
+            else:
+                unmatched_plans.append(possible_plan)
+        if depth == max_depth:
+            break
+        # Every expansion prepends a different action, so plans stay
+        # distinct without needing to be compared.
+        possible_plans = _expand_possible_plans(
+            unmatched_plans, available_actions=available_actions,
+            actor=actor, objects=objects)
+        depth += 1
+
+
 def breadth_first_plan_search(
         actor=None, goal=None, available_actions=None,
-        objects=None, possible_plans=None, depth=0):
+        objects=None, possible_plans=None, depth=0, condition_index=None,
+        symmetry_reducer=None, invariants=None, state=None):
     """Perform a breadth-first backwards search from the goal.
 
     PARAMETERS:
@@ -92,6 +332,12 @@ def breadth_first_plan_search(
     * available_actions - A list of possible actions.
     * objects - A list of possible objects to act upon.
     * possible_plans - A list of PossiblePlan objects.
+    * condition_index - A ConditionIndex shared across the search.
+    * symmetry_reducer - An optional SymmetryReducer.
+    * invariants - An optional list of invariants that hold, which possible
+      plans are not allowed to break.
+    * state - An optional WorldSnapshot of the initial conditions, by
+      default the live world.
     """
     required_keys = [actor, goal, available_actions, objects]
     if any([keywrd is None for keywrd in required_keys]):
@@ -102,38 +348,283 @@ def breadth_first_plan_search(
 
     # Create an empty possible plan if this is the first iteration.
     if not possible_plans:
-        possible_plans = [_create_initial_plan(goal)]
+        if condition_index is None:
+            condition_index = _condition_index(
+                goal, available_actions, state)
+        possible_plans = [_create_initial_plan(goal, condition_index)]
+    elif condition_index is None:
+        # Carry on with the index, if any, the plans were created with
+        condition_index = possible_plans[0].condition_index
 
     # Check if the goal is satisfied by one of the possible plans.
     for possible_plan in possible_plans:
         log.debug("Checking plan: %s" % possible_plan)
-        if possible_plan.matches_initial_conditions():
+        if possible_plan.matches_initial_conditions(state):
             log.debug("Plan match")
             return possible_plan
         else:
             log.debug("Plan no match")
 
-    next_possible_plans = []
+    next_possible_plans = _expand_possible_plans(
+        possible_plans, available_actions=available_actions,
+        actor=actor, objects=objects, symmetry_reducer=symmetry_reducer,
+        invariants=invariants)
+
+    # Plans that regress to the same conditions will expand identically
+    next_possible_plans = _unique_possible_plans(
+        next_possible_plans, condition_index)
+
+    return breadth_first_plan_search(
+        actor=actor, goal=goal, available_actions=available_actions,
+        objects=objects, possible_plans=next_possible_plans,
+        depth=depth+1, condition_index=condition_index,
+        symmetry_reducer=symmetry_reducer, invariants=invariants,
+        state=state)
+
+
+def best_first_plan_search(
+        actor=None, goal=None, available_actions=None, objects=None,
+        heuristic=None, max_depth=MAX_SEARCH_DEPTH, symmetry_reducer=None,
+        invariants=None, state=None):
+    """Perform a best-first backwards search from the goal.
+
+    Possible plans are expanded in order of their number of actions plus
+    heuristic(possible_plan), an estimate of how many more actions they
+    need. Plans with the same estimate are expanded in the order they were
+    found. Conditions already expanded are not expanded again from as
+    many actions or more, and plans the heuristic rates as infinite are
+    dropped. With no heuristic this finds the same plans as
+    breadth_first_plan_search().
+
+    PARAMETERS:
+    * actor - The agent planning.
+    * goal - A Goal object.
+    * available_actions - A list of possible actions.
+    * objects - A list of possible objects to act upon.
+    * heuristic - A function of a PossiblePlan returning a number, such as
+      one from planning.landmarks.landmark_heuristic().
+    * max_depth - The largest number of actions in a plan.
+    * symmetry_reducer - An optional SymmetryReducer.
+    * invariants - An optional list of invariants that hold, which possible
+      plans are not allowed to break.
+    * state - An optional WorldSnapshot of the initial conditions, by
+      default the live world.
+    """
+    required_keys = [actor, goal, available_actions, objects]
+    if any([keywrd is None for keywrd in required_keys]):
+        raise ValueError("Inputs must not be None.")
+    if heuristic is None:
+        heuristic = _no_heuristic
+
+    condition_index = _condition_index(goal, available_actions, state)
+    # Maps each expanded state to the fewest actions it was expanded with
+    expanded_depths = {}
+    sequence = count()
+    initial_plan = _create_initial_plan(goal, condition_index)
+    frontier = [(heuristic(initial_plan), next(sequence), initial_plan)]
+    while frontier:
+        estimate, _, possible_plan = heapq.heappop(frontier)
+        log.debug("Checking plan: %s" % possible_plan)
+        if possible_plan.matches_initial_conditions(state):
+            log.debug("Plan match")
+            return possible_plan
+        depth = len(possible_plan.actions_to_perform)
+        if depth >= max_depth:
+            continue
+        plan_state = possible_plan.condition_state(condition_index)
+        if expanded_depths.get(plan_state, max_depth) <= depth:
+            # The heuristic depends on a plan's actions as well as its
+            # conditions, so the same conditions may come up again with
+            # fewer actions after they were expanded.
+            continue
+        expanded_depths[plan_state] = depth
+        next_possible_plans = _expand_possible_plans(
+            [possible_plan], available_actions=available_actions,
+            actor=actor, objects=objects, symmetry_reducer=symmetry_reducer,
+            invariants=invariants)
+        for next_possible_plan in next_possible_plans:
+            estimate = depth + 1 + heuristic(next_possible_plan)
+            if estimate == float('inf'):
+                log.debug("Plan out of reach: %s" % next_possible_plan)
+                continue
+            heapq.heappush(
+                frontier, (estimate, next(sequence), next_possible_plan))
+    raise PlanningDepthException
+
+
+def _no_heuristic(possible_plan):
+    return 0
+
+
+def beam_plan_search(
+        actor=None, goal=None, available_actions=None, objects=None,
+        beam_width=BEAM_WIDTH, scoring=None, max_depth=MAX_SEARCH_DEPTH,
+        symmetry_reducer=None, invariants=None, state=None):
+    """Perform a beam search backwards from the goal.
+
+    This is breadth_first_plan_search() keeping only the beam_width
+    possible plans with the lowest scores at each depth, so it uses a
+    bounded amount of memory however many plans each depth has, but may
+    miss plans or return longer ones. Plans with the same score are kept
+    in the order they were found. Bindings of actions are generated one
+    at a time and their encodings are not kept, so memory does not grow
+    with the number of bindings either.
+
+    PARAMETERS:
+    * actor - The agent planning.
+    * goal - A Goal object.
+    * available_actions - A list of possible actions.
+    * objects - A list of possible objects to act upon.
+    * beam_width - How many possible plans to keep per depth, at most
+      MAX_BEAM_WIDTH.
+    * scoring - A function of a PossiblePlan returning a number, lower
+      being better. By default, count_unmet_conditions() in state.
+    * max_depth - The largest number of actions in a plan.
+    * symmetry_reducer - An optional SymmetryReducer.
+    * invariants - An optional list of invariants that hold, which possible
+      plans are not allowed to break.
+    * state - An optional WorldSnapshot of the initial conditions, by
+      default the live world.
+    """
+    required_keys = [actor, goal, available_actions, objects]
+    if any([keywrd is None for keywrd in required_keys]):
+        raise ValueError("Inputs must not be None.")
+    if not 1 <= beam_width <= MAX_BEAM_WIDTH:
+        raise ValueError(
+            "beam_width must be between 1 and %d." % MAX_BEAM_WIDTH)
+    if scoring is None:
+        def scoring(possible_plan):
+            return count_unmet_conditions(possible_plan, state)
+
+    condition_index = _condition_index(
+        goal, available_actions, state, cache_groundings=False)
+    expanded_states = set()
+    beam = [_create_initial_plan(goal, condition_index)]
+    for depth in xrange(max_depth + 1):
+        for possible_plan in beam:
+            log.debug("Checking plan: %s" % possible_plan)
+            if possible_plan.matches_initial_conditions(state):
+                log.debug("Plan match")
+                return possible_plan
+        if depth == max_depth:
+            break
+        for possible_plan in beam:
+            expanded_states.add(possible_plan.condition_state(condition_index))
+        next_possible_plans = _iter_expanded_possible_plans(
+            beam, available_actions=available_actions, actor=actor,
+            objects=objects, symmetry_reducer=symmetry_reducer,
+            invariants=invariants)
+        beam = _best_possible_plans(
+            next_possible_plans, beam_width, scoring, condition_index,
+            expanded_states)
+        if not beam:
+            break
+    raise PlanningDepthException
+
+
+def count_unmet_conditions(possible_plan, state=None):
+    """Return how many conditions of possible_plan do not hold now.
+
+    PARAMETERS:
+    * possible_plan - A PossiblePlan.
+    * state - An optional WorldSnapshot, by default the live world.
+    """
+    if state is None:
+        state = WorldSnapshot()
+    number_unmet = 0
+    for condition_tuple, expected_value in (
+            possible_plan.conditions.iteritems()):
+        if state.value(condition_tuple) != expected_value:
+            number_unmet += 1
+    return number_unmet
+
+
+def _best_possible_plans(
+        possible_plans, number_of_plans, scoring, condition_index,
+        excluded_states):
+    """Return the number_of_plans possible plans with the lowest scores.
+
+    Plans are taken one at a time, so no more than number_of_plans are
+    held at once. Plans whose conditions are in excluded_states or repeat
+    a kept plan's are skipped.
+    """
+    # A heap of (-score, -order, state, plan), so the worst plan is first
+    kept = []
+    kept_states = set()
+    for order, possible_plan in enumerate(possible_plans):
+        state = possible_plan.condition_state(condition_index)
+        if state in excluded_states or state in kept_states:
+            continue
+        entry = (-scoring(possible_plan), -order, state, possible_plan)
+        if len(kept) < number_of_plans:
+            heapq.heappush(kept, entry)
+        elif entry[:2] > kept[0][:2]:
+            dropped_entry = heapq.heapreplace(kept, entry)
+            kept_states.discard(dropped_entry[2])
+        else:
+            continue
+        kept_states.add(state)
+    kept.sort(reverse=True)
+    return [kept_entry[3] for kept_entry in kept]
+
+
+def _expand_possible_plans(
+        possible_plans, available_actions=None, actor=None, objects=None,
+        symmetry_reducer=None, invariants=None):
+    """Return the possible plans one action longer than possible_plans.
+
+    Plans that break any of invariants can never match the initial
+    conditions, so they are dropped.
+    """
+    return list(_iter_expanded_possible_plans(
+        possible_plans, available_actions=available_actions, actor=actor,
+        objects=objects, symmetry_reducer=symmetry_reducer,
+        invariants=invariants))
+
+
+def _iter_expanded_possible_plans(
+        possible_plans, available_actions=None, actor=None, objects=None,
+        symmetry_reducer=None, invariants=None):
+    """Yield the possible plans of _expand_possible_plans() one by one."""
     # Spawn off new possible plans back from existing possible plans
     for possible_plan in possible_plans:
         # log.debug("Possible Plan: %s" % repr(possible_plan))
+        plan_objects = objects
+        if symmetry_reducer is not None:
+            plan_objects = symmetry_reducer.reduce(possible_plan)
         # Check for actions with effects that match the conditions of
         # the possible plan
-        possible_previous_actions = _actions_that_match_possible_plan(
+        possible_previous_actions = _iter_actions_that_match_possible_plan(
             possible_plan, available_actions=available_actions,
-            actor=actor, objects=objects)
+            actor=actor, objects=plan_objects)
         # log.debug("Posssible actions: %s" % possible_previous_actions)
 
         for possible_previous_action in possible_previous_actions:
             # Spawn a copied version of the plan to modify with the
             next_possible_plan = possible_plan.copy()
             next_possible_plan.prepend_action(possible_previous_action)
-            next_possible_plans.append(next_possible_plan)
+            if invariants and violates_invariants(
+                    next_possible_plan.conditions, invariants):
+                log.debug("Plan breaks invariants: %s" % next_possible_plan)
+                continue
+            yield next_possible_plan
 
-    return breadth_first_plan_search(
-        actor=actor, goal=goal, available_actions=available_actions,
-        objects=objects, possible_plans=next_possible_plans,
-        depth=depth+1)
+
+def _unique_possible_plans(possible_plans, condition_index):
+    """Return possible_plans without plans whose conditions repeat.
+
+    The first plan with a given set of conditions is kept, so the order
+    in which plans are found is preserved.
+    """
+    seen_states = set()
+    unique_plans = []
+    for possible_plan in possible_plans:
+        state = possible_plan.condition_state(condition_index)
+        if state in seen_states:
+            continue
+        seen_states.add(state)
+        unique_plans.append(possible_plan)
+    return unique_plans
 
 
 def _actions_that_match_possible_plan(
@@ -149,43 +640,47 @@ def _actions_that_match_possible_plan(
     * actor - The agent planning.
     * objects - A list of possible objects to act upon.
     """
+    return list(_iter_actions_that_match_possible_plan(
+        possible_plan, available_actions=available_actions, actor=actor,
+        objects=objects))
+
+
+def _iter_actions_that_match_possible_plan(
+        possible_plan, available_actions=None, actor=None, objects=None):
+    """Yield the actions _actions_that_match_possible_plan() returns."""
     # log.debug("*** In _actions_that_match_possible_plan()")
-    possible_previous_actions = []
+    condition_index = possible_plan.condition_index
+    plan_state = possible_plan.state
     for action in available_actions:
         # log.debug("Testing action: %s" % action)
-        number_of_objects = len(action.object_keys())
+        compiled_action = compile_action(action)
+        object_keys = compiled_action.object_keys
         # Permute over all possible objects for the action
-        for tuple_of_objects in permutations(objects, number_of_objects):
+        for tuple_of_objects in permutations(objects, len(object_keys)):
             # log.debug("Object permutation: %s" % repr(tuple_of_objects))
-            objects_dict = {}
-            for obj_name, obj in zip(action.object_keys(), tuple_of_objects):
-                objects_dict[obj_name] = obj
-            action_matches = _action_effects_match_possible_plan(
-                action, possible_plan, actor, **objects_dict)
+            if condition_index is not None:
+                # Once no effect contradicts, an effect on any condition of
+                # the plan matches it.
+                effects = condition_index.encode_effects(
+                    actor, action, tuple_of_objects)
+                action_matches = (
+                    effects.overlaps(plan_state) and
+                    not effects.contradicts(plan_state)
+                )
+                if action_matches:
+                    objects_dict = dict(zip(object_keys, tuple_of_objects))
+            else:
+                objects_dict = dict(zip(object_keys, tuple_of_objects))
+                action_matches = compiled_action.effects_match(
+                    possible_plan.conditions, actor, objects_dict)
             if action_matches:
                 # log.debug("Action matches.")
-                possible_previous_actions.append(
-                    (actor, action, objects_dict)
-                )
-    return possible_previous_actions
+                yield (actor, action, objects_dict)
 
 
 def _action_effects_match_possible_plan(
         action, possible_plan=None, actor=None, **objects):
-    action_effects = action.calculate_effects(
-        actor=actor, **objects
-    )
     # No effects may contradict conditions of the possible plan
     # but at least some of the effects should match
-    effects_contradict = False
-    some_effects_match = False
-    for condition in action_effects:
-        value = action_effects[condition]
-        if condition in possible_plan.conditions:
-            if possible_plan.conditions[condition] != value:
-                # An effect of this action does not match
-                # the conditions of the possible plan
-                effects_contradict = True
-            some_effects_match = True
-    action_matches = (some_effects_match and not effects_contradict)
-    return action_matches
+    return compile_action(action).effects_match(
+        possible_plan.conditions, actor, objects)
@@ -0,0 +1,229 @@
+import math
+import random
+
+from planning.macros import MacroAction
+from planning.plans import iter_plans
+from planning.settings import log
+from planning.snapshots import WorldSnapshot
+
+# Rollouts used to evaluate each plan, by default
+NUMBER_OF_SAMPLES = 1000
+
+
+class PlanEvaluation(object):
+    """The estimated outcome of performing a plan."""
+
+    def __init__(self, success_probability, expected_cost):
+        self.success_probability = success_probability
+        self.expected_cost = expected_cost
+
+    def __repr__(self):
+        return "<PlanEvaluation. Success: %.3f, Expected cost: %.3f>" % (
+            self.success_probability, self.expected_cost)
+
+    @property
+    def cost_per_success(self):
+        """The expected cost of getting one success from the plan."""
+        if self.success_probability == 0:
+            return float('inf')
+        return self.expected_cost / self.success_probability
+
+
+def _binomial(number_of_trials, probability, rng):
+    """Draw the number of successes of trials with a probability each.
+
+    The draw inverts the distribution function with a single random
+    number, adding up probabilities from the most likely number outwards,
+    so it takes about as many steps as the standard deviation.
+    """
+    if probability <= 0:
+        return 0
+    if probability >= 1:
+        return number_of_trials
+    mode = min(int((number_of_trials + 1) * probability), number_of_trials)
+    mode_probability = math.exp(
+        math.lgamma(number_of_trials + 1) - math.lgamma(mode + 1) -
+        math.lgamma(number_of_trials - mode + 1) +
+        mode * math.log(probability) +
+        (number_of_trials - mode) * math.log(1 - probability))
+    odds = probability / (1 - probability)
+    draw = rng.random() - mode_probability
+    lower = upper = mode
+    lower_probability = upper_probability = mode_probability
+    while draw >= 0:
+        if upper < number_of_trials:
+            upper_probability *= (
+                (number_of_trials - upper) * odds / (upper + 1))
+            upper += 1
+            draw -= upper_probability
+            if draw < 0:
+                return upper
+        if lower > 0:
+            lower_probability *= (
+                lower / ((number_of_trials - lower + 1) * odds))
+            lower -= 1
+            draw -= lower_probability
+            if draw < 0:
+                return lower
+        if lower == 0 and upper == number_of_trials:
+            # Only rounding errors are left
+            break
+    return mode
+
+
+def _split_samples(number_of_samples, probabilities, rng):
+    """Return how many of the samples fall in each outcome.
+
+    The count of each outcome is drawn from the samples not yet given an
+    outcome, with the outcome's share of the probability left, and the
+    last outcome takes the remaining samples.
+    """
+    if not probabilities:
+        return []
+    counts = []
+    remaining_samples = number_of_samples
+    remaining_probability = 1.0
+    for probability in probabilities[:-1]:
+        if remaining_samples and remaining_probability > 0:
+            count = _binomial(
+                remaining_samples, probability / remaining_probability, rng)
+        else:
+            count = 0
+        counts.append(count)
+        remaining_samples -= count
+        remaining_probability -= probability
+    counts.append(remaining_samples)
+    return counts
+
+
+def _primitive_steps(actions_sequence):
+    """Return actions_sequence with each macro replaced by its steps."""
+    steps = []
+    for actor, action, objects_dict in actions_sequence:
+        if issubclass(action, MacroAction):
+            steps.extend(_primitive_steps(
+                action.expand(actor=actor, **objects_dict)))
+        else:
+            steps.append((actor, action, objects_dict))
+    return steps
+
+
+def rollout_plan(
+        actions_sequence, goal, number_of_samples=NUMBER_OF_SAMPLES,
+        rng=None, state=None):
+    """Estimate how a plan turns out with Monte Carlo rollouts.
+
+    Each rollout performs the steps of the plan in turn, paying the cost of
+    each step attempted. A step fails the rollout when its preconditions
+    are not met, otherwise one of the outcomes of the action is drawn. The
+    rollout succeeds when the goal holds after the last step. Macros are
+    performed step by step, so a macro that fails part way keeps the
+    effects of its earlier steps and only costs the steps attempted.
+
+    Rollouts are simulated in batches: all the rollouts that have drawn the
+    same outcomes so far share one simulated state, and how many of a
+    batch take each outcome is drawn at once. The work per step grows with
+    the number of distinct outcomes, and only with the square root of the
+    number of rollouts.
+
+    PARAMETERS:
+    * actions_sequence - A list of (actor, action, objects_dict) tuples.
+    * goal - A Goal object.
+    * number_of_samples - How many rollouts to perform.
+    * rng - An optional random.Random instance.
+    * state - An optional WorldSnapshot, by default the live world.
+
+    Returns a PlanEvaluation.
+    """
+    if number_of_samples < 1:
+        raise ValueError("number_of_samples must be one or greater.")
+    if rng is None:
+        rng = random
+    if state is None:
+        state = WorldSnapshot()
+
+    total_cost = 0
+    # Tuples like (state, number of rollouts in that state)
+    batches = [(state, number_of_samples)]
+    for actor, action, objects_dict in _primitive_steps(actions_sequence):
+        next_batches = []
+        for batch_state, batch_size in batches:
+            if not action.preconditions_met(
+                    batch_state, actor=actor, **objects_dict):
+                continue
+            total_cost += action.cost * batch_size
+            outcomes = action.calculate_outcomes(actor=actor, **objects_dict)
+            probabilities = [probability for probability, effects in outcomes]
+            counts = _split_samples(batch_size, probabilities, rng)
+            for (probability, effects), count in zip(outcomes, counts):
+                if not count:
+                    continue
+                next_state = batch_state.copy()
+                next_state.apply(effects)
+                next_batches.append((next_state, count))
+        batches = next_batches
+
+    goal_tuple = goal.goal_condition.planning_tuple
+    successes = sum(
+        batch_size for batch_state, batch_size in batches
+        if batch_state.value(goal_tuple) == goal.goal_value
+    )
+    return PlanEvaluation(
+        float(successes) / number_of_samples,
+        float(total_cost) / number_of_samples
+    )
+
+
+def select_robust_plan(
+        actor=None, goal=None, available_actions=None, objects=None,
+        number_of_candidates=5, number_of_samples=NUMBER_OF_SAMPLES,
+        objective='success', seed=None):
+    """Return the most robust of several candidate plans for goal.
+
+    Candidates are the shortest plans found assuming every action
+    succeeds, see iter_plans(). Each is evaluated with rollout_plan().
+
+    PARAMETERS:
+    * actor - The agent planning.
+    * goal - A Goal object.
+    * available_actions - A list of possible actions.
+    * objects - A list of possible objects to act upon.
+    * number_of_candidates - How many plans to evaluate.
+    * number_of_samples - How many rollouts to evaluate each plan with.
+    * objective - 'success' to maximize the chance of success, or 'cost'
+      to minimize the expected cost per success.
+    * seed - An optional seed for the rollouts.
+
+    Returns a tuple like (actions_sequence, PlanEvaluation), or
+    (None, None) if no plan was found.
+    """
+    if objective not in ('success', 'cost'):
+        raise ValueError("objective must be 'success' or 'cost'.")
+    rng = random.Random(seed)
+    # Candidates are evaluated against the same snapshot of the world
+    state = WorldSnapshot()
+
+    best_sequence = None
+    best_evaluation = None
+    best_score = None
+    candidates = iter_plans(
+        actor=actor, goal=goal, available_actions=available_actions,
+        objects=objects)
+    for candidate_number, possible_plan in enumerate(candidates):
+        if candidate_number >= number_of_candidates:
+            break
+        actions_sequence = possible_plan.actions_to_perform
+        evaluation = rollout_plan(
+            actions_sequence, goal, number_of_samples=number_of_samples,
+            rng=rng, state=state)
+        log.debug("Plan %s: %s" % (actions_sequence, evaluation))
+        if objective == 'success':
+            score = (
+                -evaluation.success_probability, evaluation.expected_cost)
+        else:
+            score = (evaluation.cost_per_success, )
+        if best_score is None or score < best_score:
+            best_sequence = actions_sequence
+            best_evaluation = evaluation
+            best_score = score
+    return best_sequence, best_evaluation
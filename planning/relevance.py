@@ -0,0 +1,116 @@
+from planning.settings import log
+from planning.snapshots import WorldSnapshot
+
+# Maps (goal condition class, goal value, actions) to the actions that
+# could contribute to the goal and the static requirements of their roles.
+_relevance_cache = {}
+
+
+def _role_names(object_names):
+    if isinstance(object_names, basestring):
+        return [object_names]
+    return list(object_names)
+
+
+def relevant_actions(goal_condition_class, goal_value, available_actions):
+    """Return the actions that could ever contribute to a goal.
+
+    Starting from the goal, an action is relevant when one of its effects
+    sets a relevant condition to a relevant value, and the preconditions of
+    relevant actions are relevant in turn. Actions keep their order.
+    """
+    relevant_conditions = set([(goal_condition_class, goal_value)])
+    relevant = set()
+    changed = True
+    while changed:
+        changed = False
+        for action in available_actions:
+            if action in relevant:
+                continue
+            if not any(
+                    (condition_class, value) in relevant_conditions
+                    for condition_class, object_names, value in action.effects
+            ):
+                continue
+            relevant.add(action)
+            changed = True
+            for condition_class, object_names, value in action.preconditions:
+                relevant_conditions.add((condition_class, value))
+    return [action for action in available_actions if action in relevant]
+
+
+def static_role_requirements(actions):
+    """Return the unary preconditions that no action can change, by role.
+
+    Returns a dict like {action: {role: [(condition_class, value)]}}. An
+    object can only ever fill a role when it meets the role's requirements.
+    """
+    changeable = set()
+    for action in actions:
+        for condition_class, object_names, value in action.effects:
+            changeable.add(condition_class)
+
+    requirements = {}
+    for action in actions:
+        role_requirements = dict(
+            (role, []) for role in action.object_keys())
+        for condition_class, object_names, value in action.preconditions:
+            role_names = _role_names(object_names)
+            if condition_class in changeable or len(role_names) != 1:
+                continue
+            role = role_names[0]
+            if role in role_requirements:
+                role_requirements[role].append((condition_class, value))
+        requirements[action] = role_requirements
+    return requirements
+
+
+def _relevance(goal, available_actions):
+    goal_condition_class = goal.goal_condition.__class__
+    key = (goal_condition_class, goal.goal_value, tuple(available_actions))
+    try:
+        return _relevance_cache[key]
+    except KeyError:
+        actions = relevant_actions(
+            goal_condition_class, goal.goal_value, available_actions)
+        relevance = (actions, static_role_requirements(actions))
+        _relevance_cache[key] = relevance
+        return relevance
+
+
+def prune_search(actor=None, goal=None, available_actions=None, objects=None,
+                 state=None):
+    """Return the actions and objects that could contribute to goal.
+
+    Returns a tuple like (actions, objects). The actor and the goal's
+    objects are always kept. Other objects are kept when they meet the
+    static requirements of at least one role of a relevant action.
+    Relevant actions are cached per goal condition class and value.
+    Objects are checked on every call, as the world may have changed,
+    against state if it is given and the live objects otherwise.
+    """
+    required_keys = [actor, goal, available_actions, objects]
+    if any([keywrd is None for keywrd in required_keys]):
+        raise ValueError("Inputs must not be None.")
+    if state is None:
+        state = WorldSnapshot()
+    actions, requirements = _relevance(goal, available_actions)
+
+    role_requirements = []
+    for action in actions:
+        role_requirements.extend(requirements[action].values())
+
+    kept_objects = [actor] + list(goal.goal_condition.objects)
+    relevant_objects = []
+    for obj in objects:
+        if obj in kept_objects or any(
+                all(
+                    state.value((condition_class, (obj,))) == value
+                    for condition_class, value in role_requirement
+                )
+                for role_requirement in role_requirements
+        ):
+            relevant_objects.append(obj)
+    log.debug("Relevant actions: %s. Relevant objects: %s" % (
+        actions, relevant_objects))
+    return actions, relevant_objects
@@ -0,0 +1,197 @@
+from planning.plans import PlanningDepthException, select_plan
+from planning.settings import log
+
+
+def _evaluate(planning_tuple):
+    condition_class, objects_tuple = planning_tuple
+    return condition_class(list(objects_tuple)).evaluate()
+
+
+def _achiever_bindings(action, planning_tuple, value, actor):
+    """Return the role bindings that let action achieve a ground condition.
+
+    Only the roles of the matching effect are bound.
+    """
+    condition_class, objects_tuple = planning_tuple
+    bindings = []
+    for effect_class, object_names, effect_value in action.effects:
+        if effect_class is not condition_class or effect_value != value:
+            continue
+        if isinstance(object_names, basestring):
+            object_names = [object_names]
+        binding = {'actor': actor}
+        consistent = True
+        for name, obj in zip(object_names, objects_tuple):
+            if binding.setdefault(name, obj) is not obj:
+                consistent = False
+                break
+        if consistent:
+            bindings.append(binding)
+    return bindings
+
+
+def estimate_plan_cost(actor, goal, available_actions, evaluate=None):
+    """Return a cheap estimate of the number of actions to satisfy goal.
+
+    The estimate is 0 for a satisfied goal. Otherwise it is one for the
+    action achieving the goal, plus the number of that action's
+    preconditions on already bound objects that are not currently met,
+    minimized over the actions that could achieve the goal. Returns None
+    when no action can achieve the goal.
+
+    PARAMETERS:
+    * actor - The agent planning.
+    * goal - A Goal object.
+    * available_actions - A list of possible actions.
+    * evaluate - An optional function returning the value of a planning
+      tuple, used for every condition the estimate reads.
+    """
+    if evaluate is None:
+        evaluate = _evaluate
+    goal_tuple = goal.goal_condition.planning_tuple
+    if evaluate(goal_tuple) == goal.goal_value:
+        return 0
+
+    # Conditions and values that some action can change
+    achievable = set()
+    for action in available_actions:
+        for condition_class, object_names, value in action.effects:
+            achievable.add((condition_class, value))
+
+    best_cost = None
+    for action in available_actions:
+        for binding in _achiever_bindings(
+                action, goal_tuple, goal.goal_value, actor):
+            cost = 1
+            for condition_class, object_names, value in action.preconditions:
+                if isinstance(object_names, basestring):
+                    object_names = [object_names]
+                if any(name not in binding for name in object_names):
+                    continue
+                objects_tuple = tuple(binding[name] for name in object_names)
+                if evaluate((condition_class, objects_tuple)) == value:
+                    continue
+                if (condition_class, value) not in achievable:
+                    # This precondition can never be met
+                    cost = None
+                    break
+                cost += 1
+            if cost is not None and (best_cost is None or cost < best_cost):
+                best_cost = cost
+    return best_cost
+
+
+class GoalSelector(object):
+    """Chooses which goal an agent should pursue.
+
+    Goals are scored by their utility minus an estimate of the cost of a
+    plan to satisfy them, so that the full plan search is only run for the
+    goal the agent will actually pursue. Estimates are cached across ticks.
+    With a ChangeTracker, invalidate() only drops the estimates that read
+    conditions which have changed, otherwise it drops every estimate.
+    """
+
+    def __init__(
+            self, available_actions=None, objects=None, tracker=None,
+            cost_estimator=estimate_plan_cost):
+        """GoalSelector constructor.
+
+        PARAMETERS
+        * available_actions - A list of possible actions.
+        * objects - A list of possible objects to act upon.
+        * tracker - An optional ChangeTracker.
+        * cost_estimator - A function like estimate_plan_cost().
+        """
+        if any(val is None for val in [available_actions, objects]):
+            raise ValueError("Must specify available_actions and objects")
+        self.available_actions = available_actions
+        self.objects = objects
+        self.tracker = tracker
+        self.cost_estimator = cost_estimator
+        # Maps (actor, planning_tuple, value) to (cost, conditions read)
+        self._estimates = {}
+
+    def _goal_key(self, actor, goal):
+        return (actor, goal.goal_condition.planning_tuple, goal.goal_value)
+
+    def estimate_cost(self, actor, goal):
+        """Return the cached cost estimate for goal, or None if unreachable.
+        """
+        key = self._goal_key(actor, goal)
+        try:
+            return self._estimates[key][0]
+        except KeyError:
+            pass
+        conditions_read = []
+
+        def evaluate(planning_tuple):
+            conditions_read.append(planning_tuple)
+            return _evaluate(planning_tuple)
+
+        cost = self.cost_estimator(
+            actor, goal, self.available_actions, evaluate=evaluate)
+        self._estimates[key] = (cost, conditions_read)
+        return cost
+
+    def score(self, actor, goal):
+        """Return the utility of goal less its estimated cost.
+
+        Returns None for unreachable goals.
+        """
+        cost = self.estimate_cost(actor, goal)
+        if cost is None:
+            return None
+        return goal.utility - cost
+
+    def rank_goals(self, actor, goals):
+        """Return the reachable goals, best scoring first."""
+        scored_goals = []
+        for goal in goals:
+            score = self.score(actor, goal)
+            log.debug("Goal %s scores %s" % (goal, score))
+            if score is not None:
+                scored_goals.append((score, goal))
+        scored_goals.sort(key=lambda scored_goal: -scored_goal[0])
+        return [scored_goal[1] for scored_goal in scored_goals]
+
+    def select_goal(self, actor, goals):
+        """Return the best scoring goal, or None if none is reachable."""
+        ranked_goals = self.rank_goals(actor, goals)
+        if not ranked_goals:
+            return None
+        return ranked_goals[0]
+
+    def select_plan(self, actor, goals, **kwargs):
+        """Plan for the best goal that a plan can be found for.
+
+        Returns a tuple like (goal, actions_sequence), or (None, None) if no
+        goal can be planned for. Goals the search fails on are remembered
+        as unreachable until anything changes. Keyword arguments are
+        passed on to select_plan().
+        """
+        for goal in self.rank_goals(actor, goals):
+            try:
+                actions_sequence = select_plan(
+                    actor=actor, goal=goal,
+                    available_actions=self.available_actions,
+                    objects=self.objects, **kwargs)
+            except PlanningDepthException:
+                log.debug("No plan found for goal %s" % goal)
+                # The search read the whole world, not just some conditions
+                key = self._goal_key(actor, goal)
+                self._estimates[key] = (None, None)
+                continue
+            return goal, actions_sequence
+        return None, None
+
+    def invalidate(self):
+        """Drop cached estimates that may no longer be accurate."""
+        if self.tracker is None:
+            self._estimates.clear()
+            return
+        if not self.tracker:
+            return
+        for key, (cost, conditions_read) in self._estimates.items():
+            if conditions_read is None or self.tracker.affects(
+                    conditions_read):
+                del self._estimates[key]
@@ -0,0 +1,246 @@
+from itertools import count
+from Queue import PriorityQueue
+import threading
+import time
+
+from planning.plans import select_plan
+from planning.settings import log
+
+# Priorities for plan requests. Requests with lower numbers are planned first.
+URGENT_PRIORITY = 0
+NORMAL_PRIORITY = 10
+BACKGROUND_PRIORITY = 20
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+class PlanningServiceStopped(Exception):
+    pass
+
+
+class PlanFuture(object):
+    """The eventual result of a plan request.
+
+    Callbacks added with add_done_callback() are called with the future
+    once it is done, from the thread that finished it. To deliver results
+    to an event loop, use a callback that hands the future over to the
+    loop's thread, such as one calling an asyncio loop's
+    call_soon_threadsafe().
+    """
+
+    def __init__(self):
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks = []
+        self._result = None
+        self._exception = None
+
+    def __repr__(self):
+        if not self.done():
+            return "<PlanFuture pending>"
+        if self._exception is not None:
+            return "<PlanFuture failed: %r>" % self._exception
+        return "<PlanFuture: %s>" % self._result
+
+    def done(self):
+        return self._done.is_set()
+
+    def result(self, timeout=None):
+        """Return the actions sequence, waiting up to timeout seconds.
+
+        Raises the exception the request failed with, if any.
+        """
+        if not self._done.wait(timeout):
+            raise DeadlineExceeded("No plan within %s seconds." % timeout)
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+    def exception(self, timeout=None):
+        if not self._done.wait(timeout):
+            raise DeadlineExceeded("No plan within %s seconds." % timeout)
+        return self._exception
+
+    def add_done_callback(self, callback):
+        with self._lock:
+            if not self.done():
+                self._callbacks.append(callback)
+                return
+        callback(self)
+
+    def set_result(self, result):
+        self._finish(result, None)
+
+    def set_exception(self, exception):
+        self._finish(None, exception)
+
+    def _finish(self, result, exception):
+        with self._lock:
+            if self.done():
+                return
+            self._result = result
+            self._exception = exception
+            self._done.set()
+            callbacks = self._callbacks
+            self._callbacks = []
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception:
+                log.exception("Plan future callback failed")
+
+
+class _PlanRequest(object):
+    """A plan request shared by every caller asking for the same plan."""
+
+    def __init__(self, key, actor, goal, deadline, kwargs):
+        self.key = key
+        self.actor = actor
+        self.goal = goal
+        self.deadline = deadline
+        self.kwargs = kwargs
+        self.future = PlanFuture()
+        self.started = False
+
+
+class PlanningService(object):
+    """Plans on a pool of worker threads, most urgent requests first.
+
+    Requests for the same plan, meaning the same actor, goal and options,
+    that arrive while one is queued or being planned are merged into it,
+    and all of their callers get the same PlanFuture. Merging a more
+    urgent request moves the merged request up the queue.
+
+    Plans are searched against the live objects, so the world should not
+    change while requests are being planned, or workers should be given
+    objects of their own, such as handles from EntityStore.snapshot().
+    """
+
+    def __init__(
+            self, available_actions=None, objects=None, number_of_workers=2,
+            planner=select_plan):
+        """PlanningService constructor.
+
+        PARAMETERS
+        * available_actions - A list of possible actions.
+        * objects - A list of possible objects to act upon.
+        * number_of_workers - How many plans to search for at once.
+        * planner - A function like select_plan().
+        """
+        if any(val is None for val in [available_actions, objects]):
+            raise ValueError("Must specify available_actions and objects")
+        if number_of_workers < 1:
+            raise ValueError("number_of_workers must be one or greater.")
+        self.available_actions = available_actions
+        self.objects = objects
+        self.number_of_workers = number_of_workers
+        self.planner = planner
+        self._queue = PriorityQueue()
+        self._sequence = count()
+        self._lock = threading.Lock()
+        self._requests = {}
+        self._workers = []
+        self._stopped = False
+
+    def start(self):
+        """Start the worker threads."""
+        if self._workers:
+            raise RuntimeError("The planning service is already running.")
+        self._stopped = False
+        for worker_number in xrange(self.number_of_workers):
+            worker = threading.Thread(
+                target=self._work, name='planner-%d' % worker_number)
+            worker.daemon = True
+            worker.start()
+            self._workers.append(worker)
+
+    def stop(self):
+        """Stop the workers, failing requests that have not been planned.
+
+        Requests being planned when stop() is called are finished first.
+        """
+        with self._lock:
+            self._stopped = True
+            requests = self._requests.values()
+            self._requests = {}
+        for request in requests:
+            if not request.started:
+                request.future.set_exception(PlanningServiceStopped())
+        for worker in self._workers:
+            self._queue.put((float('-inf'), next(self._sequence), None))
+        for worker in self._workers:
+            worker.join()
+        self._workers = []
+
+    def submit(
+            self, actor=None, goal=None, priority=NORMAL_PRIORITY,
+            deadline=None, **kwargs):
+        """Request a plan, returning a PlanFuture for its actions sequence.
+
+        PARAMETERS:
+        * actor - The agent planning.
+        * goal - A Goal object.
+        * priority - Requests with lower priorities are planned first.
+        * deadline - An optional time.time() after which the plan is no
+          longer wanted. Requests still queued then fail with
+          DeadlineExceeded.
+        * kwargs - Passed on to the planner.
+        """
+        if any(val is None for val in [actor, goal]):
+            raise ValueError("Must specify actor and goal")
+        key = (
+            actor, goal.goal_condition.planning_tuple, goal.goal_value,
+            tuple(sorted(kwargs.items()))
+        )
+        with self._lock:
+            if self._stopped:
+                raise PlanningServiceStopped()
+            request = self._requests.get(key)
+            if request is None:
+                request = _PlanRequest(key, actor, goal, deadline, kwargs)
+                self._requests[key] = request
+            else:
+                log.debug("Merging plan request for %s" % repr(goal))
+                # Keep the request for as long as any caller wants it
+                if request.deadline is not None and (
+                        deadline is None or deadline > request.deadline):
+                    request.deadline = deadline
+                if request.started:
+                    return request.future
+            # A merged request may be queued more than once. It is planned
+            # when its most urgent entry comes up, and the rest are skipped.
+            self._queue.put((priority, next(self._sequence), request))
+        return request.future
+
+    def _work(self):
+        while True:
+            priority, sequence, request = self._queue.get()
+            if request is None:
+                return
+            with self._lock:
+                if request.started or request.future.done():
+                    continue
+                request.started = True
+            if request.deadline is not None and time.time() > request.deadline:
+                self._finish(request, exception=DeadlineExceeded())
+                continue
+            try:
+                actions_sequence = self.planner(
+                    actor=request.actor, goal=request.goal,
+                    available_actions=self.available_actions,
+                    objects=self.objects, **request.kwargs)
+            except Exception as e:
+                self._finish(request, exception=e)
+            else:
+                self._finish(request, result=actions_sequence)
+
+    def _finish(self, request, result=None, exception=None):
+        with self._lock:
+            if self._requests.get(request.key) is request:
+                del self._requests[request.key]
+        if exception is not None:
+            request.future.set_exception(exception)
+        else:
+            request.future.set_result(result)
@@ -0,0 +1,317 @@
+from itertools import islice, product
+import json
+import mmap
+import os
+import struct
+import tempfile
+
+from planning.conditions import Is
+from planning.settings import log
+from planning.snapshots import WorldSnapshot
+
+# Bump whenever the layout of shared snapshots changes
+SHARED_SNAPSHOT_VERSION = 1
+# The most objects a shared condition may be about
+MAX_SHARED_ARITY = 2
+# Snapshots are published here, in memory rather than on disk, when possible
+if os.path.isdir('/dev/shm'):
+    SHARED_MEMORY_DIRECTORY = '/dev/shm'
+else:
+    SHARED_MEMORY_DIRECTORY = tempfile.gettempdir()
+# How many tuples of objects are evaluated at a time when publishing
+PUBLISH_CHUNK_SIZE = 4096
+_MAGIC = 'SPSNAP'
+# Magic, version, tick, number of objects and the length of the index
+_HEADER = struct.Struct('<6sIQII')
+
+
+def condition_name(condition_class):
+    """Return the name a condition class is published under."""
+    return '%s.%s' % (condition_class.__module__, condition_class.__name__)
+
+
+# Conditions that readers work out from object ids alone, which are never
+# published, mapped to (number of objects, function of the ids). Ids are
+# unique per object, so Is is equality of ids.
+DERIVED_CONDITIONS = {
+    condition_name(Is): (
+        Is.number_of_objects,
+        lambda object_ids: object_ids[0] == object_ids[1]),
+}
+
+
+def shared_snapshot_path(name):
+    """Return the path to publish the snapshots called name at."""
+    return os.path.join(
+        SHARED_MEMORY_DIRECTORY, 'simpleplanning-%s.snapshot' % name)
+
+
+class ObjectProxy(object):
+    """Stands in for a registered object in a planner worker.
+
+    A proxy carries nothing but the registry id of its object, so it is
+    cheap to send between processes. Proxies with the same id are equal.
+    """
+
+    def __init__(self, object_id):
+        self.id = object_id
+
+    def __repr__(self):
+        return "<Object %d>" % self.id
+
+    def __eq__(self, other):
+        if not isinstance(other, ObjectProxy):
+            return NotImplemented
+        return self.id == other.id
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    def __hash__(self):
+        return hash(self.id)
+
+
+class ObjectRegistry(object):
+    """Gives objects stable integer ids, in the order they are registered.
+
+    Ids are never reused, so a planner in another process can refer to an
+    object by its id in every snapshot published after it was registered.
+    Rather than the objects themselves, send workers plans and goals about
+    ObjectProxy objects, which they plan about with proxy_registry().
+    """
+
+    def __init__(self, objects=None):
+        self._objects = []
+        self._ids = {}
+        for obj in objects or []:
+            self.register(obj)
+
+    def __len__(self):
+        return len(self._objects)
+
+    def register(self, obj):
+        """Return the id of obj, giving it the next id if it has none."""
+        if obj not in self._ids:
+            self._ids[obj] = len(self._objects)
+            self._objects.append(obj)
+        return self._ids[obj]
+
+    def id(self, obj):
+        return self._ids[obj]
+
+    def object(self, object_id):
+        return self._objects[object_id]
+
+    def objects(self):
+        return list(self._objects)
+
+    def proxy_steps(self, steps):
+        """Return steps with each registered object replaced by its proxy.
+
+        PARAMETERS:
+        * steps - A list of tuples like (actor, action, objects_dict).
+        """
+        return _map_steps(steps, lambda obj: ObjectProxy(self.id(obj)))
+
+    def resolve_steps(self, steps):
+        """Return steps with each ObjectProxy replaced by its object."""
+        return _map_steps(steps, lambda proxy: self.object(proxy.id))
+
+
+def _map_steps(steps, convert):
+    return [
+        (convert(actor), action, dict(
+            (role, convert(obj)) for role, obj in objects_dict.iteritems()))
+        for actor, action, objects_dict in steps
+    ]
+
+
+def proxy_registry(number_of_objects):
+    """Return a registry of a proxy for each of number_of_objects objects.
+
+    Each proxy has the same id in it as its object has in the registry a
+    snapshot was published from, so a worker can read the snapshot with
+    SharedWorldSnapshot(snapshot, proxy_registry(snapshot.number_of_objects))
+    without a copy of the objects.
+    """
+    return ObjectRegistry(
+        [ObjectProxy(object_id) for object_id in xrange(number_of_objects)])
+
+
+def publish_snapshot(path, conditions, registry, tick=0):
+    """Evaluate conditions on the registered objects and publish them.
+
+    Each condition gets a bitmap with a bit for every tuple of object ids,
+    including tuples that repeat an object. Tuples are evaluated and
+    written PUBLISH_CHUNK_SIZE at a time, and conditions in
+    DERIVED_CONDITIONS are skipped. Note that a condition of two objects
+    is evaluated len(registry) ** 2 times per snapshot, a hundred million
+    times for ten thousand objects, so only publish conditions of two
+    objects for small registries. Readers can not evaluate conditions
+    that were not published. The snapshot is written to a new file that
+    then replaces path, so readers that already mapped the previous
+    snapshot keep reading it undisturbed.
+
+    PARAMETERS:
+    * path - Where to publish, such as a path from shared_snapshot_path().
+    * conditions - A list of Condition classes of at most MAX_SHARED_ARITY
+      objects.
+    * registry - An ObjectRegistry of the objects to evaluate them on.
+    * tick - The time of the snapshot, which readers can check.
+    """
+    objects = registry.objects()
+    number_of_objects = len(objects)
+    published_conditions = []
+    index = []
+    offset = 0
+    for condition_class in conditions:
+        name = condition_name(condition_class)
+        if name in DERIVED_CONDITIONS:
+            continue
+        arity = condition_class.number_of_objects
+        if arity > MAX_SHARED_ARITY:
+            raise ValueError(
+                "%s is about %d objects, more than the maximum of %d." % (
+                    condition_class.__name__, arity, MAX_SHARED_ARITY))
+        published_conditions.append(condition_class)
+        index.append([name, arity, offset])
+        offset += (number_of_objects ** arity + 7) // 8
+
+    index_data = json.dumps(index)
+    header = _HEADER.pack(
+        _MAGIC, SHARED_SNAPSHOT_VERSION, tick, number_of_objects,
+        len(index_data))
+    directory = os.path.dirname(path) or '.'
+    file_descriptor, temporary_path = tempfile.mkstemp(
+        dir=directory, suffix='.tmp')
+    with os.fdopen(file_descriptor, 'wb') as snapshot_file:
+        snapshot_file.write(header)
+        snapshot_file.write(index_data)
+        for condition_class in published_conditions:
+            snapshot_file.write(_condition_bitmap(condition_class, objects))
+    os.rename(temporary_path, path)
+    log.debug("Published snapshot of tick %d to %s" % (tick, path))
+
+
+def _condition_bitmap(condition_class, objects):
+    """Return the bitmap of a condition over every tuple of objects."""
+    number_of_tuples = len(objects) ** condition_class.number_of_objects
+    bitmap = bytearray((number_of_tuples + 7) // 8)
+    objects_tuples = product(
+        objects, repeat=condition_class.number_of_objects)
+    bit = 0
+    while bit < number_of_tuples:
+        chunk = list(islice(objects_tuples, PUBLISH_CHUNK_SIZE))
+        for value in condition_class.evaluate_many(chunk):
+            if value:
+                bitmap[bit >> 3] |= 1 << (bit & 7)
+            bit += 1
+    return bitmap
+
+
+class SharedSnapshot(object):
+    """A published snapshot, mapped read-only into memory.
+
+    Values are read straight from the mapped bitmaps, so any number of
+    processes can read one snapshot without copying it. A SharedSnapshot
+    keeps reading the snapshot it opened even after a newer one has been
+    published; open the path again to read the newer one.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as snapshot_file:
+            self._mapped = mmap.mmap(
+                snapshot_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, tick, number_of_objects, index_length = (
+            _HEADER.unpack(self._mapped[:_HEADER.size]))
+        if magic != _MAGIC or version != SHARED_SNAPSHOT_VERSION:
+            self._mapped.close()
+            raise ValueError(
+                "%s is not a shared snapshot of this version." % path)
+        self.tick = tick
+        self.number_of_objects = number_of_objects
+        data_offset = _HEADER.size + index_length
+        self._conditions = {}
+        for name, arity, offset in json.loads(
+                self._mapped[_HEADER.size:data_offset]):
+            self._conditions[name] = (arity, data_offset + offset)
+
+    def __repr__(self):
+        return "<SharedSnapshot of tick %d: %d objects>" % (
+            self.tick, self.number_of_objects)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self._mapped.close()
+
+    def conditions(self):
+        """Return the names of the conditions published in the snapshot."""
+        return sorted(self._conditions)
+
+    def value(self, condition, object_ids):
+        """Return the truth value of a condition on objects.
+
+        PARAMETERS:
+        * condition - A Condition class or the name it was published under,
+          or one of DERIVED_CONDITIONS.
+        * object_ids - A tuple of the registry ids of its objects.
+        """
+        if not isinstance(condition, basestring):
+            condition = condition_name(condition)
+        if condition in DERIVED_CONDITIONS:
+            arity, derive = DERIVED_CONDITIONS[condition]
+        else:
+            arity, offset = self._conditions[condition]
+            derive = None
+        if len(object_ids) != arity:
+            raise ValueError("Must use %d objects, got %d objects." % (
+                arity, len(object_ids)))
+        bit = 0
+        for object_id in object_ids:
+            if not 0 <= object_id < self.number_of_objects:
+                raise ValueError("No object with id %s." % object_id)
+            bit = bit * self.number_of_objects + object_id
+        if derive is not None:
+            return derive(object_ids)
+        byte = ord(self._mapped[offset + (bit >> 3)])
+        return bool(byte & (1 << (bit & 7)))
+
+
+class SharedWorldSnapshot(WorldSnapshot):
+    """A WorldSnapshot whose values are read from a SharedSnapshot.
+
+    Planning tuples are resolved to object ids through the registry the
+    snapshot was published with, so planner workers can use it wherever a
+    WorldSnapshot is expected, such as select_plan(), validate_plan(),
+    rollout_plan(), Action.preconditions_met() and TaskPlanner.plan().
+    Copies are copy-on-write as usual. Conditions that were not published
+    raise KeyError rather than being evaluated.
+
+    PARAMETERS:
+    * snapshot - An open SharedSnapshot.
+    * registry - The ObjectRegistry it was published from or, in a worker,
+      the proxy_registry() of the snapshot.
+    """
+
+    def __init__(self, snapshot=None, registry=None):
+        if any(val is None for val in [snapshot, registry]):
+            raise ValueError("Inputs must not be None.")
+        super(SharedWorldSnapshot, self).__init__()
+        self.snapshot = snapshot
+        self.registry = registry
+
+    def __repr__(self):
+        return "<SharedWorldSnapshot of tick %d>" % self.snapshot.tick
+
+    def _evaluate(self, planning_tuple):
+        condition_class, objects_tuple = planning_tuple
+        object_ids = tuple([self.registry.id(obj) for obj in objects_tuple])
+        return self.snapshot.value(condition_class, object_ids)
@@ -0,0 +1,93 @@
+from itertools import izip, permutations
+
+
+class WorldSnapshot(object):
+    """Truth values of ground conditions at a point in time.
+
+    Values are keyed by planning tuples like (condition_class, (obj_1,)).
+    Values that were not captured up front are evaluated against the live
+    objects the first time they are asked for, and remembered afterwards.
+
+    copy() returns a copy-on-write snapshot: changes made to the copy are
+    kept separately and never touch the snapshot it was copied from.
+    A snapshot should not be changed after it has been copied.
+    """
+
+    def __init__(self, values=None, parent=None):
+        if values is None:
+            values = {}
+        self._values = values
+        self._parent = parent
+
+    def __repr__(self):
+        return "<WorldSnapshot: %s>" % self.values()
+
+    @classmethod
+    def capture(cls, conditions, objects):
+        """Evaluate conditions for every permutation of objects.
+
+        Each condition class is evaluated once over all of its object
+        permutations with Condition.evaluate_many(). Note that a condition
+        of n objects has len(objects) ** n permutations, so conditions of
+        more than one object are usually better left to lazy evaluation.
+
+        PARAMETERS:
+        * conditions - A list of Condition classes.
+        * objects - A list of objects on which to evaluate the conditions.
+        """
+        values = {}
+        for condition_class in conditions:
+            objects_tuples = list(
+                permutations(objects, condition_class.number_of_objects))
+            results = condition_class.evaluate_many(objects_tuples)
+            for objects_tuple, value in izip(objects_tuples, results):
+                values[(condition_class, objects_tuple)] = value
+        return cls(values)
+
+    def value(self, planning_tuple):
+        """Return the truth value of a ground condition."""
+        snapshot = self
+        while snapshot is not None:
+            if planning_tuple in snapshot._values:
+                return snapshot._values[planning_tuple]
+            root = snapshot
+            snapshot = snapshot._parent
+        # Not known anywhere, so ask the root snapshot
+        value = root._evaluate(planning_tuple)
+        root._values[planning_tuple] = value
+        return value
+
+    def _evaluate(self, planning_tuple):
+        """Return the value of a ground condition unknown to the snapshot.
+
+        By default, conditions are evaluated on the live objects.
+        """
+        condition_class, objects_tuple = planning_tuple
+        return condition_class(list(objects_tuple)).evaluate()
+
+    def matches(self, conditions):
+        """Check if a conditions dictionary holds in this snapshot."""
+        for planning_tuple, expected_value in conditions.iteritems():
+            if self.value(planning_tuple) != expected_value:
+                return False
+        return True
+
+    def apply(self, effects):
+        """Set the values of an effects dict like {planning_tuple: value}."""
+        self._values.update(effects)
+
+    def copy(self):
+        """Return a copy-on-write child of this snapshot."""
+        return WorldSnapshot(parent=self)
+
+    def values(self):
+        """Return a dict of every value known to this snapshot."""
+        chain = []
+        snapshot = self
+        while snapshot is not None:
+            chain.append(snapshot._values)
+            snapshot = snapshot._parent
+        all_values = {}
+        for values in reversed(chain):
+            all_values.update(values)
+        return all_values
@@ -0,0 +1,221 @@
+from planning.compiled import compile_action
+from planning.snapshots import WorldSnapshot
+
+
+class ConditionIndex(object):
+    """Interns ground conditions as dense integer ids.
+
+    Ground conditions are planning tuples like
+    (condition_class, (obj_1, obj_2)). Each distinct planning tuple is given
+    the next free id, which is used as its bit position in a ConditionState.
+
+    An index belongs to a single search, during which the world is assumed
+    not to change, so the encoded preconditions and effects of actions and
+    the evaluated values of conditions are kept for its lifetime.
+
+    PARAMETERS:
+    * state - An optional WorldSnapshot to read the values of conditions
+      from, by default the live world.
+    * cache_groundings - Whether to keep the encoded preconditions and
+      effects of every action binding. Searches that must not
+      grow with the number of bindings, such as beam searches, turn it
+      off and encode bindings again when they come up again.
+    """
+
+    def __init__(self, state=None, cache_groundings=True):
+        if state is None:
+            state = WorldSnapshot()
+        self._snapshot = state
+        self.cache_groundings = cache_groundings
+        self._ids = {}
+        self._planning_tuples = []
+        self._effects = {}
+        self._preconditions = {}
+        # The evaluated conditions, and those whose value is not a boolean
+        self._world = ConditionState()
+        self._undefined = 0
+
+    def __len__(self):
+        return len(self._planning_tuples)
+
+    def intern(self, planning_tuple):
+        """Return the id of a planning tuple, assigning one if necessary."""
+        try:
+            return self._ids[planning_tuple]
+        except KeyError:
+            condition_id = len(self._planning_tuples)
+            self._ids[planning_tuple] = condition_id
+            self._planning_tuples.append(planning_tuple)
+            return condition_id
+
+    def planning_tuple(self, condition_id):
+        """Return the planning tuple interned as condition_id."""
+        return self._planning_tuples[condition_id]
+
+    def encode(self, conditions):
+        """Return a ConditionState for a conditions dictionary.
+
+        PARAMETERS:
+        * conditions - A dict like {planning_tuple: value}.
+        """
+        ids = self._ids
+        known = 0
+        values = 0
+        for planning_tuple, value in conditions.iteritems():
+            if value not in (True, False):
+                raise ValueError(
+                    "Condition values must be True or False, got %r." % value)
+            condition_id = ids.get(planning_tuple)
+            if condition_id is None:
+                condition_id = self.intern(planning_tuple)
+            bit = 1 << condition_id
+            known |= bit
+            if value:
+                values |= bit
+        return ConditionState(known, values)
+
+    def decode(self, state):
+        """Return the conditions dictionary for a ConditionState."""
+        conditions = {}
+        for condition_id in _bits(state.known):
+            planning_tuple = self._planning_tuples[condition_id]
+            conditions[planning_tuple] = bool(
+                (state.values >> condition_id) & 1)
+        return conditions
+
+    def encode_effects(self, actor, action, objects_tuple):
+        """Return the effects of an action as a ConditionState.
+
+        Later effects on the same condition take precedence.
+
+        PARAMETERS:
+        * actor - The agent performing the action.
+        * action - An Action class.
+        * objects_tuple - The objects the action is performed upon, in the
+          order of its object_keys().
+        """
+        key = (actor, action, objects_tuple)
+        try:
+            return self._effects[key]
+        except KeyError:
+            pass
+        compiled_action = compile_action(action)
+        objects = dict(zip(compiled_action.object_keys, objects_tuple))
+        effects = self.encode(
+            compiled_action.calculate_effects(actor, objects))
+        if self.cache_groundings:
+            self._effects[key] = effects
+        return effects
+
+    def encode_preconditions(self, actor, action, objects_tuple):
+        """Return the preconditions of an action as a ConditionState.
+
+        Later preconditions on the same condition take precedence, as they
+        do in the conditions of a PossiblePlan. See encode_effects().
+        """
+        key = (actor, action, objects_tuple)
+        try:
+            return self._preconditions[key]
+        except KeyError:
+            pass
+        compiled_action = compile_action(action)
+        objects = dict(zip(compiled_action.object_keys, objects_tuple))
+        conditions = {}
+        for condition_class, condition_objects, value in (
+                compiled_action.calculate_preconditions(actor, objects)):
+            conditions[(condition_class, condition_objects)] = value
+        preconditions = self.encode(conditions)
+        if self.cache_groundings:
+            self._preconditions[key] = preconditions
+        return preconditions
+
+    def holds(self, state):
+        """Check if every condition of state has its value in the world.
+
+        Each condition is evaluated the first time it is asked about.
+        """
+        unevaluated = state.known & ~self._world.known
+        if unevaluated:
+            known = self._world.known | unevaluated
+            values = self._world.values
+            for condition_id in _bits(unevaluated):
+                value = self._snapshot.value(
+                    self._planning_tuples[condition_id])
+                if value not in (True, False):
+                    self._undefined |= 1 << condition_id
+                elif value:
+                    values |= 1 << condition_id
+            self._world = ConditionState(known, values)
+        if state.known & self._undefined:
+            return False
+        return state.subsumes(self._world)
+
+
+def _bits(mask):
+    """Yield the positions of the bits set in mask, lowest first."""
+    position = 0
+    while mask:
+        if mask & 1:
+            yield position
+        mask >>= 1
+        position += 1
+
+
+class ConditionState(object):
+    """A partial assignment of truth values to interned ground conditions.
+
+    known has a bit set for every condition the state says something about,
+    values has a bit set for every known condition that is True.
+    Comparing states takes a few integer operations, and states are
+    hashable, so the search uses them to recognize possible plans that
+    regress to the same conditions.
+    """
+    __slots__ = ('known', 'values')
+
+    def __init__(self, known=0, values=0):
+        if values & ~known:
+            raise ValueError("values must be a subset of known.")
+        self.known = known
+        self.values = values
+
+    def __repr__(self):
+        return "<ConditionState known=%s values=%s>" % (
+            bin(self.known), bin(self.values))
+
+    def __eq__(self, other):
+        if not isinstance(other, ConditionState):
+            return NotImplemented
+        return self.known == other.known and self.values == other.values
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    def __hash__(self):
+        return hash((self.known, self.values))
+
+    def overlaps(self, other):
+        """Check if both states say something about a common condition."""
+        return bool(self.known & other.known)
+
+    def contradicts(self, other):
+        """Check if the states disagree on the value of any condition."""
+        return bool((self.values ^ other.values) & self.known & other.known)
+
+    def consistent_with(self, other):
+        """Check if some world state could satisfy both states."""
+        return not self.contradicts(other)
+
+    def subsumes(self, other):
+        """Check if every world state satisfying other also satisfies self."""
+        if self.known & ~other.known:
+            return False
+        return not self.contradicts(other)
+
+    def update(self, other):
+        """Return a new state with the values of other taking precedence."""
+        known = self.known | other.known
+        values = (self.values & ~other.known) | other.values
+        return ConditionState(known, values)
@@ -0,0 +1,163 @@
+from planning.conditions import Is
+from planning.snapshots import WorldSnapshot
+
+
+def schema_conditions(available_actions):
+    """Return the condition classes used by a list of actions."""
+    condition_classes = []
+    for action in available_actions:
+        for condition_tuple in action.preconditions + action.effects:
+            condition_class = condition_tuple[0]
+            if condition_class not in condition_classes:
+                condition_classes.append(condition_class)
+    return condition_classes
+
+
+class SymmetryReducer(object):
+    """Collapses interchangeable objects into representatives.
+
+    Two objects are interchangeable for a possible plan when neither is
+    mentioned by the plan's conditions and every condition used by the
+    available actions evaluates the same on both, on its own and relative
+    to the actor and the objects the plan mentions. Conditions on two
+    objects must also have a single value between each of them and every
+    other unmentioned object. Binding an action to either object then
+    produces equivalent plans, so only a few representatives of each group
+    of interchangeable objects are kept: as many as the action with the
+    most objects could need.
+
+    What tells objects apart regardless of the plan is worked out once per
+    reducer, so each plan only compares objects with the ones it mentions.
+    Conditions on more than two objects are not compared, so objects they
+    are used with are never collapsed. Is only holds between an object and
+    itself, so it never tells unmentioned objects apart and is skipped.
+    Conditions are evaluated in state, an optional WorldSnapshot, or on the
+    live objects by default.
+    """
+
+    def __init__(self, actor=None, available_actions=None, objects=None,
+                 state=None):
+        required_keys = [actor, available_actions, objects]
+        if any([keywrd is None for keywrd in required_keys]):
+            raise ValueError("Inputs must not be None.")
+        self.actor = actor
+        self.objects = objects
+        self.condition_classes = [
+            condition_class
+            for condition_class in schema_conditions(available_actions)
+            if condition_class is not Is
+        ]
+        self._binary_classes = [
+            condition_class for condition_class in self.condition_classes
+            if condition_class.number_of_objects == 2
+        ]
+        self.copies = max(
+            [len(action.object_keys()) for action in available_actions] + [1]
+        )
+        if state is None:
+            state = WorldSnapshot()
+        self._state = state
+        self._object_set = set(objects)
+        # Maps each object to its summary, see _summary()
+        self._summaries = None
+
+    def _value(self, condition_class, objects_tuple):
+        """Evaluate a ground condition, remembering the value.
+
+        The world does not change while planning, so the state keeps values
+        for the lifetime of the reducer.
+        """
+        return self._state.value((condition_class, objects_tuple))
+
+    def _summary(self, obj):
+        """Return what distinguishes obj whatever the plan mentions.
+
+        Returns a tuple like (values, relation_counts), where values are the
+        conditions on obj alone and relation_counts has a dict for each
+        condition on two objects, counting each value it has between obj
+        and every other object in either direction. Returns None when obj
+        can not be compared with other objects.
+        """
+        values = []
+        relation_counts = []
+        for condition_class in self.condition_classes:
+            number_of_objects = condition_class.number_of_objects
+            if number_of_objects == 1:
+                values.append(self._value(condition_class, (obj,)))
+            elif number_of_objects == 2:
+                values.append(self._value(condition_class, (obj, obj)))
+                counts = {}
+                for other in self.objects:
+                    if other is obj:
+                        continue
+                    for value in [
+                            self._value(condition_class, (obj, other)),
+                            self._value(condition_class, (other, obj))]:
+                        counts[value] = counts.get(value, 0) + 1
+                relation_counts.append(counts)
+            elif number_of_objects > 2:
+                return None
+        return tuple(values), relation_counts
+
+    def signature(self, obj, anchors):
+        """Return the evaluated conditions that distinguish obj.
+
+        Returns None when obj can not be compared with other objects.
+        """
+        if self._summaries is None:
+            self._summaries = dict(
+                (each_obj, self._summary(each_obj))
+                for each_obj in self.objects)
+        summary = self._summaries[obj]
+        if summary is None:
+            return None
+        values, relation_counts = summary
+        signature = list(values)
+        for condition_class, counts in zip(
+                self._binary_classes, relation_counts):
+            counts = dict(counts)
+            for anchor in anchors:
+                anchor_values = [
+                    self._value(condition_class, (obj, anchor)),
+                    self._value(condition_class, (anchor, obj)),
+                ]
+                signature.extend(anchor_values)
+                if anchor is not obj and anchor in self._object_set:
+                    # Anchors are compared one by one, not with the rest
+                    for value in anchor_values:
+                        counts[value] -= 1
+            # Relations between unmentioned objects are only the same
+            # whichever objects are picked when they are all alike.
+            relations = [value for value, count in counts.items() if count]
+            if len(relations) > 1:
+                return None
+            signature.append(tuple(relations))
+        return tuple(signature)
+
+    def reduce(self, possible_plan):
+        """Return the objects worth binding when expanding possible_plan.
+
+        Objects keep their original order, so the first of each group of
+        interchangeable objects is its representative.
+        """
+        anchors = [self.actor]
+        for condition_class, objects_tuple in possible_plan.conditions:
+            for obj in objects_tuple:
+                if obj not in anchors:
+                    anchors.append(obj)
+
+        representatives = []
+        kept_counts = {}
+        for obj in self.objects:
+            if obj in anchors:
+                representatives.append(obj)
+                continue
+            signature = self.signature(obj, anchors)
+            if signature is None:
+                representatives.append(obj)
+                continue
+            kept = kept_counts.get(signature, 0)
+            if kept < self.copies:
+                representatives.append(obj)
+                kept_counts[signature] = kept + 1
+        return representatives
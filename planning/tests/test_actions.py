@@ -3,6 +3,7 @@ import unittest
 from planning.actions import Action
 from planning.agents import Agent
 from planning.conditions import Condition
+from planning.snapshots import WorldSnapshot
 
 
 # Test-related conditions
@@ -100,6 +101,18 @@ class TestActions(unittest.TestCase):
             test="test"
         )
 
+    def test_preconditions_met(self):
+        state = WorldSnapshot()
+        result = Kill.preconditions_met(
+            state, actor=self.actor, victim=self.object)
+        self.assertTrue(result)
+        state.apply({(IsAlive, (self.object,)): False})
+        result = Kill.preconditions_met(
+            state, actor=self.actor, victim=self.object)
+        self.assertFalse(result)
+        # The live object is untouched
+        self.assertTrue(self.object.alive)
+
     def test_apply_action(self):
         """Test that applying an action has the desired effects."""
         Kill.apply_action(actor=self.actor, victim=self.object)
@@ -0,0 +1,189 @@
+import cPickle as pickle
+import hashlib
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+from planning import mutex, patterns, relevance
+from planning.actions import Action
+from planning.agents import Agent
+from planning import cache
+from planning.cache import domain_hash, load_cache, save_cache
+from planning.conditions import AttributeCondition, Is
+from planning.goals import Goal
+from planning.macros import add_macros, make_macro
+from planning.patterns import PatternDatabase, pattern_database
+from planning.plans import select_plan
+from planning.relevance import prune_search
+
+
+class HasSword(AttributeCondition):
+    name = 'has sword'
+    attribute = 'has_sword'
+
+
+class IsAlive(AttributeCondition):
+    name = 'is alive'
+    attribute = 'alive'
+
+
+class Kill(Action):
+    name = 'kill'
+    preconditions = [
+        (IsAlive, 'victim', True),
+        (HasSword, 'actor', True)
+    ]
+    effects = [
+        (IsAlive, 'victim', False)
+    ]
+
+
+class StealSword(Action):
+    name = 'steal sword'
+    preconditions = [
+        (HasSword, 'victim', True),
+        (HasSword, 'actor', False),
+        (Is, ('victim', 'actor'), False)
+    ]
+    effects = [
+        (HasSword, 'victim', False),
+        (HasSword, 'actor', True)
+    ]
+
+
+class TestPlanCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'plans.cache')
+        self.actions = [Kill, StealSword]
+        self.key = tuple(self.actions)
+        arthur = Agent('Arthur')
+        lancelot = Agent('Lancelot')
+        lancelot.has_sword = True
+        guinevere = Agent('Guinevere')
+        goal = Goal('kill', condition=IsAlive(guinevere), value=False)
+        select_plan(
+            actor=arthur, goal=goal, available_actions=self.actions,
+            objects=[arthur, lancelot, guinevere], prune_irrelevant=True,
+            prune_mutex=True)
+        self.database = pattern_database(
+            pattern_conditions=[HasSword], available_actions=self.actions,
+            number_of_roles=2)
+        self.pattern_key = ((HasSword,), self.key, 2)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def _clear_caches(self):
+        del mutex._invariant_cache[self.key]
+        for key in relevance._relevance_cache.keys():
+            if key[2] == self.key:
+                del relevance._relevance_cache[key]
+        del patterns._database_cache[self.pattern_key]
+
+    def test_round_trip(self):
+        invariants = mutex._invariant_cache[self.key]
+        relevant = relevance._relevance_cache[(IsAlive, False, self.key)]
+        save_cache(self.path, self.actions)
+        self._clear_caches()
+
+        self.assertTrue(load_cache(self.path, self.actions))
+        self.assertEqual(mutex._invariant_cache[self.key], invariants)
+        self.assertEqual(
+            relevance._relevance_cache[(IsAlive, False, self.key)], relevant)
+
+    def test_pattern_databases(self):
+        """Pattern databases are loaded without searching them again."""
+        save_cache(self.path, self.actions)
+        self._clear_caches()
+
+        find_distances = PatternDatabase._find_distances
+        PatternDatabase._find_distances = None
+        try:
+            self.assertTrue(load_cache(self.path, self.actions))
+        finally:
+            PatternDatabase._find_distances = find_distances
+        database = patterns._database_cache[self.pattern_key]
+        self.assertIsNot(database, self.database)
+        self.assertEqual(database.distances, self.database.distances)
+        self.assertEqual(database.operators, self.database.operators)
+
+    def test_pattern_database_wrong_distances(self):
+        self.assertRaises(
+            ValueError, PatternDatabase, pattern_conditions=[HasSword],
+            available_actions=self.actions, number_of_roles=2,
+            distances=self.database.distances[:4])
+
+    def test_macros(self):
+        """Macros added to the actions can be saved and loaded."""
+        macro = make_macro([
+            (StealSword, {'victim': 'owner'}), (Kill, {'victim': 'owner'})])
+        actions = add_macros(self.actions, [macro])
+        arthur = Agent('Arthur')
+        goal = Goal('kill', condition=IsAlive(arthur), value=False)
+        prune_search(
+            actor=arthur, goal=goal, available_actions=actions,
+            objects=[arthur])
+        key = (IsAlive, False, tuple(actions))
+        relevant = relevance._relevance_cache[key]
+        save_cache(self.path, actions)
+        del relevance._relevance_cache[key]
+
+        self.assertTrue(load_cache(self.path, actions))
+        self.assertEqual(relevance._relevance_cache[key], relevant)
+
+    def test_corrupt(self):
+        save_cache(self.path, self.actions)
+        with open(self.path, 'rb') as cache_file:
+            data = cache_file.read()
+        for length in [len(data) - 10, 40]:
+            with open(self.path, 'wb') as cache_file:
+                cache_file.write(data[:length])
+            self.assertFalse(load_cache(self.path, self.actions))
+
+    def test_corrupt_bytes(self):
+        """Changing any byte of the file means a cold start."""
+        save_cache(self.path, self.actions)
+        with open(self.path, 'rb') as cache_file:
+            data = bytearray(cache_file.read())
+        rng = random.Random(0)
+        for attempt in xrange(200):
+            corrupt_data = bytearray(data)
+            for number_of_changes in xrange(rng.randint(1, 4)):
+                position = rng.randrange(len(data))
+                corrupt_data[position] ^= rng.randint(1, 255)
+            with open(self.path, 'wb') as cache_file:
+                cache_file.write(corrupt_data)
+            self.assertFalse(load_cache(self.path, self.actions))
+
+    def test_unreadable_payload(self):
+        """Payloads that match their digest but not the layout are skipped."""
+        for structures in [[], {'relevance': {}, 'invariants': None,
+                                'patterns': [((HasSword,), 2, 4)]}]:
+            payload = pickle.dumps(structures, pickle.HIGHEST_PROTOCOL)
+            payload += '\0' * 4
+            header = cache._HEADER.pack(
+                cache._MAGIC, cache.CACHE_VERSION, domain_hash(self.actions),
+                hashlib.sha1(payload).digest())
+            with open(self.path, 'wb') as cache_file:
+                cache_file.write(header + payload)
+            self.assertFalse(load_cache(self.path, self.actions))
+
+    def test_missing(self):
+        self.assertFalse(load_cache(self.path, self.actions))
+
+    def test_stale(self):
+        save_cache(self.path, self.actions)
+        self.assertFalse(load_cache(self.path, [StealSword, Kill]))
+
+    def test_domain_hash(self):
+        self.assertEqual(domain_hash(self.actions), domain_hash(self.actions))
+        self.assertNotEqual(
+            domain_hash(self.actions), domain_hash([Kill]))
+
+        class QuickKill(Kill):
+            cost = 0
+
+        self.assertNotEqual(domain_hash([Kill]), domain_hash([QuickKill]))
@@ -0,0 +1,153 @@
+import unittest
+
+from planning.actions import Action
+from planning.agents import Agent
+from planning.compiled import compile_action
+from planning.conditions import AttributeCondition, Is
+
+
+class HasSword(AttributeCondition):
+    name = 'has sword'
+    attribute = 'has_sword'
+
+
+class IsAlive(AttributeCondition):
+    name = 'is alive'
+    attribute = 'alive'
+    default = True
+
+
+class Kill(Action):
+    name = 'kill'
+    preconditions = [
+        (IsAlive, 'victim', True),
+        (HasSword, 'actor', True)
+    ]
+    effects = [
+        (IsAlive, 'victim', False)
+    ]
+
+
+class StealSword(Action):
+    name = 'steal sword'
+    preconditions = [
+        (HasSword, 'victim', True),
+        (HasSword, 'actor', False),
+        (Is, ('victim', 'actor'), False)
+    ]
+    effects = [
+        (HasSword, 'victim', False),
+        (HasSword, 'actor', True)
+    ]
+
+
+class Rearm(Action):
+    name = 'rearm'
+    preconditions = []
+    effects = [
+        (HasSword, 'actor', False),
+        (HasSword, 'actor', True)
+    ]
+
+
+class Shout(Action):
+    name = 'shout'
+    preconditions = []
+    effects = []
+
+    @classmethod
+    def calculate_effects(cls, actor=None, **objects):
+        return {(IsAlive, (actor,)): True}
+
+
+class Juggle(Action):
+    name = 'juggle'
+    preconditions = [
+        (Is, 'actor', True)
+    ]
+    effects = []
+
+
+class TestCompileAction(unittest.TestCase):
+    def setUp(self):
+        self.arthur = Agent('Arthur')
+        self.lancelot = Agent('Lancelot')
+
+    def test_cached(self):
+        self.assertIs(compile_action(Kill), compile_action(Kill))
+
+    def test_calculate_effects(self):
+        for action in [Kill, StealSword]:
+            compiled_action = compile_action(action)
+            self.assertEqual(
+                compiled_action.calculate_effects(
+                    self.arthur, {'victim': self.lancelot}),
+                action.calculate_effects(
+                    actor=self.arthur, victim=self.lancelot)
+            )
+
+    def test_calculate_preconditions(self):
+        for action in [Kill, StealSword]:
+            compiled_action = compile_action(action)
+            self.assertEqual(
+                compiled_action.calculate_preconditions(
+                    self.arthur, {'victim': self.lancelot}),
+                action.calculate_preconditions(
+                    actor=self.arthur, victim=self.lancelot)
+            )
+
+    def test_effects_match(self):
+        effects_match = compile_action(Kill).effects_match
+        objects = {'victim': self.lancelot}
+        self.assertTrue(effects_match(
+            {(IsAlive, (self.lancelot,)): False}, self.arthur, objects))
+        self.assertFalse(effects_match(
+            {(IsAlive, (self.lancelot,)): True}, self.arthur, objects))
+        self.assertFalse(effects_match(
+            {(IsAlive, (self.arthur,)): False}, self.arthur, objects))
+
+    def test_effects_on_the_same_condition(self):
+        """Only the last of two effects on one condition counts."""
+        effects_match = compile_action(StealSword).effects_match
+        objects = {'victim': self.arthur}
+        self.assertEqual(
+            compile_action(StealSword).calculate_effects(
+                self.arthur, objects),
+            {(HasSword, (self.arthur,)): True}
+        )
+        self.assertTrue(effects_match(
+            {(HasSword, (self.arthur,)): True}, self.arthur, objects))
+
+        objects = {'victim': self.lancelot}
+        self.assertTrue(effects_match(
+            {(HasSword, (self.lancelot,)): False}, self.arthur, objects))
+        self.assertFalse(effects_match(
+            {(HasSword, (self.lancelot,)): True}, self.arthur, objects))
+        # The effects are unrolled rather than collected in a dict
+        self.assertNotIn(
+            '_effects_match(', compile_action(StealSword).source)
+
+    def test_repeated_effect(self):
+        """An effect repeated on the same objects is left out."""
+        effects_match = compile_action(Rearm).effects_match
+        self.assertTrue(effects_match(
+            {(HasSword, (self.arthur,)): True}, self.arthur, {}))
+        self.assertFalse(effects_match(
+            {(HasSword, (self.arthur,)): False}, self.arthur, {}))
+
+    def test_missing_role(self):
+        self.assertRaises(
+            KeyError, compile_action(Kill).calculate_effects, self.arthur, {})
+
+    def test_overridden_methods(self):
+        compiled_action = compile_action(Shout)
+        self.assertIsNone(compiled_action.source)
+        self.assertEqual(
+            compiled_action.calculate_effects(self.arthur, {}),
+            {(IsAlive, (self.arthur,)): True}
+        )
+        self.assertTrue(compiled_action.effects_match(
+            {(IsAlive, (self.arthur,)): True}, self.arthur, {}))
+
+    def test_wrong_number_of_objects(self):
+        self.assertRaises(ValueError, compile_action, Juggle)
@@ -1,7 +1,7 @@
 import unittest
 
 from planning.agents import Agent
-from planning.conditions import Condition, Is
+from planning.conditions import AttributeCondition, Condition, Is
 
 
 class IsHungry(Condition):
@@ -28,6 +28,11 @@ class HasSword(Condition):
             return False
 
 
+class IsAlive(AttributeCondition):
+    name = 'is alive'
+    attribute = 'alive'
+
+
 class TestCondition(unittest.TestCase):
     """Test the Condition class."""
     def test_evaluate_not_implemented(self):
@@ -52,6 +57,31 @@ class TestCondition(unittest.TestCase):
             (IsHungry, (test_agent,))
         )
 
+    def test_evaluate_many(self):
+        knight = Agent('Knight')
+        knight.is_hungry = True
+        squire = Agent('Squire')
+        results = IsHungry.evaluate_many([[knight], [squire]])
+        self.assertEqual(results, [True, False])
+
+
+class TestAttributeCondition(unittest.TestCase):
+    def test_evaluate(self):
+        knight = Agent('Knight')
+        self.assertTrue(IsAlive(knight).evaluate())
+        knight.alive = False
+        self.assertFalse(IsAlive(knight).evaluate())
+
+    def test_default(self):
+        self.assertFalse(IsAlive(object()).evaluate())
+
+    def test_evaluate_many(self):
+        knight = Agent('Knight')
+        dragon = Agent('Dragon')
+        dragon.alive = False
+        results = IsAlive.evaluate_many([[knight], [dragon], [object()]])
+        self.assertEqual(results, [True, False, False])
+
 
 class TestIsHungryCondition(unittest.TestCase):
     def test_is_hungry(self):
@@ -0,0 +1,134 @@
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import unittest
+
+from planning.agents import Agent
+from planning.conditions import Is
+from planning.domains import load_domain, parse_domain
+from planning.goals import Goal
+from planning.plans import select_plan
+
+DOMAIN = {
+    'name': 'camelot',
+    'conditions': {
+        'HasSword': {'name': 'has sword', 'attribute': 'has_sword'},
+        'IsAlive': {'name': 'is alive', 'attribute': 'alive'},
+    },
+    'actions': {
+        'Kill': {
+            'name': 'kill',
+            'preconditions': [
+                ['IsAlive', 'victim', True],
+                ['HasSword', 'actor', True],
+            ],
+            'effects': [
+                ['IsAlive', 'victim', False],
+            ],
+        },
+        'StealSword': {
+            'name': 'steal sword',
+            'probability': 0.5,
+            'preconditions': [
+                ['HasSword', 'victim', True],
+                ['HasSword', 'actor', False],
+                ['Is', ['victim', 'actor'], False],
+            ],
+            'effects': [
+                ['HasSword', 'victim', False],
+                ['HasSword', 'actor', True],
+            ],
+        },
+    },
+}
+
+
+class TestLoadDomain(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'camelot.json')
+        with open(self.path, 'w') as domain_file:
+            json.dump(DOMAIN, domain_file)
+        self.domain = load_domain(self.path)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_conditions(self):
+        has_sword = self.domain.conditions['HasSword']
+        self.assertIs(self.domain.conditions['Is'], Is)
+        knight = Agent('Knight')
+        self.assertFalse(has_sword(knight).evaluate())
+        knight.has_sword = True
+        self.assertTrue(has_sword(knight).evaluate())
+
+    def test_actions(self):
+        steal_sword = self.domain.action('StealSword')
+        self.assertEqual(steal_sword.name, 'steal sword')
+        self.assertEqual(steal_sword.probability, 0.5)
+        self.assertEqual(steal_sword.cost, 1)
+        self.assertEqual(steal_sword.object_keys(), ['victim'])
+        self.assertEqual(
+            steal_sword.preconditions[2], (Is, ('victim', 'actor'), False))
+        self.assertRaises(KeyError, self.domain.action, 'GiveSword')
+
+    def test_apply_action(self):
+        arthur = Agent('Arthur')
+        lancelot = Agent('Lancelot')
+        lancelot.has_sword = True
+        self.domain.action('StealSword').apply_action(
+            actor=arthur, victim=lancelot)
+        self.assertTrue(arthur.has_sword)
+        self.assertFalse(lancelot.has_sword)
+
+    def test_planning(self):
+        arthur = Agent('Arthur')
+        lancelot = Agent('Lancelot')
+        lancelot.has_sword = True
+        guinevere = Agent('Guinevere')
+        is_alive = self.domain.conditions['IsAlive']
+        goal = Goal('kill', condition=is_alive(guinevere), value=False)
+        actions_sequence = select_plan(
+            actor=arthur, goal=goal, available_actions=self.domain.actions,
+            objects=[arthur, lancelot, guinevere])
+        self.assertEqual(
+            actions_sequence,
+            [
+                (arthur, self.domain.action('StealSword'),
+                 {'victim': lancelot}),
+                (arthur, self.domain.action('Kill'), {'victim': guinevere}),
+            ]
+        )
+
+    def test_pickle(self):
+        kill = self.domain.action('Kill')
+        self.assertIs(pickle.loads(pickle.dumps(kill)), kill)
+
+
+class TestParseDomain(unittest.TestCase):
+    def test_no_name(self):
+        self.assertRaises(ValueError, parse_domain, {})
+
+    def test_unknown_condition(self):
+        data = {'name': 'broken', 'actions': {
+            'Eat': {'effects': [['IsHungry', 'actor', False]]}
+        }}
+        self.assertRaises(ValueError, parse_domain, data)
+
+    def test_condition_without_attribute(self):
+        data = {'name': 'broken', 'conditions': {'IsHungry': {}}}
+        self.assertRaises(ValueError, parse_domain, data)
+
+    def test_effect_on_builtin(self):
+        data = {'name': 'broken', 'actions': {
+            'Become': {'effects': [['Is', ['actor', 'other'], True]]}
+        }}
+        self.assertRaises(ValueError, parse_domain, data)
+
+    def test_malformed_tuple(self):
+        data = {'name': 'broken', 'actions': {
+            'Eat': {'effects': [['Is', 'actor']]}
+        }}
+        self.assertRaises(ValueError, parse_domain, data)
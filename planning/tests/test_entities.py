@@ -0,0 +1,95 @@
+import unittest
+
+from planning.actions import Action
+from planning.conditions import AttributeCondition
+from planning.entities import EntityStore, common_store
+from planning.plans import select_plan
+from planning.goals import Goal
+
+
+class HasSword(AttributeCondition):
+    name = 'has sword'
+    attribute = 'has_sword'
+
+
+class IsAlive(AttributeCondition):
+    name = 'is alive'
+    attribute = 'alive'
+
+
+class Kill(Action):
+    name = 'kill'
+    preconditions = [
+        (IsAlive, 'victim', True),
+        (HasSword, 'actor', True)
+    ]
+    effects = [
+        (IsAlive, 'victim', False)
+    ]
+
+    @classmethod
+    def apply_action(cls, actor=None, **objects):
+        victim = objects['victim']
+        victim.alive = False
+
+
+class TestEntityStore(unittest.TestCase):
+    def setUp(self):
+        self.store = EntityStore()
+        self.store.add_column('alive', bool, True)
+        self.store.add_column('has_sword', bool, False)
+        self.store.add_column('health', float, 10.0)
+        self.knight = self.store.create('Knight', has_sword=True)
+        self.dragon = self.store.create('Dragon', health=50.0)
+
+    def test_handle_attributes(self):
+        self.assertEqual(repr(self.knight), '<Knight>')
+        self.assertIs(self.knight.has_sword, True)
+        self.assertIs(self.dragon.has_sword, False)
+        self.assertEqual(self.dragon.health, 50.0)
+        self.assertFalse(hasattr(self.knight, 'is_hungry'))
+
+    def test_handle_write(self):
+        self.dragon.alive = False
+        self.assertEqual(list(self.store.column('alive')), [1, 0])
+
+    def test_handle_write_unknown_column(self):
+        self.assertRaises(
+            AttributeError, setattr, self.knight, 'is_hungry', True)
+
+    def test_create_unknown_column(self):
+        self.assertRaises(ValueError, self.store.create, 'Squire', mood=1)
+
+    def test_add_column_existing(self):
+        self.assertRaises(ValueError, self.store.add_column, 'alive')
+
+    def test_add_column_unsupported_type(self):
+        self.assertRaises(ValueError, self.store.add_column, 'name', str)
+
+    def test_snapshot(self):
+        snapshot = self.store.snapshot()
+        self.dragon.alive = False
+        self.assertTrue(snapshot.handle(1).alive)
+        self.assertEqual(repr(snapshot.handle(1)), '<Dragon>')
+
+    def test_common_store(self):
+        self.assertIs(
+            common_store([self.knight, self.dragon]), self.store)
+        self.assertIsNone(common_store([self.knight, object()]))
+
+    def test_evaluate_many(self):
+        self.dragon.alive = False
+        results = IsAlive.evaluate_many([[self.knight], [self.dragon]])
+        self.assertEqual(results, [True, False])
+
+    def test_apply_action(self):
+        Kill.apply_action(actor=self.knight, victim=self.dragon)
+        self.assertFalse(IsAlive(self.dragon).evaluate())
+
+    def test_planning(self):
+        goal = Goal('dragon dead', condition=IsAlive(self.dragon), value=False)
+        actions_sequence = select_plan(
+            actor=self.knight, goal=goal, available_actions=[Kill],
+            objects=self.store.handles())
+        self.assertEqual(
+            actions_sequence, [(self.knight, Kill, {'victim': self.dragon})])
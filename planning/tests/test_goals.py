@@ -1,8 +1,8 @@
 import unittest
 
 from planning.agents import Agent
-from planning.conditions import Condition
-from planning.goals import Goal, generate_goal
+from planning.conditions import Condition, Is
+from planning.goals import Goal, generate_goal, generate_goals
 
 
 # Test Condition
@@ -41,6 +41,51 @@ class TestGenerateGoal(unittest.TestCase):
             ]
         )
 
+    def test_predicate(self):
+        batman = Agent('batman')
+        robin = Agent('robin')
+        goal = generate_goal(
+            [IsHungry], [batman, robin],
+            predicate=lambda goal: goal.goal_condition.objects == [robin])
+        self.assertEqual(goal.goal_condition.objects, [robin])
+
+    def test_predicate_never_accepts(self):
+        batman = Agent('batman')
+        self.assertRaises(
+            ValueError,
+            generate_goal,
+            [IsHungry], [batman],
+            predicate=lambda goal: False
+        )
+
+    def test_large_population(self):
+        """Goals are drawn without enumerating every permutation."""
+        objects = [Agent('agent %d' % number) for number in range(10000)]
+        goal = generate_goal([Is], objects)
+        first, second = goal.goal_condition.objects
+        self.assertIsNot(first, second)
+        self.assertEqual(goal.goal_value, True)
+
+
+class TestGenerateGoals(unittest.TestCase):
+    def setUp(self):
+        self.objects = [Agent('agent %d' % number) for number in range(50)]
+
+    def test_generate_goals(self):
+        goals = generate_goals(10, [IsHungry], self.objects)
+        self.assertEqual(len(goals), 10)
+        for goal in goals:
+            self.assertIsInstance(goal, Goal)
+
+    def test_seed(self):
+        first_goals = generate_goals(10, [IsHungry, Is], self.objects, seed=7)
+        second_goals = generate_goals(
+            10, [IsHungry, Is], self.objects, seed=7)
+        self.assertEqual(
+            [goal.goal_condition.planning_tuple for goal in first_goals],
+            [goal.goal_condition.planning_tuple for goal in second_goals]
+        )
+
 
 class TestGoal(unittest.TestCase):
     def test_init(self):
@@ -0,0 +1,170 @@
+import unittest
+
+from planning.actions import Action
+from planning.agents import Agent
+from planning.conditions import AttributeCondition, Is
+from planning.htn import (
+    DecompositionDepthException, Method, Task, TaskPlanner)
+from planning.snapshots import WorldSnapshot
+
+
+class HasSword(AttributeCondition):
+    name = 'has sword'
+    attribute = 'has_sword'
+
+
+class IsAlive(AttributeCondition):
+    name = 'is alive'
+    attribute = 'alive'
+
+
+class Kill(Action):
+    name = 'kill'
+    preconditions = [
+        (IsAlive, 'victim', True),
+        (HasSword, 'actor', True)
+    ]
+    effects = [
+        (IsAlive, 'victim', False)
+    ]
+
+
+class StealSword(Action):
+    name = 'steal sword'
+    preconditions = [
+        (HasSword, 'victim', True),
+        (HasSword, 'actor', False),
+        (Is, ('victim', 'actor'), False)
+    ]
+    effects = [
+        (HasSword, 'victim', False),
+        (HasSword, 'actor', True)
+    ]
+
+
+class ArmSelf(Task):
+    name = 'arm self'
+    roles = []
+    methods = [
+        Method('already armed', subtasks=[], preconditions=[
+            (HasSword, 'actor', True)
+        ]),
+        Method(
+            'steal a sword',
+            subtasks=[(StealSword, {'victim': 'owner'})],
+            free_roles=['owner']
+        ),
+    ]
+
+
+class Assassinate(Task):
+    name = 'assassinate'
+    roles = ['target']
+    methods = [
+        Method('arm and kill', subtasks=[
+            (ArmSelf, {}),
+            (Kill, {'victim': 'target'}),
+        ]),
+    ]
+
+
+class Forever(Task):
+    name = 'forever'
+    roles = []
+
+
+Forever.methods = [Method('again', subtasks=[(Forever, {})])]
+
+
+class TestTaskPlanner(unittest.TestCase):
+    def setUp(self):
+        self.arthur = Agent('Arthur')
+        self.lancelot = Agent('Lancelot')
+        self.lancelot.has_sword = True
+        self.guinevere = Agent('Guinevere')
+        self.planner = TaskPlanner(
+            objects=[self.arthur, self.lancelot, self.guinevere])
+
+    def test_task_requires_methods(self):
+        class Idle(Task):
+            name = 'idle'
+            roles = []
+
+        self.assertRaises(ValueError, Idle)
+
+    def test_primitive(self):
+        self.arthur.has_sword = True
+        steps = self.planner.plan(
+            Kill, actor=self.arthur, victim=self.guinevere)
+        self.assertEqual(
+            steps, [(self.arthur, Kill, {'victim': self.guinevere})])
+
+    def test_decompose(self):
+        steps = self.planner.plan(
+            Assassinate, actor=self.arthur, target=self.guinevere)
+        self.assertEqual(
+            steps,
+            [
+                (self.arthur, StealSword, {'victim': self.lancelot}),
+                (self.arthur, Kill, {'victim': self.guinevere}),
+            ]
+        )
+
+    def test_method_preconditions(self):
+        self.arthur.has_sword = True
+        steps = self.planner.plan(
+            Assassinate, actor=self.arthur, target=self.guinevere)
+        self.assertEqual(
+            steps, [(self.arthur, Kill, {'victim': self.guinevere})])
+
+    def test_no_decomposition(self):
+        self.lancelot.has_sword = False
+        steps = self.planner.plan(
+            Assassinate, actor=self.arthur, target=self.guinevere)
+        self.assertIsNone(steps)
+
+    def test_remembered_decomposition(self):
+        self.planner.plan(
+            Assassinate, actor=self.arthur, target=self.guinevere)
+        key = (Assassinate, self.arthur, (('target', self.guinevere),))
+        self.assertIn(key, self.planner._decompositions)
+        # The remembered steps are checked against the world before reuse
+        self.lancelot.has_sword = False
+        self.guinevere.has_sword = True
+        steps = self.planner.plan(
+            Assassinate, actor=self.arthur, target=self.guinevere)
+        self.assertEqual(
+            steps,
+            [
+                (self.arthur, StealSword, {'victim': self.guinevere}),
+                (self.arthur, Kill, {'victim': self.guinevere}),
+            ]
+        )
+
+    def test_remembered_method_preconditions(self):
+        self.arthur.has_sword = True
+        self.assertEqual(self.planner.plan(ArmSelf, actor=self.arthur), [])
+        # The world changes so that the remembered method no longer applies
+        self.arthur.has_sword = False
+        self.lancelot.has_sword = False
+        self.guinevere.has_sword = True
+        steps = self.planner.plan(ArmSelf, actor=self.arthur)
+        self.assertEqual(
+            steps, [(self.arthur, StealSword, {'victim': self.guinevere})])
+
+    def test_state(self):
+        state = WorldSnapshot()
+        state.apply({(HasSword, (self.arthur,)): True})
+        steps = self.planner.plan(
+            Assassinate, actor=self.arthur, state=state,
+            target=self.guinevere)
+        self.assertEqual(
+            steps, [(self.arthur, Kill, {'victim': self.guinevere})])
+
+    def test_depth(self):
+        self.assertRaises(
+            DecompositionDepthException,
+            self.planner.plan, Forever, actor=self.arthur)
+
+    def test_no_objects(self):
+        self.assertRaises(ValueError, TaskPlanner)
@@ -0,0 +1,258 @@
+import unittest
+
+from planning.actions import Action
+from planning.agents import Agent
+from planning.conditions import AttributeCondition, Is
+from planning.goals import Goal
+from planning.landmarks import (
+    ground_landmarks, landmark_heuristic, lifted_landmarks)
+from planning.plans import (
+    PlanningDepthException, _create_initial_plan, best_first_plan_search,
+    select_plan)
+
+
+class HasSword(AttributeCondition):
+    name = 'has sword'
+    attribute = 'has_sword'
+
+
+class IsAlive(AttributeCondition):
+    name = 'is alive'
+    attribute = 'alive'
+    default = True
+
+
+class IsMortal(AttributeCondition):
+    name = 'is mortal'
+    attribute = 'mortal'
+
+
+class Kill(Action):
+    name = 'kill'
+    preconditions = [
+        (IsMortal, 'victim', True),
+        (IsAlive, 'victim', True),
+        (HasSword, 'actor', True)
+    ]
+    effects = [
+        (IsAlive, 'victim', False)
+    ]
+
+
+class StealSword(Action):
+    name = 'steal sword'
+    preconditions = [
+        (HasSword, 'victim', True),
+        (HasSword, 'actor', False),
+        (Is, ('victim', 'actor'), False)
+    ]
+    effects = [
+        (HasSword, 'victim', False),
+        (HasSword, 'actor', True)
+    ]
+
+
+class HasG(AttributeCondition):
+    name = 'has g'
+    attribute = 'g'
+
+
+class HasLM(AttributeCondition):
+    name = 'has lm'
+    attribute = 'lm'
+
+
+class HasP(AttributeCondition):
+    name = 'has p'
+    attribute = 'p'
+
+
+class HasQ(AttributeCondition):
+    name = 'has q'
+    attribute = 'q'
+
+
+class W(Action):
+    name = 'w'
+    preconditions = [
+        (HasG, 'actor', False),
+        (HasLM, 'actor', True),
+        (HasP, 'actor', True),
+        (HasQ, 'actor', False)
+    ]
+    effects = [(HasG, 'actor', True)]
+
+
+class Z(Action):
+    name = 'z'
+    preconditions = [
+        (HasG, 'actor', False),
+        (HasLM, 'actor', True),
+        (HasP, 'actor', True),
+        (HasQ, 'actor', True)
+    ]
+    effects = [(HasG, 'actor', True), (HasLM, 'actor', True)]
+
+
+class Y(Action):
+    name = 'y'
+    preconditions = [
+        (HasLM, 'actor', True),
+        (HasP, 'actor', True),
+        (HasQ, 'actor', False)
+    ]
+    effects = [(HasQ, 'actor', True), (HasP, 'actor', True)]
+
+
+class MakeLM(Action):
+    name = 'make lm'
+    preconditions = [(HasLM, 'actor', False), (HasP, 'actor', True)]
+    effects = [(HasLM, 'actor', True)]
+
+
+class MakeP(Action):
+    name = 'make p'
+    preconditions = [(HasP, 'actor', False)]
+    effects = [(HasP, 'actor', True)]
+
+
+class LandmarksTestCase(unittest.TestCase):
+    def setUp(self):
+        self.actions = [Kill, StealSword]
+        self.arthur = Agent('Arthur')
+        self.dragon = Agent('Dragon')
+        self.dragon.mortal = True
+        self.lancelot = Agent('Lancelot')
+        self.lancelot.has_sword = True
+        self.objects = [self.arthur, self.dragon, self.lancelot]
+        self.goal = Goal(
+            'dragon dead', condition=IsAlive(self.dragon), value=False)
+
+
+class TestLandmarks(LandmarksTestCase):
+    def test_lifted_landmarks(self):
+        landmarks = lifted_landmarks(self.actions, IsAlive, False)
+        self.assertEqual(
+            sorted(landmarks[(IsAlive, ('goal_0',), False)]),
+            sorted([
+                (IsMortal, ('goal_0',), True),
+                (IsAlive, ('goal_0',), True),
+                (HasSword, ('actor',), True),
+            ])
+        )
+        self.assertEqual(
+            landmarks[(HasSword, ('actor',), True)],
+            [(HasSword, ('actor',), False)]
+        )
+        # Nothing makes a mortal mortal
+        self.assertEqual(landmarks[(IsMortal, ('goal_0',), True)], [])
+
+    def test_lifted_landmarks_cached(self):
+        self.assertIs(
+            lifted_landmarks(self.actions, IsAlive, False),
+            lifted_landmarks(self.actions, IsAlive, False)
+        )
+
+    def test_ground_landmarks(self):
+        self.assertEqual(
+            ground_landmarks(self.arthur, self.goal, self.actions),
+            [
+                ((IsAlive, (self.dragon,)), False),
+                ((HasSword, (self.arthur,)), True),
+            ]
+        )
+
+    def test_ground_landmarks_already_met(self):
+        """Landmarks of conditions that already hold are left out."""
+        self.arthur.has_sword = True
+        self.assertEqual(
+            ground_landmarks(self.arthur, self.goal, self.actions),
+            [((IsAlive, (self.dragon,)), False)]
+        )
+
+    def test_landmark_heuristic(self):
+        heuristic = landmark_heuristic(
+            actor=self.arthur, goal=self.goal,
+            available_actions=self.actions)
+        possible_plan = _create_initial_plan(self.goal)
+        self.assertEqual(heuristic(possible_plan), 2)
+        possible_plan.prepend_action(
+            (self.arthur, Kill, {'victim': self.dragon}))
+        self.assertEqual(heuristic(possible_plan), 1)
+        possible_plan.prepend_action(
+            (self.arthur, StealSword, {'victim': self.lancelot}))
+        self.assertEqual(heuristic(possible_plan), 0)
+
+    def test_landmark_heuristic_no_inputs(self):
+        self.assertRaises(ValueError, landmark_heuristic)
+
+
+class TestBestFirstPlanSearch(LandmarksTestCase):
+    def test_best_first_plan_search(self):
+        heuristic = landmark_heuristic(
+            actor=self.arthur, goal=self.goal,
+            available_actions=self.actions)
+        selected_plan = best_first_plan_search(
+            actor=self.arthur, goal=self.goal,
+            available_actions=self.actions, objects=self.objects,
+            heuristic=heuristic)
+        self.assertEqual(
+            selected_plan.actions_to_perform,
+            [
+                (self.arthur, StealSword, {'victim': self.lancelot}),
+                (self.arthur, Kill, {'victim': self.dragon}),
+            ]
+        )
+
+    def test_select_plan_with_heuristic(self):
+        expected_sequence = select_plan(
+            actor=self.arthur, goal=self.goal,
+            available_actions=self.actions, objects=self.objects)
+        heuristic = landmark_heuristic(
+            actor=self.arthur, goal=self.goal,
+            available_actions=self.actions)
+        actions_sequence = select_plan(
+            actor=self.arthur, goal=self.goal,
+            available_actions=self.actions, objects=self.objects,
+            heuristic=heuristic)
+        self.assertEqual(actions_sequence, expected_sequence)
+
+    def test_no_heuristic(self):
+        selected_plan = best_first_plan_search(
+            actor=self.arthur, goal=self.goal,
+            available_actions=self.actions, objects=self.objects)
+        self.assertEqual(len(selected_plan.actions_to_perform), 2)
+
+    def test_conditions_found_again_with_fewer_actions(self):
+        """Conditions expanded from a longer plan are expanded again when a
+        shorter plan regresses to them.
+
+        [Y, Z] and [W] regress to the same conditions, and Y and Z achieve
+        more landmarks, so the longer plan is expanded first. Only the
+        shorter one fits in three actions.
+        """
+        self.arthur.g = self.arthur.lm = False
+        self.arthur.p = self.arthur.q = False
+        goal = Goal('g', condition=HasG(self.arthur), value=True)
+        actions = [Z, Y, W, MakeLM, MakeP]
+        heuristic = landmark_heuristic(
+            actor=self.arthur, goal=goal, available_actions=actions)
+        selected_plan = best_first_plan_search(
+            actor=self.arthur, goal=goal, available_actions=actions,
+            objects=[self.arthur], heuristic=heuristic, max_depth=3)
+        self.assertEqual(
+            [action for actor, action, objects_dict in (
+                selected_plan.actions_to_perform)],
+            [MakeP, MakeLM, W]
+        )
+
+    def test_depth_exception(self):
+        self.dragon.mortal = False
+        self.assertRaises(
+            PlanningDepthException,
+            best_first_plan_search,
+            actor=self.arthur, goal=self.goal,
+            available_actions=self.actions, objects=self.objects)
+
+    def test_no_inputs(self):
+        self.assertRaises(ValueError, best_first_plan_search)
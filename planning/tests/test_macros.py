@@ -0,0 +1,157 @@
+import cPickle as pickle
+import unittest
+
+from planning.actions import Action
+from planning.agents import Agent
+from planning.conditions import AttributeCondition, Is
+from planning.goals import Goal
+from planning.macros import add_macros, make_macro, mine_macros
+from planning.plans import select_plan
+
+
+class HasSword(AttributeCondition):
+    name = 'has sword'
+    attribute = 'has_sword'
+
+
+class IsAlive(AttributeCondition):
+    name = 'is alive'
+    attribute = 'alive'
+
+
+class Kill(Action):
+    name = 'kill'
+    preconditions = [
+        (IsAlive, 'victim', True),
+        (HasSword, 'actor', True)
+    ]
+    effects = [
+        (IsAlive, 'victim', False)
+    ]
+
+    @classmethod
+    def apply_action(cls, actor=None, **objects):
+        objects['victim'].alive = False
+
+
+class StealSword(Action):
+    name = 'steal sword'
+    preconditions = [
+        (HasSword, 'victim', True),
+        (HasSword, 'actor', False),
+        (Is, ('victim', 'actor'), False)
+    ]
+    effects = [
+        (HasSword, 'victim', False),
+        (HasSword, 'actor', True)
+    ]
+
+    @classmethod
+    def apply_action(cls, actor=None, **objects):
+        actor.has_sword = True
+        objects['victim'].has_sword = False
+
+
+class TestMakeMacro(unittest.TestCase):
+    def setUp(self):
+        self.arthur = Agent('Arthur')
+        self.lancelot = Agent('Lancelot')
+        self.lancelot.has_sword = True
+        self.guinevere = Agent('Guinevere')
+
+    def test_shared_role(self):
+        """Unmapped roles with the same name are the same object."""
+        macro = make_macro([StealSword, Kill])
+        self.assertEqual(macro.name, 'steal sword, kill')
+        self.assertEqual(macro.object_keys(), ['victim'])
+        self.assertEqual(
+            macro.preconditions,
+            [
+                (HasSword, 'victim', True),
+                (HasSword, 'actor', False),
+                (Is, ('victim', 'actor'), False),
+                (IsAlive, 'victim', True),
+            ]
+        )
+        self.assertEqual(
+            macro.effects,
+            [
+                (HasSword, 'victim', False),
+                (HasSword, 'actor', True),
+                (IsAlive, 'victim', False),
+            ]
+        )
+
+    def test_cached(self):
+        self.assertIs(make_macro([StealSword, Kill]), make_macro(
+            [(StealSword, {}), (Kill, {})]))
+
+    def test_pickled_by_name(self):
+        """Macros are found by module and name, even when names repeat."""
+        macro = make_macro([StealSword, Kill])
+        other_macro = make_macro(
+            [(StealSword, {'victim': 'owner'}), Kill])
+        for each_macro in [macro, other_macro]:
+            self.assertIs(
+                pickle.loads(pickle.dumps(each_macro, 2)), each_macro)
+        self.assertNotEqual(macro.__name__, other_macro.__name__)
+
+    def test_undone_precondition(self):
+        """Stealing the sword twice from the same victim is impossible."""
+        self.assertRaises(ValueError, make_macro, [StealSword, StealSword])
+
+    def test_single_step(self):
+        self.assertRaises(ValueError, make_macro, [Kill])
+
+    def test_apply_action(self):
+        macro = make_macro([
+            (StealSword, {'victim': 'owner'}),
+            (Kill, {'victim': 'target'}),
+        ])
+        self.assertTrue(macro.check_preconditions(
+            actor=self.arthur, owner=self.lancelot, target=self.guinevere))
+        self.assertEqual(
+            macro.expand(
+                actor=self.arthur, owner=self.lancelot,
+                target=self.guinevere),
+            [
+                (self.arthur, StealSword, {'victim': self.lancelot}),
+                (self.arthur, Kill, {'victim': self.guinevere}),
+            ]
+        )
+        macro.apply_action(
+            actor=self.arthur, owner=self.lancelot, target=self.guinevere)
+        self.assertTrue(self.arthur.has_sword)
+        self.assertFalse(self.lancelot.has_sword)
+        self.assertFalse(self.guinevere.alive)
+
+
+class TestMineMacros(unittest.TestCase):
+    def test_mine_macros(self):
+        arthur = Agent('Arthur')
+        lancelot = Agent('Lancelot')
+        lancelot.has_sword = True
+        guinevere = Agent('Guinevere')
+        plan = [
+            (arthur, StealSword, {'victim': lancelot}),
+            (arthur, Kill, {'victim': guinevere}),
+        ]
+        self.assertEqual(mine_macros([plan], min_count=2), [])
+        macros = mine_macros([plan, plan], min_count=2)
+        self.assertEqual(len(macros), 1)
+        macro = macros[0]
+        self.assertEqual(sorted(macro.object_keys()), ['victim', 'victim_2'])
+
+        available_actions = add_macros([Kill, StealSword], macros)
+        self.assertEqual(available_actions, [Kill, StealSword, macro])
+        self.assertEqual(add_macros(available_actions, macros),
+                         available_actions)
+
+        goal = Goal('kill', condition=IsAlive(guinevere), value=False)
+        actions_sequence = select_plan(
+            actor=arthur, goal=goal, available_actions=available_actions,
+            objects=[arthur, lancelot, guinevere])
+        self.assertEqual(
+            actions_sequence,
+            [(arthur, macro, {'victim': lancelot, 'victim_2': guinevere})]
+        )
@@ -0,0 +1,140 @@
+import unittest
+
+from planning.actions import Action
+from planning.agents import Agent
+from planning.conditions import AttributeCondition, Is
+from planning.goals import Goal
+from planning.mutex import (
+    find_invariants, holding_invariants, violates_invariants)
+from planning.plans import (
+    PossiblePlan, _expand_possible_plans, select_plan)
+
+
+class HasSword(AttributeCondition):
+    name = 'has sword'
+    attribute = 'has_sword'
+
+
+class IsAlive(AttributeCondition):
+    name = 'is alive'
+    attribute = 'alive'
+
+
+class Kill(Action):
+    name = 'kill'
+    preconditions = [
+        (IsAlive, 'victim', True),
+        (HasSword, 'actor', True)
+    ]
+    effects = [
+        (IsAlive, 'victim', False)
+    ]
+
+
+class StealSword(Action):
+    name = 'steal sword'
+    preconditions = [
+        (HasSword, 'victim', True),
+        (HasSword, 'actor', False),
+        (Is, ('victim', 'actor'), False)
+    ]
+    effects = [
+        (HasSword, 'victim', False),
+        (HasSword, 'actor', True)
+    ]
+
+
+class GiveSword(Action):
+    name = 'give sword'
+    preconditions = [
+        (HasSword, 'friend', False),
+        (HasSword, 'actor', True),
+        (Is, ('friend', 'actor'), False)
+    ]
+    effects = [
+        (HasSword, 'friend', True),
+        (HasSword, 'actor', False)
+    ]
+
+
+class ForgeSword(Action):
+    name = 'forge sword'
+    preconditions = [
+        (HasSword, 'actor', False)
+    ]
+    effects = [
+        (HasSword, 'actor', True)
+    ]
+
+
+class TestInvariants(unittest.TestCase):
+    def setUp(self):
+        self.arthur = Agent('Arthur')
+        self.lancelot = Agent('Lancelot')
+        self.lancelot.has_sword = True
+        self.guinevere = Agent('Guinevere')
+        self.objects = [self.arthur, self.lancelot, self.guinevere]
+
+    def test_find_invariants(self):
+        invariants = find_invariants([Kill, StealSword, GiveSword])
+        self.assertIn((HasSword, True), invariants)
+        self.assertNotIn((IsAlive, False), invariants)
+
+    def test_unbalanced_action(self):
+        """Forging creates swords, so sword holders are not exclusive."""
+        invariants = find_invariants([Kill, StealSword, ForgeSword])
+        self.assertNotIn((HasSword, True), invariants)
+
+    def test_holding_invariants(self):
+        invariants = [(HasSword, True), (HasSword, False)]
+        self.assertEqual(
+            holding_invariants(invariants, self.objects), [(HasSword, True)])
+
+    def test_violates_invariants(self):
+        invariants = [(HasSword, True)]
+        self.assertTrue(violates_invariants(
+            {
+                (HasSword, (self.arthur,)): True,
+                (HasSword, (self.lancelot,)): True,
+            },
+            invariants
+        ))
+        self.assertFalse(violates_invariants(
+            {
+                (HasSword, (self.arthur,)): True,
+                (HasSword, (self.lancelot,)): False,
+            },
+            invariants
+        ))
+
+    def test_expand_prunes(self):
+        """Giving a sword to Guinevere while Lancelot still has his."""
+        possible_plan = PossiblePlan()
+        possible_plan.conditions = {
+            (HasSword, (self.guinevere,)): True,
+            (HasSword, (self.lancelot,)): True,
+        }
+        actions = [StealSword, GiveSword]
+        unpruned = _expand_possible_plans(
+            [possible_plan], available_actions=actions, actor=self.arthur,
+            objects=self.objects)
+        pruned = _expand_possible_plans(
+            [possible_plan], available_actions=actions, actor=self.arthur,
+            objects=self.objects, invariants=[(HasSword, True)])
+        self.assertTrue(unpruned)
+        self.assertEqual(pruned, [])
+
+    def test_select_plan(self):
+        goal = Goal(
+            'guinevere dead', condition=IsAlive(self.guinevere), value=False)
+        actions_sequence = select_plan(
+            actor=self.arthur, goal=goal,
+            available_actions=[Kill, StealSword, GiveSword],
+            objects=self.objects, prune_mutex=True)
+        self.assertEqual(
+            actions_sequence,
+            [
+                (self.arthur, StealSword, {'victim': self.lancelot}),
+                (self.arthur, Kill, {'victim': self.guinevere}),
+            ]
+        )
@@ -0,0 +1,95 @@
+import unittest
+
+from planning.actions import Action
+from planning.agents import Agent
+from planning.conditions import AttributeCondition, Is
+from planning.ordering import PartialOrderPlan
+
+
+class HasSword(AttributeCondition):
+    name = 'has sword'
+    attribute = 'has_sword'
+
+
+class IsAlive(AttributeCondition):
+    name = 'is alive'
+    attribute = 'alive'
+    default = True
+
+
+class Kill(Action):
+    name = 'kill'
+    preconditions = [
+        (IsAlive, 'victim', True),
+        (HasSword, 'actor', True)
+    ]
+    effects = [
+        (IsAlive, 'victim', False)
+    ]
+
+
+class StealSword(Action):
+    name = 'steal sword'
+    preconditions = [
+        (HasSword, 'victim', True),
+        (HasSword, 'actor', False),
+        (Is, ('victim', 'actor'), False)
+    ]
+    effects = [
+        (HasSword, 'victim', False),
+        (HasSword, 'actor', True)
+    ]
+
+
+class TestPartialOrderPlan(unittest.TestCase):
+    def setUp(self):
+        self.arthur = Agent('Arthur')
+        self.lancelot = Agent('Lancelot')
+        self.percival = Agent('Percival')
+        self.dragon = Agent('Dragon')
+        self.ogre = Agent('Ogre')
+
+    def test_causal_link(self):
+        actions_sequence = [
+            (self.arthur, StealSword, {'victim': self.lancelot}),
+            (self.percival, Kill, {'victim': self.dragon}),
+            (self.arthur, Kill, {'victim': self.ogre}),
+        ]
+        plan = PartialOrderPlan(actions_sequence)
+        self.assertEqual(plan.predecessors, [set(), set(), set([0])])
+        self.assertEqual(plan.layers(), [[0, 1], [2]])
+        self.assertEqual(plan.ready(), [0, 1])
+        self.assertEqual(plan.ready([1]), [0])
+        self.assertEqual(plan.ready([0, 1]), [2])
+        self.assertEqual(plan.ready([0, 1, 2]), [])
+
+    def test_threat(self):
+        """Stealing Lancelot's sword must wait until he has used it."""
+        actions_sequence = [
+            (self.lancelot, Kill, {'victim': self.dragon}),
+            (self.arthur, StealSword, {'victim': self.lancelot}),
+        ]
+        plan = PartialOrderPlan(actions_sequence)
+        self.assertEqual(plan.layers(), [[0], [1]])
+
+    def test_serialize_actors(self):
+        actions_sequence = [
+            (self.arthur, Kill, {'victim': self.dragon}),
+            (self.arthur, Kill, {'victim': self.ogre}),
+        ]
+        self.assertEqual(
+            PartialOrderPlan(actions_sequence).layers(), [[0, 1]])
+        self.assertEqual(
+            PartialOrderPlan(
+                actions_sequence, serialize_actors=True).layers(),
+            [[0], [1]]
+        )
+
+    def test_empty_plan(self):
+        plan = PartialOrderPlan([])
+        self.assertEqual(len(plan), 0)
+        self.assertEqual(plan.layers(), [])
+        self.assertEqual(plan.ready(), [])
+
+    def test_no_inputs(self):
+        self.assertRaises(ValueError, PartialOrderPlan)
@@ -0,0 +1,177 @@
+import unittest
+
+from planning.actions import Action
+from planning.agents import Agent
+from planning.conditions import AttributeCondition, Is
+from planning.goals import Goal
+from planning.patterns import (
+    PatternDatabase, UNREACHABLE, pattern_database, pattern_heuristic,
+    role_objects)
+from planning.plans import _create_initial_plan, best_first_plan_search
+
+
+class HasSword(AttributeCondition):
+    name = 'has sword'
+    attribute = 'has_sword'
+
+
+class IsAlive(AttributeCondition):
+    name = 'is alive'
+    attribute = 'alive'
+    default = True
+
+
+class Kill(Action):
+    name = 'kill'
+    preconditions = [
+        (IsAlive, 'victim', True),
+        (HasSword, 'actor', True)
+    ]
+    effects = [
+        (IsAlive, 'victim', False)
+    ]
+
+
+class StealSword(Action):
+    name = 'steal sword'
+    preconditions = [
+        (HasSword, 'victim', True),
+        (HasSword, 'actor', False),
+        (Is, ('victim', 'actor'), False)
+    ]
+    effects = [
+        (HasSword, 'victim', False),
+        (HasSword, 'actor', True)
+    ]
+
+
+class PatternsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.actions = [Kill, StealSword]
+        self.arthur = Agent('Arthur')
+        self.dragon = Agent('Dragon')
+        self.lancelot = Agent('Lancelot')
+        self.lancelot.has_sword = True
+        self.objects = [self.arthur, self.dragon, self.lancelot]
+        self.goal = Goal(
+            'dragon dead', condition=IsAlive(self.dragon), value=False)
+
+
+class TestPatternDatabase(PatternsTestCase):
+    def setUp(self):
+        super(TestPatternDatabase, self).setUp()
+        self.database = PatternDatabase(
+            pattern_conditions=[HasSword], available_actions=self.actions,
+            number_of_roles=2)
+
+    def test_atoms(self):
+        self.assertEqual(
+            self.database.atoms, [(HasSword, (0,)), (HasSword, (1,))])
+        self.assertEqual(self.database.number_of_states, 4)
+        self.assertEqual(len(self.database.distances), 16)
+        self.assertEqual(
+            self.database.ground_atoms([self.arthur, self.dragon]),
+            [(HasSword, (self.arthur,)), (HasSword, (self.dragon,))]
+        )
+
+    def test_operators(self):
+        self.assertEqual(
+            self.database.operators,
+            [
+                # Stealing the sword of an object outside the pattern
+                (1, 0, 1, 1),
+                # Stealing the sword of role 1
+                (3, 2, 3, 1),
+            ]
+        )
+
+    def test_partial_distances(self):
+        table = self.database.partial_distances(0)
+        self.assertEqual(len(table), 9)
+        # Nothing required
+        self.assertEqual(table[0], 0)
+        # The actor has a sword
+        self.assertEqual(table[2], 1)
+        # Role 1 has a sword, which nothing gives it
+        self.assertEqual(table[6], UNREACHABLE)
+        self.assertIs(self.database.partial_distances(0), table)
+
+    def test_heuristic(self):
+        heuristic = self.database.heuristic([self.arthur, self.dragon])
+        possible_plan = _create_initial_plan(self.goal)
+        self.assertEqual(heuristic(possible_plan), 0)
+        possible_plan.prepend_action(
+            (self.arthur, Kill, {'victim': self.dragon}))
+        self.assertEqual(heuristic(possible_plan), 1)
+        possible_plan.prepend_action(
+            (self.arthur, StealSword, {'victim': self.lancelot}))
+        self.assertEqual(heuristic(possible_plan), 0)
+
+    def test_heuristic_unreachable(self):
+        heuristic = self.database.heuristic([self.arthur, self.dragon])
+        possible_plan = _create_initial_plan(
+            Goal('armed dragon', condition=HasSword(self.dragon), value=True))
+        self.assertEqual(heuristic(possible_plan), float('inf'))
+
+    def test_heuristic_wrong_number_of_objects(self):
+        self.assertRaises(ValueError, self.database.heuristic, [self.arthur])
+
+    def test_too_many_atoms(self):
+        self.assertRaises(
+            ValueError, PatternDatabase, pattern_conditions=[HasSword, Is],
+            available_actions=self.actions, number_of_roles=3)
+
+    def test_no_inputs(self):
+        self.assertRaises(ValueError, PatternDatabase)
+
+
+class TestPatternHeuristic(PatternsTestCase):
+    def test_role_objects(self):
+        self.assertEqual(
+            role_objects(self.arthur, self.goal), [self.arthur, self.dragon])
+        armed_goal = Goal(
+            'armed', condition=HasSword(self.arthur), value=True)
+        self.assertEqual(role_objects(self.arthur, armed_goal), [self.arthur])
+
+    def test_pattern_database_shared(self):
+        """Every actor and goal with as many roles shares one database."""
+        database = pattern_database(
+            pattern_conditions=[HasSword], available_actions=self.actions,
+            number_of_roles=2)
+        self.assertIs(
+            pattern_database(
+                pattern_conditions=[HasSword],
+                available_actions=self.actions, number_of_roles=2),
+            database
+        )
+
+    def test_best_first_plan_search(self):
+        heuristic = pattern_heuristic(
+            actor=self.arthur, goal=self.goal,
+            available_actions=self.actions, pattern_conditions=[HasSword])
+        selected_plan = best_first_plan_search(
+            actor=self.arthur, goal=self.goal,
+            available_actions=self.actions, objects=self.objects,
+            heuristic=heuristic)
+        self.assertEqual(
+            selected_plan.actions_to_perform,
+            [
+                (self.arthur, StealSword, {'victim': self.lancelot}),
+                (self.arthur, Kill, {'victim': self.dragon}),
+            ]
+        )
+
+    def test_many_objects(self):
+        """The pattern does not grow with the number of objects."""
+        objects = self.objects + [Agent('Peasant') for i in xrange(20)]
+        heuristic = pattern_heuristic(
+            actor=self.arthur, goal=self.goal,
+            available_actions=self.actions, pattern_conditions=[HasSword])
+        selected_plan = best_first_plan_search(
+            actor=self.arthur, goal=self.goal,
+            available_actions=self.actions, objects=objects,
+            heuristic=heuristic)
+        self.assertEqual(len(selected_plan.actions_to_perform), 2)
+
+    def test_no_inputs(self):
+        self.assertRaises(ValueError, pattern_heuristic)
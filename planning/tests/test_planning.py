@@ -1,12 +1,21 @@
+import types
 import unittest
 
 from planning.actions import Action
-from planning.conditions import Condition, Is
+from planning.conditions import AttributeCondition, Condition, Is
 from planning.goals import Goal
+from planning import plans
 from planning.plans import (
-    PossiblePlan, select_plan, breadth_first_plan_search,
-    _create_initial_plan, _actions_that_match_possible_plan,
-    _action_effects_match_possible_plan, PlanningDepthException)
+    PossiblePlan, select_plan, select_plans, iter_plans,
+    select_joint_plan, assign_steps,
+    breadth_first_plan_search, beam_plan_search, count_unmet_conditions,
+    _best_possible_plans, _create_initial_plan,
+    _iter_expanded_possible_plans,
+    _actions_that_match_possible_plan,
+    _action_effects_match_possible_plan, _unique_possible_plans,
+    PlanningDepthException, MAX_SEARCH_DEPTH, MAX_BEAM_WIDTH)
+from planning.snapshots import WorldSnapshot
+from planning.states import ConditionIndex
 
 
 class Agent(object):
@@ -45,6 +54,12 @@ class IsAlive(Condition):
             return False
 
 
+class Mood(AttributeCondition):
+    name = 'mood'
+    attribute = 'mood'
+    default = 'calm'
+
+
 # Test actions
 class GetSword(Action):
     name = 'get sword',
@@ -97,6 +112,16 @@ class GiveSword(Action):
     ]
 
 
+class Provoke(Action):
+    name = 'provoke'
+    preconditions = [
+        (Mood, 'victim', 'calm')
+    ]
+    effects = [
+        (Mood, 'victim', 'angry')
+    ]
+
+
 class TestPlanning(unittest.TestCase):
     def setUp(self):
         self.knight = Agent('Knight')
@@ -121,6 +146,45 @@ class TestPlanning(unittest.TestCase):
             ]
         )
 
+    def test_state(self):
+        """The world is read from the state rather than the objects."""
+        state = WorldSnapshot()
+        state.apply({(HasSword, (self.knight,)): True})
+        for options in [{}, {'prune_irrelevant': True, 'prune_mutex': True,
+                             'reduce_symmetry': True}, {'beam_width': 2}]:
+            actions_sequence = select_plan(
+                actor=self.knight, goal=self.knight_goal,
+                available_actions=self.possible_actions,
+                objects=self.objects, state=state, **options)
+            self.assertEqual(
+                actions_sequence,
+                [(self.knight, Kill, {'victim': self.dragon})])
+
+    def test_non_boolean_values(self):
+        goal = Goal('angry dragon', condition=Mood(self.dragon), value='angry')
+        for options in [{}, {'beam_width': 2},
+                        {'heuristic': lambda possible_plan: 0}]:
+            actions_sequence = select_plan(
+                actor=self.knight, goal=goal, available_actions=[Provoke],
+                objects=self.objects, **options)
+            self.assertEqual(
+                actions_sequence,
+                [(self.knight, Provoke, {'victim': self.dragon})])
+
+    def test_state_non_boolean_values(self):
+        """Searches without a condition index read the state too."""
+        self.dragon.mood = 'angry'
+        state = WorldSnapshot()
+        state.apply({(Mood, (self.dragon,)): 'calm'})
+        goal = Goal('angry dragon', condition=Mood(self.dragon), value='angry')
+        # Already angry in the live world, but calm in the state
+        actions_sequence = select_plan(
+            actor=self.knight, goal=goal, available_actions=[Provoke],
+            objects=self.objects, state=state)
+        self.assertEqual(
+            actions_sequence,
+            [(self.knight, Provoke, {'victim': self.dragon})])
+
     def test_three_actions(self):
         arthur = Agent("Arthur")
         arthur.has_sword = False
@@ -151,6 +215,79 @@ class TestPlanning(unittest.TestCase):
         )
 
 
+class TestIterPlans(unittest.TestCase):
+    def setUp(self):
+        self.arthur = Agent("Arthur")
+        self.lancelot = Agent("Lancelot")
+        self.lancelot.has_sword = True
+        self.guenivere = Agent("Guenivere")
+        self.guenivere.has_sword = True
+        self.objects = [self.arthur, self.lancelot, self.guenivere]
+        self.available_actions = [Kill, StealSword, GiveSword]
+        self.goal = Goal(
+            'lancelot dead',
+            condition=IsAlive(self.lancelot),
+            value=False
+        )
+
+    def test_iter_plans(self):
+        possible_plans = iter_plans(
+            actor=self.arthur, goal=self.goal,
+            available_actions=self.available_actions, objects=self.objects)
+        first_plan = next(possible_plans)
+        second_plan = next(possible_plans)
+        self.assertEqual(
+            first_plan.actions_to_perform,
+            [
+                (self.arthur, StealSword, {'victim': self.lancelot}),
+                (self.arthur, Kill, {'victim': self.lancelot}),
+            ]
+        )
+        self.assertEqual(
+            second_plan.actions_to_perform,
+            [
+                (self.arthur, StealSword, {'victim': self.guenivere}),
+                (self.arthur, Kill, {'victim': self.lancelot}),
+            ]
+        )
+
+    def test_shortest_first(self):
+        lengths = [
+            len(possible_plan.actions_to_perform)
+            for possible_plan in iter_plans(
+                actor=self.arthur, goal=self.goal,
+                available_actions=self.available_actions,
+                objects=self.objects)
+        ]
+        self.assertTrue(lengths)
+        self.assertEqual(lengths, sorted(lengths))
+        self.assertTrue(max(lengths) <= MAX_SEARCH_DEPTH)
+
+    def test_select_plans(self):
+        actions_sequences = select_plans(
+            actor=self.arthur, goal=self.goal,
+            available_actions=self.available_actions, objects=self.objects,
+            number_of_plans=2)
+        self.assertEqual(len(actions_sequences), 2)
+        self.assertEqual(
+            actions_sequences[0],
+            select_plan(
+                actor=self.arthur, goal=self.goal,
+                available_actions=self.available_actions,
+                objects=self.objects)
+        )
+
+    def test_no_plans(self):
+        self.arthur.has_sword = False
+        actions_sequences = select_plans(
+            actor=self.arthur, goal=self.goal, available_actions=[Kill],
+            objects=self.objects, number_of_plans=3)
+        self.assertEqual(actions_sequences, [])
+
+    def test_no_inputs(self):
+        self.assertRaises(ValueError, next, iter_plans())
+
+
 class TestBreadthFirstPlanSearch(unittest.TestCase):
     def setUp(self):
         self.knight = Agent('Knight')
@@ -232,6 +369,9 @@ class TestPossiblePlan(unittest.TestCase):
         }
         matches = possible_plan.matches_initial_conditions()
         self.assertTrue(matches)
+        state = WorldSnapshot()
+        state.apply({(IsAlive, (self.dragon,)): False})
+        self.assertFalse(possible_plan.matches_initial_conditions(state))
 
     def test_copy(self):
         possible_plan = PossiblePlan()
@@ -316,6 +456,23 @@ class TestPossiblePlan(unittest.TestCase):
             }
         )
 
+    def test_prepend_action_updates_state(self):
+        """Plans with a ConditionIndex keep their conditions encoded."""
+        condition_index = ConditionIndex()
+        possible_plan = _create_initial_plan(
+            self.knight_goal, condition_index)
+        self.assertFalse(possible_plan.matches_initial_conditions())
+        possible_plan.prepend_action(
+            (self.knight, Kill, {'victim': self.dragon}))
+        copy_possible_plan = possible_plan.copy()
+        copy_possible_plan.prepend_action((self.knight, GetSword, {}))
+        for plan in [possible_plan, copy_possible_plan]:
+            self.assertEqual(
+                condition_index.decode(plan.state), plan.conditions)
+            self.assertIs(plan.condition_state(condition_index), plan.state)
+        self.assertFalse(possible_plan.matches_initial_conditions())
+        self.assertTrue(copy_possible_plan.matches_initial_conditions())
+
 
 class TestActionsThatMatchPossiblePlan(unittest.TestCase):
     def setUp(self):
@@ -336,6 +493,18 @@ class TestActionsThatMatchPossiblePlan(unittest.TestCase):
             [(self.knight, Kill, {'victim': self.dragon})]
         )
 
+    def test_actions_that_match_encoded_plan(self):
+        goal = Goal(
+            'dragon dead', condition=IsAlive(self.dragon), value=False)
+        possible_plan = _create_initial_plan(goal, ConditionIndex())
+        actions = _actions_that_match_possible_plan(
+            possible_plan, available_actions=self.actions,
+            actor=self.knight, objects=[self.knight, self.dragon])
+        self.assertEqual(
+            actions,
+            [(self.knight, Kill, {'victim': self.dragon})]
+        )
+
     def test_action_effects_match_possible_plan(self):
         possible_plan = PossiblePlan()
         possible_plan.conditions = {
@@ -358,3 +527,213 @@ class TestActionsThatMatchPossiblePlan(unittest.TestCase):
             victim=self.knight
         )
         self.assertFalse(matches)
+
+
+class TestUniquePossiblePlans(unittest.TestCase):
+    def test_duplicate_conditions_dropped(self):
+        knight = Agent('Knight')
+        first_plan = PossiblePlan()
+        first_plan.conditions = {(HasSword, (knight,)): True}
+        second_plan = PossiblePlan()
+        second_plan.conditions = {(HasSword, (knight,)): True}
+        third_plan = PossiblePlan()
+        third_plan.conditions = {(HasSword, (knight,)): False}
+        unique_plans = _unique_possible_plans(
+            [first_plan, second_plan, third_plan], ConditionIndex())
+        self.assertEqual(unique_plans, [first_plan, third_plan])
+
+
+class TestBeamPlanSearch(unittest.TestCase):
+    def setUp(self):
+        self.knight = Agent('Knight')
+        self.dragon = Agent('Dragon')
+        self.lancelot = Agent('Lancelot')
+        self.lancelot.has_sword = True
+        self.possible_actions = [Kill, StealSword]
+        self.knight_goal = Goal(
+            'dragon dead', condition=IsAlive(self.dragon), value=False)
+        self.objects = [self.knight, self.dragon, self.lancelot]
+
+    def test_beam_plan_search(self):
+        selected_plan = beam_plan_search(
+            actor=self.knight, goal=self.knight_goal,
+            available_actions=self.possible_actions, objects=self.objects,
+            beam_width=1)
+        self.assertEqual(
+            selected_plan.actions_to_perform,
+            [
+                (self.knight, StealSword, {'victim': self.lancelot}),
+                (self.knight, Kill, {'victim': self.dragon}),
+            ]
+        )
+
+    def test_select_plan_beam_width(self):
+        actions_sequence = select_plan(
+            actor=self.knight, goal=self.knight_goal,
+            available_actions=self.possible_actions, objects=self.objects,
+            beam_width=2)
+        self.assertEqual(
+            actions_sequence,
+            select_plan(
+                actor=self.knight, goal=self.knight_goal,
+                available_actions=self.possible_actions,
+                objects=self.objects)
+        )
+
+    def test_scoring(self):
+        """A misleading score makes a narrow beam miss the plan."""
+        def prefer_unarmed(possible_plan):
+            return -count_unmet_conditions(possible_plan)
+        self.assertRaises(
+            PlanningDepthException,
+            beam_plan_search,
+            actor=self.knight, goal=self.knight_goal,
+            available_actions=self.possible_actions, objects=self.objects,
+            beam_width=1, scoring=prefer_unarmed)
+
+    def test_memory_bound(self):
+        """Beam searches keep nothing per binding of an action."""
+        bystanders = [Agent('Bystander %d' % number) for number in xrange(50)]
+        objects = self.objects + bystanders
+        indexes = []
+
+        class RecordingIndex(ConditionIndex):
+            def __init__(self, *args, **kwargs):
+                super(RecordingIndex, self).__init__(*args, **kwargs)
+                indexes.append(self)
+
+        plans.ConditionIndex = RecordingIndex
+        try:
+            selected_plan = beam_plan_search(
+                actor=self.knight, goal=self.knight_goal,
+                available_actions=self.possible_actions, objects=objects,
+                beam_width=1)
+        finally:
+            plans.ConditionIndex = ConditionIndex
+        self.assertEqual(len(selected_plan.actions_to_perform), 2)
+        index, = indexes
+        self.assertEqual(index._effects, {})
+        self.assertEqual(index._preconditions, {})
+        # Matching bindings are made as the beam takes them
+        initial_plan = _create_initial_plan(self.knight_goal, index)
+        expanded_plans = _iter_expanded_possible_plans(
+            [initial_plan], available_actions=self.possible_actions,
+            actor=self.knight, objects=objects)
+        self.assertIsInstance(expanded_plans, types.GeneratorType)
+        self.assertEqual(
+            next(expanded_plans).actions_to_perform,
+            [(self.knight, Kill, {'victim': self.dragon})])
+
+    def test_beam_width_limits(self):
+        for beam_width in [0, MAX_BEAM_WIDTH + 1]:
+            self.assertRaises(
+                ValueError,
+                beam_plan_search,
+                actor=self.knight, goal=self.knight_goal,
+                available_actions=self.possible_actions,
+                objects=self.objects, beam_width=beam_width)
+
+    def test_no_inputs(self):
+        self.assertRaises(ValueError, beam_plan_search)
+
+    def test_count_unmet_conditions(self):
+        possible_plan = PossiblePlan()
+        possible_plan.conditions = {
+            (HasSword, (self.knight,)): True,
+            (HasSword, (self.lancelot,)): True,
+            (IsAlive, (self.dragon,)): False,
+        }
+        self.assertEqual(count_unmet_conditions(possible_plan), 2)
+
+    def test_best_possible_plans(self):
+        possible_plans = []
+        for has_sword in [True, False, True]:
+            possible_plan = PossiblePlan()
+            possible_plan.conditions = {(HasSword, (self.knight,)): has_sword}
+            possible_plans.append(possible_plan)
+        best_plans = _best_possible_plans(
+            iter(possible_plans), 1, count_unmet_conditions,
+            ConditionIndex(), set())
+        self.assertEqual(best_plans, [possible_plans[1]])
+        # The repeated conditions of the third plan are skipped
+        best_plans = _best_possible_plans(
+            iter(possible_plans), 3, count_unmet_conditions,
+            ConditionIndex(), set())
+        self.assertEqual(best_plans, [possible_plans[1], possible_plans[0]])
+
+
+class TestJointPlanning(unittest.TestCase):
+    def setUp(self):
+        self.arthur = Agent('Arthur')
+        self.arthur.has_sword = True
+        self.lancelot = Agent('Lancelot')
+        self.dragon = Agent('Dragon')
+        self.team = [self.arthur, self.lancelot]
+        self.objects = [self.arthur, self.lancelot, self.dragon]
+        self.armed_goal = Goal(
+            'lancelot armed', condition=HasSword(self.lancelot), value=True)
+
+    def test_select_joint_plan(self):
+        """Arthur arms Lancelot, which Lancelot can not plan alone."""
+        self.assertRaises(
+            PlanningDepthException,
+            select_plan,
+            actor=self.lancelot, goal=self.armed_goal,
+            available_actions=[GiveSword], objects=self.objects)
+        assignments = select_joint_plan(
+            team=self.team, goal=self.armed_goal,
+            available_actions=[GiveSword], objects=self.objects)
+        self.assertEqual(
+            assignments,
+            {
+                self.arthur: [(0, GiveSword, {'friend': self.lancelot})],
+                self.lancelot: [],
+            }
+        )
+
+    def test_members_take_turns(self):
+        self.arthur.has_sword = False
+        self.dragon.has_sword = True
+        goal = Goal(
+            'dragon dead', condition=IsAlive(self.dragon), value=False)
+        assignments = select_joint_plan(
+            team=self.team, goal=goal,
+            available_actions=[Kill, StealSword, GiveSword],
+            objects=self.objects)
+        self.assertEqual(len(assignments[self.arthur]) + len(
+            assignments[self.lancelot]), 2)
+        step_numbers = sorted(
+            step[0] for steps in assignments.values() for step in steps)
+        self.assertEqual(step_numbers, [0, 1])
+
+    def test_depth_exception(self):
+        self.arthur.has_sword = False
+        self.assertRaises(
+            PlanningDepthException,
+            select_joint_plan,
+            team=self.team, goal=self.armed_goal,
+            available_actions=[GiveSword], objects=self.objects)
+
+    def test_no_inputs(self):
+        self.assertRaises(ValueError, select_joint_plan)
+        self.assertRaises(
+            ValueError, select_joint_plan, team=[], goal=self.armed_goal,
+            available_actions=[GiveSword], objects=self.objects)
+
+    def test_assign_steps(self):
+        actions_sequence = [
+            (self.lancelot, StealSword, {'victim': self.arthur}),
+            (self.lancelot, Kill, {'victim': self.dragon}),
+        ]
+        self.assertEqual(
+            assign_steps(self.team, actions_sequence),
+            {
+                self.arthur: [],
+                self.lancelot: [
+                    (0, StealSword, {'victim': self.arthur}),
+                    (1, Kill, {'victim': self.dragon}),
+                ],
+            }
+        )
+        self.assertRaises(
+            ValueError, assign_steps, [self.arthur], actions_sequence)
@@ -0,0 +1,238 @@
+import random
+import unittest
+
+from planning.actions import Action
+from planning.agents import Agent
+from planning.conditions import AttributeCondition, Is
+from planning.goals import Goal
+from planning.macros import make_macro
+from planning.probabilistic import (
+    PlanEvaluation, _binomial, _split_samples, rollout_plan,
+    select_robust_plan)
+
+
+class HasSword(AttributeCondition):
+    name = 'has sword'
+    attribute = 'has_sword'
+
+
+class IsAlive(AttributeCondition):
+    name = 'is alive'
+    attribute = 'alive'
+
+
+class Kill(Action):
+    name = 'kill'
+    probability = 0.5
+    preconditions = [
+        (IsAlive, 'victim', True),
+        (HasSword, 'actor', True)
+    ]
+    effects = [
+        (IsAlive, 'victim', False)
+    ]
+
+
+class StealSword(Action):
+    name = 'steal sword'
+    probability = 0.2
+    preconditions = [
+        (HasSword, 'victim', True),
+        (HasSword, 'actor', False),
+        (Is, ('victim', 'actor'), False)
+    ]
+    effects = [
+        (HasSword, 'victim', False),
+        (HasSword, 'actor', True)
+    ]
+
+
+class GrabSword(Action):
+    name = 'grab sword'
+    probability = 0.5
+    preconditions = [
+        (HasSword, 'victim', True),
+        (HasSword, 'actor', False),
+        (Is, ('victim', 'actor'), False)
+    ]
+    effects = [
+        (HasSword, 'victim', False),
+        (HasSword, 'actor', True)
+    ]
+
+
+class AskForSword(Action):
+    name = 'ask for sword'
+    cost = 3
+    preconditions = [
+        (HasSword, 'friend', True),
+        (HasSword, 'actor', False),
+        (Is, ('friend', 'actor'), False)
+    ]
+    effects = [
+        (HasSword, 'friend', False),
+        (HasSword, 'actor', True)
+    ]
+
+
+class TestOutcomes(unittest.TestCase):
+    def test_calculate_outcomes(self):
+        knight = Agent('Knight')
+        dragon = Agent('Dragon')
+        self.assertEqual(
+            Kill.calculate_outcomes(actor=knight, victim=dragon),
+            [(0.5, {(IsAlive, (dragon,)): False}), (0.5, {})]
+        )
+
+    def test_certain_outcome(self):
+        knight = Agent('Knight')
+        dragon = Agent('Dragon')
+        self.assertEqual(
+            AskForSword.calculate_outcomes(actor=knight, friend=dragon),
+            [(1.0, {
+                (HasSword, (dragon,)): False,
+                (HasSword, (knight,)): True,
+            })]
+        )
+
+
+class TestSplitSamples(unittest.TestCase):
+    def test_split_samples(self):
+        rng = random.Random(1)
+        counts = _split_samples(100000, [0.2, 0.3, 0.5], rng)
+        self.assertEqual(sum(counts), 100000)
+        for count, probability in zip(counts, [0.2, 0.3, 0.5]):
+            self.assertAlmostEqual(count / 100000.0, probability, 2)
+
+    def test_certain_outcomes(self):
+        rng = random.Random(1)
+        self.assertEqual(_split_samples(10, [1.0], rng), [10])
+        self.assertEqual(_split_samples(10, [0.0, 1.0], rng), [0, 10])
+        self.assertEqual(_split_samples(0, [0.5, 0.5], rng), [0, 0])
+
+    def test_binomial(self):
+        """Draws follow the binomial distribution."""
+        rng = random.Random(1)
+        draws = [_binomial(10, 0.3, rng) for draw in xrange(20000)]
+        self.assertTrue(all(0 <= draw <= 10 for draw in draws))
+        self.assertAlmostEqual(sum(draws) / 20000.0, 3.0, 1)
+        self.assertAlmostEqual(draws.count(0) / 20000.0, 0.7 ** 10, 2)
+        self.assertAlmostEqual(draws.count(10) / 20000.0, 0.3 ** 10, 3)
+
+
+class TestRolloutPlan(unittest.TestCase):
+    def setUp(self):
+        self.arthur = Agent('Arthur')
+        self.lancelot = Agent('Lancelot')
+        self.lancelot.has_sword = True
+        self.guinevere = Agent('Guinevere')
+        self.goal = Goal(
+            'kill', condition=IsAlive(self.guinevere), value=False)
+
+    def test_rollout_plan(self):
+        actions_sequence = [
+            (self.arthur, StealSword, {'victim': self.lancelot}),
+            (self.arthur, Kill, {'victim': self.guinevere}),
+        ]
+        evaluation = rollout_plan(
+            actions_sequence, self.goal, number_of_samples=20000,
+            rng=random.Random(1))
+        self.assertAlmostEqual(evaluation.success_probability, 0.1, 2)
+        self.assertAlmostEqual(evaluation.expected_cost, 1.2, 1)
+        # The world itself is untouched
+        self.assertTrue(self.lancelot.has_sword)
+        self.assertTrue(self.guinevere.alive)
+
+    def test_macro(self):
+        """Macros keep the effects and costs of the steps before a failure."""
+        macro = make_macro([(StealSword, {'victim': 'owner'}), Kill])
+        actions_sequence = [
+            (self.arthur, macro,
+             {'owner': self.lancelot, 'victim': self.guinevere}),
+        ]
+        evaluation = rollout_plan(
+            actions_sequence, self.goal, number_of_samples=20000,
+            rng=random.Random(1))
+        self.assertAlmostEqual(evaluation.success_probability, 0.1, 2)
+        self.assertAlmostEqual(evaluation.expected_cost, 1.2, 1)
+        goal = Goal('armed', condition=HasSword(self.arthur), value=True)
+        evaluation = rollout_plan(
+            actions_sequence, goal, number_of_samples=20000,
+            rng=random.Random(1))
+        self.assertAlmostEqual(evaluation.success_probability, 0.2, 2)
+
+    def test_certain_plan(self):
+        actions_sequence = [
+            (self.arthur, AskForSword, {'friend': self.lancelot}),
+        ]
+        goal = Goal('armed', condition=HasSword(self.arthur), value=True)
+        evaluation = rollout_plan(actions_sequence, goal)
+        self.assertEqual(evaluation.success_probability, 1.0)
+        self.assertEqual(evaluation.expected_cost, 3.0)
+
+    def test_no_samples(self):
+        self.assertRaises(
+            ValueError, rollout_plan, [], self.goal, number_of_samples=0)
+
+    def test_cost_per_success(self):
+        self.assertEqual(PlanEvaluation(0.5, 2.0).cost_per_success, 4.0)
+        self.assertEqual(
+            PlanEvaluation(0.0, 2.0).cost_per_success, float('inf'))
+
+
+class TestSelectRobustPlan(unittest.TestCase):
+    def setUp(self):
+        self.arthur = Agent('Arthur')
+        self.lancelot = Agent('Lancelot')
+        self.lancelot.has_sword = True
+        self.objects = [self.arthur, self.lancelot]
+        self.goal = Goal('armed', condition=HasSword(self.arthur), value=True)
+        self.actions = [StealSword, AskForSword]
+
+    def test_success_objective(self):
+        actions_sequence, evaluation = select_robust_plan(
+            actor=self.arthur, goal=self.goal,
+            available_actions=self.actions, objects=self.objects, seed=1)
+        self.assertEqual(
+            actions_sequence,
+            [(self.arthur, AskForSword, {'friend': self.lancelot})]
+        )
+        self.assertEqual(evaluation.success_probability, 1.0)
+
+    def test_cost_objective(self):
+        """Stealing costs 1 / 0.2 = 5 per success, asking costs 3."""
+        actions_sequence, evaluation = select_robust_plan(
+            actor=self.arthur, goal=self.goal,
+            available_actions=self.actions, objects=self.objects,
+            objective='cost', seed=1)
+        self.assertEqual(actions_sequence[0][1], AskForSword)
+
+    def test_objectives_disagree(self):
+        """Grabbing costs 1 / 0.5 = 2 per success, asking costs 3, but
+        asking always succeeds.
+        """
+        actions = [GrabSword, AskForSword]
+        actions_sequence, evaluation = select_robust_plan(
+            actor=self.arthur, goal=self.goal, available_actions=actions,
+            objects=self.objects, seed=1)
+        self.assertEqual(actions_sequence[0][1], AskForSword)
+        actions_sequence, evaluation = select_robust_plan(
+            actor=self.arthur, goal=self.goal, available_actions=actions,
+            objects=self.objects, objective='cost', seed=1)
+        self.assertEqual(actions_sequence[0][1], GrabSword)
+        self.assertAlmostEqual(evaluation.cost_per_success, 2.0, 1)
+
+    def test_no_plan(self):
+        self.lancelot.has_sword = False
+        self.assertEqual(
+            select_robust_plan(
+                actor=self.arthur, goal=self.goal,
+                available_actions=self.actions, objects=self.objects),
+            (None, None)
+        )
+
+    def test_objective(self):
+        self.assertRaises(
+            ValueError, select_robust_plan, actor=self.arthur,
+            goal=self.goal, available_actions=self.actions,
+            objects=self.objects, objective='speed')
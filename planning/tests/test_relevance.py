@@ -0,0 +1,128 @@
+import unittest
+
+from planning.actions import Action
+from planning.agents import Agent
+from planning.conditions import AttributeCondition, Is
+from planning.goals import Goal
+from planning.plans import select_plan
+from planning.relevance import (
+    prune_search, relevant_actions, static_role_requirements)
+
+
+class HasSword(AttributeCondition):
+    name = 'has sword'
+    attribute = 'has_sword'
+
+
+class IsAlive(AttributeCondition):
+    name = 'is alive'
+    attribute = 'alive'
+
+
+class IsHungry(AttributeCondition):
+    name = 'is hungry'
+    attribute = 'is_hungry'
+
+
+class IsMortal(AttributeCondition):
+    name = 'is mortal'
+    attribute = 'mortal'
+
+
+class IsKnight(AttributeCondition):
+    name = 'is knight'
+    attribute = 'knight'
+
+
+class Kill(Action):
+    name = 'kill'
+    preconditions = [
+        (IsMortal, 'victim', True),
+        (IsAlive, 'victim', True),
+        (HasSword, 'actor', True)
+    ]
+    effects = [
+        (IsAlive, 'victim', False)
+    ]
+
+
+class StealSword(Action):
+    name = 'steal sword'
+    preconditions = [
+        (IsKnight, 'victim', True),
+        (HasSword, 'victim', True),
+        (HasSword, 'actor', False),
+        (Is, ('victim', 'actor'), False)
+    ]
+    effects = [
+        (HasSword, 'victim', False),
+        (HasSword, 'actor', True)
+    ]
+
+
+class Eat(Action):
+    name = 'eat'
+    preconditions = [
+        (IsHungry, 'actor', True)
+    ]
+    effects = [
+        (IsHungry, 'actor', False)
+    ]
+
+
+class TestRelevance(unittest.TestCase):
+    def setUp(self):
+        self.actions = [Eat, Kill, StealSword]
+        self.arthur = Agent('Arthur')
+        self.dragon = Agent('Dragon')
+        self.dragon.mortal = True
+        self.lancelot = Agent('Lancelot')
+        self.lancelot.has_sword = True
+        self.lancelot.knight = True
+        self.peasant = Agent('Peasant')
+        self.peasant.mortal = True
+        self.ghost = Agent('Ghost')
+        self.objects = [
+            self.arthur, self.dragon, self.lancelot, self.peasant, self.ghost]
+        self.goal = Goal(
+            'dragon dead', condition=IsAlive(self.dragon), value=False)
+
+    def test_relevant_actions(self):
+        self.assertEqual(
+            relevant_actions(IsAlive, False, self.actions),
+            [Kill, StealSword]
+        )
+        self.assertEqual(relevant_actions(IsAlive, True, self.actions), [])
+
+    def test_static_role_requirements(self):
+        self.assertEqual(
+            static_role_requirements([Kill, StealSword]),
+            {
+                Kill: {'victim': [(IsMortal, True)]},
+                StealSword: {'victim': [(IsKnight, True)]},
+            }
+        )
+
+    def test_prune_search(self):
+        actions, objects = prune_search(
+            actor=self.arthur, goal=self.goal,
+            available_actions=self.actions, objects=self.objects)
+        self.assertEqual(actions, [Kill, StealSword])
+        self.assertEqual(
+            objects, [self.arthur, self.dragon, self.lancelot, self.peasant])
+
+    def test_no_inputs(self):
+        self.assertRaises(ValueError, prune_search)
+
+    def test_select_plan(self):
+        actions_sequence = select_plan(
+            actor=self.arthur, goal=self.goal,
+            available_actions=self.actions, objects=self.objects,
+            prune_irrelevant=True)
+        self.assertEqual(
+            actions_sequence,
+            [
+                (self.arthur, StealSword, {'victim': self.lancelot}),
+                (self.arthur, Kill, {'victim': self.dragon}),
+            ]
+        )
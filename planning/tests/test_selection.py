@@ -0,0 +1,156 @@
+import unittest
+
+from planning.actions import Action
+from planning.agents import TrackedAgent
+from planning.conditions import AttributeCondition, Is
+from planning.goals import Goal
+from planning.selection import GoalSelector, estimate_plan_cost
+from planning.tracking import ChangeTracker
+
+
+class HasSword(AttributeCondition):
+    name = 'has sword'
+    attribute = 'has_sword'
+
+
+class IsAlive(AttributeCondition):
+    name = 'is alive'
+    attribute = 'alive'
+
+
+class IsHungry(AttributeCondition):
+    name = 'is hungry'
+    attribute = 'is_hungry'
+
+
+class Kill(Action):
+    name = 'kill'
+    preconditions = [
+        (IsAlive, 'victim', True),
+        (HasSword, 'actor', True)
+    ]
+    effects = [
+        (IsAlive, 'victim', False)
+    ]
+
+
+class StealSword(Action):
+    name = 'steal sword'
+    preconditions = [
+        (HasSword, 'victim', True),
+        (HasSword, 'actor', False),
+        (Is, ('victim', 'actor'), False)
+    ]
+    effects = [
+        (HasSword, 'victim', False),
+        (HasSword, 'actor', True)
+    ]
+
+
+class Forge(Action):
+    name = 'forge'
+    preconditions = [
+        (IsHungry, 'actor', True),
+    ]
+    effects = [
+        (HasSword, 'actor', True)
+    ]
+
+
+class TestEstimatePlanCost(unittest.TestCase):
+    def setUp(self):
+        self.arthur = TrackedAgent('Arthur')
+        self.lancelot = TrackedAgent('Lancelot')
+        self.lancelot.has_sword = True
+        self.actions = [Kill, StealSword]
+
+    def test_satisfied(self):
+        goal = Goal('alive', condition=IsAlive(self.arthur), value=True)
+        cost = estimate_plan_cost(self.arthur, goal, self.actions)
+        self.assertEqual(cost, 0)
+
+    def test_unarmed(self):
+        goal = Goal('kill', condition=IsAlive(self.lancelot), value=False)
+        cost = estimate_plan_cost(self.arthur, goal, self.actions)
+        self.assertEqual(cost, 2)
+
+    def test_armed(self):
+        self.arthur.has_sword = True
+        goal = Goal('kill', condition=IsAlive(self.lancelot), value=False)
+        cost = estimate_plan_cost(self.arthur, goal, self.actions)
+        self.assertEqual(cost, 1)
+
+    def test_no_achiever(self):
+        goal = Goal('hungry', condition=IsHungry(self.arthur), value=True)
+        self.assertIsNone(
+            estimate_plan_cost(self.arthur, goal, self.actions))
+
+    def test_unachievable_precondition(self):
+        """No action makes the actor hungry enough to forge a sword."""
+        goal = Goal('sword', condition=HasSword(self.arthur), value=True)
+        self.assertIsNone(estimate_plan_cost(self.arthur, goal, [Forge]))
+        self.arthur.is_hungry = True
+        self.assertEqual(estimate_plan_cost(self.arthur, goal, [Forge]), 1)
+
+
+class TestGoalSelector(unittest.TestCase):
+    def setUp(self):
+        self.tracker = ChangeTracker()
+        self.arthur = TrackedAgent('Arthur', tracker=self.tracker)
+        self.lancelot = TrackedAgent('Lancelot', tracker=self.tracker)
+        self.lancelot.has_sword = True
+        self.guinevere = TrackedAgent('Guinevere', tracker=self.tracker)
+        self.objects = [self.arthur, self.lancelot, self.guinevere]
+        self.selector = GoalSelector(
+            available_actions=[Kill, StealSword], objects=self.objects,
+            tracker=self.tracker)
+        self.sword_goal = Goal(
+            'sword', condition=HasSword(self.arthur), value=True)
+        self.kill_goal = Goal(
+            'kill', condition=IsAlive(self.guinevere), value=False,
+            utility=3.0)
+        self.hungry_goal = Goal(
+            'hungry', condition=IsHungry(self.arthur), value=True,
+            utility=10.0)
+        self.tracker.clear()
+
+    def test_no_inputs(self):
+        self.assertRaises(ValueError, GoalSelector)
+
+    def test_score(self):
+        self.assertEqual(self.selector.score(self.arthur, self.kill_goal), 1.0)
+        self.assertEqual(
+            self.selector.score(self.arthur, self.sword_goal), 0.0)
+        self.assertIsNone(self.selector.score(self.arthur, self.hungry_goal))
+
+    def test_select_goal(self):
+        goals = [self.sword_goal, self.kill_goal, self.hungry_goal]
+        self.assertIs(
+            self.selector.select_goal(self.arthur, goals), self.kill_goal)
+        self.assertIsNone(
+            self.selector.select_goal(self.arthur, [self.hungry_goal]))
+
+    def test_select_plan(self):
+        goal, actions_sequence = self.selector.select_plan(
+            self.arthur, [self.hungry_goal, self.kill_goal])
+        self.assertIs(goal, self.kill_goal)
+        self.assertEqual(
+            actions_sequence,
+            [
+                (self.arthur, StealSword, {'victim': self.lancelot}),
+                (self.arthur, Kill, {'victim': self.guinevere}),
+            ]
+        )
+
+    def test_cached_until_invalidated(self):
+        self.assertEqual(self.selector.score(self.arthur, self.kill_goal), 1.0)
+        self.arthur.has_sword = True
+        self.assertEqual(self.selector.score(self.arthur, self.kill_goal), 1.0)
+        self.selector.invalidate()
+        self.assertEqual(self.selector.score(self.arthur, self.kill_goal), 2.0)
+
+    def test_invalidate_keeps_unaffected(self):
+        self.selector.score(self.arthur, self.kill_goal)
+        self.guinevere.is_hungry = True
+        self.selector.invalidate()
+        self.assertEqual(len(self.selector._estimates), 1)
@@ -0,0 +1,173 @@
+import threading
+import time
+import unittest
+
+from planning.actions import Action
+from planning.agents import Agent
+from planning.conditions import AttributeCondition
+from planning.goals import Goal
+from planning.plans import PlanningDepthException
+from planning.service import (
+    BACKGROUND_PRIORITY, DeadlineExceeded, PlanFuture, PlanningService,
+    PlanningServiceStopped, URGENT_PRIORITY)
+
+
+class HasSword(AttributeCondition):
+    name = 'has sword'
+    attribute = 'has_sword'
+
+
+class IsAlive(AttributeCondition):
+    name = 'is alive'
+    attribute = 'alive'
+
+
+class Kill(Action):
+    name = 'kill'
+    preconditions = [
+        (IsAlive, 'victim', True),
+        (HasSword, 'actor', True)
+    ]
+    effects = [
+        (IsAlive, 'victim', False)
+    ]
+
+
+class RecordingPlanner(object):
+    """Records the goals it plans for."""
+    def __init__(self):
+        self.goals = []
+
+    def __call__(self, actor=None, goal=None, **kwargs):
+        self.goals.append(goal)
+        return [goal.name]
+
+
+class TestPlanFuture(unittest.TestCase):
+    def test_result(self):
+        future = PlanFuture()
+        self.assertFalse(future.done())
+        future.set_result(['plan'])
+        self.assertTrue(future.done())
+        self.assertEqual(future.result(), ['plan'])
+
+    def test_exception(self):
+        future = PlanFuture()
+        future.set_exception(PlanningDepthException())
+        self.assertRaises(PlanningDepthException, future.result)
+
+    def test_timeout(self):
+        self.assertRaises(DeadlineExceeded, PlanFuture().result, 0.01)
+
+    def test_callbacks(self):
+        future = PlanFuture()
+        called = []
+        future.add_done_callback(called.append)
+        future.set_result([])
+        future.add_done_callback(called.append)
+        self.assertEqual(called, [future, future])
+
+
+class TestPlanningService(unittest.TestCase):
+    def setUp(self):
+        self.knight = Agent('Knight')
+        self.knight.has_sword = True
+        self.dragon = Agent('Dragon')
+        self.troll = Agent('Troll')
+        self.objects = [self.knight, self.dragon, self.troll]
+        self.dragon_goal = Goal(
+            'dragon dead', condition=IsAlive(self.dragon), value=False)
+        self.troll_goal = Goal(
+            'troll dead', condition=IsAlive(self.troll), value=False)
+
+    def test_no_inputs(self):
+        self.assertRaises(ValueError, PlanningService)
+
+    def test_plan(self):
+        service = PlanningService(
+            available_actions=[Kill], objects=self.objects)
+        service.start()
+        try:
+            future = service.submit(actor=self.knight, goal=self.dragon_goal)
+            self.assertEqual(
+                future.result(timeout=5),
+                [(self.knight, Kill, {'victim': self.dragon})]
+            )
+        finally:
+            service.stop()
+
+    def test_failure(self):
+        self.knight.has_sword = False
+        service = PlanningService(
+            available_actions=[Kill], objects=self.objects)
+        service.start()
+        try:
+            future = service.submit(actor=self.knight, goal=self.dragon_goal)
+            self.assertIsInstance(
+                future.exception(timeout=5), PlanningDepthException)
+        finally:
+            service.stop()
+
+    def test_priority_and_merging(self):
+        planner = RecordingPlanner()
+        service = PlanningService(
+            available_actions=[Kill], objects=self.objects,
+            number_of_workers=1, planner=planner)
+        background = service.submit(
+            actor=self.knight, goal=self.troll_goal,
+            priority=BACKGROUND_PRIORITY)
+        first = service.submit(actor=self.knight, goal=self.dragon_goal)
+        second = service.submit(
+            actor=self.knight, goal=self.dragon_goal,
+            priority=URGENT_PRIORITY)
+        self.assertIs(first, second)
+        service.start()
+        try:
+            self.assertEqual(background.result(timeout=5), ['troll dead'])
+            self.assertEqual(first.result(timeout=5), ['dragon dead'])
+        finally:
+            service.stop()
+        self.assertEqual(planner.goals, [self.dragon_goal, self.troll_goal])
+
+    def test_deadline(self):
+        service = PlanningService(
+            available_actions=[Kill], objects=self.objects)
+        future = service.submit(
+            actor=self.knight, goal=self.dragon_goal,
+            deadline=time.time() - 1)
+        service.start()
+        try:
+            self.assertIsInstance(
+                future.exception(timeout=5), DeadlineExceeded)
+        finally:
+            service.stop()
+
+    def test_stop(self):
+        service = PlanningService(
+            available_actions=[Kill], objects=self.objects)
+        future = service.submit(actor=self.knight, goal=self.dragon_goal)
+        service.start()
+        service.stop()
+        self.assertTrue(future.done())
+        self.assertRaises(
+            PlanningServiceStopped, service.submit, actor=self.knight,
+            goal=self.dragon_goal)
+
+    def test_callback_thread(self):
+        service = PlanningService(
+            available_actions=[Kill], objects=self.objects)
+        threads = []
+        done = threading.Event()
+
+        def callback(future):
+            threads.append(threading.current_thread())
+            done.set()
+
+        service.start()
+        try:
+            future = service.submit(actor=self.knight, goal=self.dragon_goal)
+            future.add_done_callback(callback)
+            self.assertTrue(done.wait(5))
+        finally:
+            service.stop()
+        self.assertEqual(len(threads), 1)
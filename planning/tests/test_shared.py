@@ -0,0 +1,267 @@
+from multiprocessing import Pool
+import os
+import shutil
+import tempfile
+import unittest
+
+from planning.actions import Action
+from planning.agents import Agent
+from planning.conditions import AttributeCondition, Condition, Is
+from planning.goals import Goal
+from planning.plans import select_plan
+from planning import shared
+from planning.shared import (
+    ObjectProxy, ObjectRegistry, SharedSnapshot, SharedWorldSnapshot,
+    condition_name, proxy_registry, publish_snapshot, shared_snapshot_path)
+from planning.validation import validate_plan
+
+
+class HasSword(AttributeCondition):
+    name = 'has sword'
+    attribute = 'has_sword'
+
+
+class Likes(Condition):
+    name = 'likes'
+    number_of_objects = 2
+
+    def evaluate(self):
+        return getattr(self.objects[0], 'likes', None) is self.objects[1]
+
+
+class Between(Condition):
+    name = 'between'
+    number_of_objects = 3
+
+    def evaluate(self):
+        return False
+
+
+class StealSword(Action):
+    name = 'steal sword'
+    preconditions = [
+        (HasSword, 'victim', True),
+        (HasSword, 'actor', False),
+        (Is, ('victim', 'actor'), False)
+    ]
+    effects = [
+        (HasSword, 'victim', False),
+        (HasSword, 'actor', True)
+    ]
+
+
+def _read_value(path, condition, object_ids):
+    with SharedSnapshot(path) as snapshot:
+        return snapshot.value(condition, object_ids)
+
+
+def _validate(path, actions_sequence):
+    with SharedSnapshot(path) as snapshot:
+        registry = proxy_registry(snapshot.number_of_objects)
+        state = SharedWorldSnapshot(snapshot, registry)
+        return validate_plan(actions_sequence, state=state).is_valid
+
+
+def _plan(path, actor_id):
+    with SharedSnapshot(path) as snapshot:
+        registry = proxy_registry(snapshot.number_of_objects)
+        state = SharedWorldSnapshot(snapshot, registry)
+        actor = registry.object(actor_id)
+        goal = Goal('armed', HasSword([actor]), True)
+        return select_plan(
+            actor=actor, goal=goal, available_actions=[StealSword],
+            objects=registry.objects(), state=state)
+
+
+class TestObjectRegistry(unittest.TestCase):
+    def test_register(self):
+        arthur = Agent('Arthur')
+        lancelot = Agent('Lancelot')
+        registry = ObjectRegistry([arthur])
+        self.assertEqual(registry.register(lancelot), 1)
+        self.assertEqual(registry.register(arthur), 0)
+        self.assertEqual(registry.id(lancelot), 1)
+        self.assertIs(registry.object(0), arthur)
+        self.assertEqual(len(registry), 2)
+
+    def test_proxy_steps(self):
+        arthur = Agent('Arthur')
+        lancelot = Agent('Lancelot')
+        registry = ObjectRegistry([arthur, lancelot])
+        steps = [(arthur, StealSword, {'victim': lancelot})]
+        proxied_steps = registry.proxy_steps(steps)
+        self.assertEqual(
+            proxied_steps,
+            [(ObjectProxy(0), StealSword, {'victim': ObjectProxy(1)})])
+        self.assertEqual(registry.resolve_steps(proxied_steps), steps)
+
+    def test_proxy_registry(self):
+        registry = proxy_registry(2)
+        self.assertEqual(registry.objects(), [ObjectProxy(0), ObjectProxy(1)])
+        self.assertEqual(registry.id(ObjectProxy(1)), 1)
+        self.assertNotEqual(ObjectProxy(0), ObjectProxy(1))
+
+
+class TestSharedSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'world.snapshot')
+        self.arthur = Agent('Arthur')
+        self.lancelot = Agent('Lancelot')
+        self.lancelot.has_sword = True
+        self.registry = ObjectRegistry([self.arthur, self.lancelot])
+        self.conditions = [HasSword, Is]
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_value(self):
+        publish_snapshot(self.path, self.conditions, self.registry, tick=7)
+        with SharedSnapshot(self.path) as snapshot:
+            self.assertEqual(snapshot.tick, 7)
+            self.assertEqual(snapshot.number_of_objects, 2)
+            self.assertFalse(snapshot.value(HasSword, (0,)))
+            self.assertTrue(snapshot.value(HasSword, (1,)))
+            self.assertTrue(snapshot.value(Is, (1, 1)))
+            self.assertFalse(snapshot.value(Is, (0, 1)))
+            self.assertTrue(snapshot.value(condition_name(Is), (0, 0)))
+
+    def test_binary_condition_in_chunks(self):
+        guinevere = Agent('Guinevere')
+        self.registry.register(guinevere)
+        self.arthur.likes = guinevere
+        guinevere.likes = guinevere
+        chunk_size = shared.PUBLISH_CHUNK_SIZE
+        shared.PUBLISH_CHUNK_SIZE = 2
+        try:
+            publish_snapshot(self.path, [Likes], self.registry)
+        finally:
+            shared.PUBLISH_CHUNK_SIZE = chunk_size
+        with SharedSnapshot(self.path) as snapshot:
+            liked = [
+                (first, second)
+                for first in xrange(3) for second in xrange(3)
+                if snapshot.value(Likes, (first, second))
+            ]
+        self.assertEqual(liked, [(0, 2), (2, 2)])
+
+    def test_conditions(self):
+        publish_snapshot(self.path, self.conditions, self.registry)
+        with SharedSnapshot(self.path) as snapshot:
+            self.assertEqual(
+                snapshot.conditions(),
+                [condition_name(HasSword)]
+            )
+
+    def test_republish(self):
+        """Readers keep the snapshot they opened."""
+        publish_snapshot(self.path, self.conditions, self.registry, tick=1)
+        with SharedSnapshot(self.path) as old_snapshot:
+            self.arthur.has_sword = True
+            publish_snapshot(
+                self.path, self.conditions, self.registry, tick=2)
+            with SharedSnapshot(self.path) as new_snapshot:
+                self.assertEqual(new_snapshot.tick, 2)
+                self.assertTrue(new_snapshot.value(HasSword, (0,)))
+            self.assertEqual(old_snapshot.tick, 1)
+            self.assertFalse(old_snapshot.value(HasSword, (0,)))
+
+    def test_other_process(self):
+        publish_snapshot(self.path, self.conditions, self.registry)
+        pool = Pool(1)
+        try:
+            value = pool.apply(
+                _read_value, (self.path, condition_name(HasSword), (1,)))
+        finally:
+            pool.close()
+            pool.join()
+        self.assertTrue(value)
+
+    def test_bad_lookups(self):
+        publish_snapshot(self.path, self.conditions, self.registry)
+        with SharedSnapshot(self.path) as snapshot:
+            self.assertRaises(ValueError, snapshot.value, Is, (0,))
+            self.assertRaises(ValueError, snapshot.value, HasSword, (2,))
+            self.assertRaises(KeyError, snapshot.value, Between, (0, 0, 0))
+
+    def test_too_many_objects(self):
+        self.assertRaises(
+            ValueError, publish_snapshot, self.path, [Between],
+            self.registry)
+
+    def test_not_a_snapshot(self):
+        with open(self.path, 'wb') as snapshot_file:
+            snapshot_file.write('\0' * 64)
+        self.assertRaises(ValueError, SharedSnapshot, self.path)
+
+    def test_shared_snapshot_path(self):
+        self.assertTrue(
+            shared_snapshot_path('world').endswith(
+                'simpleplanning-world.snapshot'))
+
+
+class TestSharedWorldSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, 'world.snapshot')
+        self.arthur = Agent('Arthur')
+        self.lancelot = Agent('Lancelot')
+        self.lancelot.has_sword = True
+        self.registry = ObjectRegistry([self.arthur, self.lancelot])
+        publish_snapshot(self.path, [HasSword, Is], self.registry)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_value(self):
+        with SharedSnapshot(self.path) as snapshot:
+            state = SharedWorldSnapshot(snapshot, self.registry)
+            # Published values are read even after the world changes
+            self.lancelot.has_sword = False
+            self.assertTrue(state.value((HasSword, (self.lancelot,))))
+            self.assertFalse(state.value((Is, (self.arthur, self.lancelot))))
+            self.assertTrue(StealSword.preconditions_met(
+                state, actor=self.arthur, victim=self.lancelot))
+            self.assertRaises(
+                KeyError, state.value, (Likes, (self.arthur, self.arthur)))
+
+    def test_copy(self):
+        with SharedSnapshot(self.path) as snapshot:
+            state = SharedWorldSnapshot(snapshot, self.registry)
+            next_state = state.copy()
+            next_state.apply({(HasSword, (self.arthur,)): True})
+            self.assertTrue(next_state.value((HasSword, (self.arthur,))))
+            self.assertFalse(state.value((HasSword, (self.arthur,))))
+
+    def test_validate_in_other_process(self):
+        """Workers validate plans about proxies of the objects."""
+        plan = self.registry.proxy_steps(
+            [(self.arthur, StealSword, {'victim': self.lancelot})])
+        repeated_plan = plan * 2
+        pool = Pool(1)
+        try:
+            results = [
+                pool.apply(_validate, (self.path, plan)),
+                pool.apply(_validate, (self.path, repeated_plan)),
+            ]
+        finally:
+            pool.close()
+            pool.join()
+        self.assertEqual(results, [True, False])
+
+    def test_plan_in_other_process(self):
+        """Workers search for plans in the snapshot, not the live world."""
+        self.lancelot.has_sword = False
+        pool = Pool(1)
+        try:
+            steps = pool.apply(
+                _plan, (self.path, self.registry.id(self.arthur)))
+        finally:
+            pool.close()
+            pool.join()
+        self.assertEqual(
+            self.registry.resolve_steps(steps),
+            [(self.arthur, StealSword, {'victim': self.lancelot})])
+
+    def test_no_inputs(self):
+        self.assertRaises(ValueError, SharedWorldSnapshot)
@@ -0,0 +1,54 @@
+import unittest
+
+from planning.agents import Agent
+from planning.conditions import AttributeCondition, Is
+from planning.snapshots import WorldSnapshot
+
+
+class HasSword(AttributeCondition):
+    name = 'has sword'
+    attribute = 'has_sword'
+
+
+class TestWorldSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.arthur = Agent('Arthur')
+        self.arthur.has_sword = True
+        self.lancelot = Agent('Lancelot')
+        self.objects = [self.arthur, self.lancelot]
+
+    def test_capture(self):
+        snapshot = WorldSnapshot.capture([HasSword], self.objects)
+        self.assertEqual(
+            snapshot.values(),
+            {
+                (HasSword, (self.arthur,)): True,
+                (HasSword, (self.lancelot,)): False,
+            }
+        )
+
+    def test_captured_values_do_not_follow_live_objects(self):
+        snapshot = WorldSnapshot.capture([HasSword], self.objects)
+        self.arthur.has_sword = False
+        self.assertTrue(snapshot.value((HasSword, (self.arthur,))))
+
+    def test_lazy_value(self):
+        snapshot = WorldSnapshot()
+        self.assertFalse(
+            snapshot.value((Is, (self.arthur, self.lancelot))))
+        self.assertEqual(
+            snapshot.values(), {(Is, (self.arthur, self.lancelot)): False})
+
+    def test_copy_on_write(self):
+        snapshot = WorldSnapshot.capture([HasSword], self.objects)
+        child = snapshot.copy()
+        child.apply({(HasSword, (self.lancelot,)): True})
+        self.assertTrue(child.value((HasSword, (self.lancelot,))))
+        self.assertTrue(child.value((HasSword, (self.arthur,))))
+        self.assertFalse(snapshot.value((HasSword, (self.lancelot,))))
+
+    def test_matches(self):
+        snapshot = WorldSnapshot.capture([HasSword], self.objects)
+        self.assertTrue(snapshot.matches({(HasSword, (self.arthur,)): True}))
+        self.assertFalse(
+            snapshot.matches({(HasSword, (self.lancelot,)): True}))
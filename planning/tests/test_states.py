@@ -0,0 +1,155 @@
+import unittest
+
+from planning.actions import Action
+from planning.agents import Agent
+from planning.conditions import Condition
+from planning.states import ConditionIndex, ConditionState
+
+
+class HasSword(Condition):
+    name = 'has sword'
+    number_of_objects = 1
+
+    def evaluate(self):
+        return getattr(self.objects[0], 'has_sword', False)
+
+
+class IsHappy(Condition):
+    name = 'is happy'
+    number_of_objects = 1
+
+    def evaluate(self):
+        return getattr(self.objects[0], 'happy', None)
+
+
+class StealSword(Action):
+    name = 'steal sword'
+    preconditions = [
+        (HasSword, 'victim', True),
+        (HasSword, 'actor', False)
+    ]
+    effects = [
+        (HasSword, 'victim', False),
+        (HasSword, 'actor', True)
+    ]
+
+
+class TestConditionIndex(unittest.TestCase):
+    def setUp(self):
+        self.arthur = Agent('Arthur')
+        self.lancelot = Agent('Lancelot')
+        self.index = ConditionIndex()
+
+    def test_intern(self):
+        arthur_id = self.index.intern((HasSword, (self.arthur,)))
+        lancelot_id = self.index.intern((HasSword, (self.lancelot,)))
+        self.assertEqual(arthur_id, 0)
+        self.assertEqual(lancelot_id, 1)
+        self.assertEqual(self.index.intern((HasSword, (self.arthur,))), 0)
+        self.assertEqual(len(self.index), 2)
+        self.assertEqual(
+            self.index.planning_tuple(1), (HasSword, (self.lancelot,)))
+
+    def test_encode(self):
+        conditions = {
+            (HasSword, (self.arthur,)): True,
+            (HasSword, (self.lancelot,)): False,
+        }
+        state = self.index.encode(conditions)
+        self.assertEqual(self.index.decode(state), conditions)
+        arthur_bit = 1 << self.index.intern((HasSword, (self.arthur,)))
+        lancelot_bit = 1 << self.index.intern((HasSword, (self.lancelot,)))
+        self.assertEqual(state, ConditionState(
+            arthur_bit | lancelot_bit, arthur_bit))
+
+    def test_cache_groundings(self):
+        index = ConditionIndex(cache_groundings=False)
+        effects = index.encode_effects(
+            self.arthur, StealSword, (self.lancelot,))
+        self.assertEqual(index.decode(effects), {
+            (HasSword, (self.lancelot,)): False,
+            (HasSword, (self.arthur,)): True,
+        })
+        index.encode_preconditions(self.arthur, StealSword, (self.lancelot,))
+        self.assertEqual(index._effects, {})
+        self.assertEqual(index._preconditions, {})
+
+    def test_encode_non_boolean(self):
+        self.assertRaises(
+            ValueError,
+            self.index.encode,
+            {(HasSword, (self.arthur,)): 'yes'}
+        )
+
+    def test_equal_conditions_hash_equal(self):
+        first = self.index.encode({(HasSword, (self.arthur,)): True})
+        second = self.index.encode({(HasSword, (self.arthur,)): True})
+        self.assertEqual(first, second)
+        self.assertEqual(len(set([first, second])), 1)
+
+    def test_encode_effects(self):
+        effects = self.index.encode_effects(
+            self.arthur, StealSword, (self.lancelot,))
+        self.assertEqual(self.index.decode(effects), {
+            (HasSword, (self.lancelot,)): False,
+            (HasSword, (self.arthur,)): True,
+        })
+        self.assertIs(
+            self.index.encode_effects(
+                self.arthur, StealSword, (self.lancelot,)),
+            effects
+        )
+
+    def test_encode_preconditions(self):
+        preconditions = self.index.encode_preconditions(
+            self.arthur, StealSword, (self.lancelot,))
+        self.assertEqual(self.index.decode(preconditions), {
+            (HasSword, (self.lancelot,)): True,
+            (HasSword, (self.arthur,)): False,
+        })
+
+    def test_holds(self):
+        self.lancelot.has_sword = True
+        state = self.index.encode({
+            (HasSword, (self.arthur,)): False,
+            (HasSword, (self.lancelot,)): True,
+        })
+        self.assertTrue(self.index.holds(state))
+        self.assertFalse(self.index.holds(
+            self.index.encode({(HasSword, (self.arthur,)): True})))
+        self.assertTrue(self.index.holds(ConditionState()))
+
+    def test_holds_non_boolean(self):
+        """Conditions evaluating to neither True nor False never hold."""
+        self.assertFalse(self.index.holds(
+            self.index.encode({(IsHappy, (self.arthur,)): True})))
+        self.assertFalse(self.index.holds(
+            self.index.encode({(IsHappy, (self.arthur,)): False})))
+
+
+class TestConditionState(unittest.TestCase):
+    def test_values_subset_of_known(self):
+        self.assertRaises(ValueError, ConditionState, 0b01, 0b10)
+
+    def test_contradicts(self):
+        first = ConditionState(0b11, 0b01)
+        second = ConditionState(0b01, 0b00)
+        self.assertTrue(first.contradicts(second))
+        self.assertFalse(first.consistent_with(second))
+
+    def test_consistent(self):
+        first = ConditionState(0b01, 0b01)
+        second = ConditionState(0b10, 0b00)
+        self.assertTrue(first.consistent_with(second))
+        self.assertFalse(first.overlaps(second))
+
+    def test_subsumes(self):
+        general = ConditionState(0b01, 0b01)
+        specific = ConditionState(0b11, 0b01)
+        self.assertTrue(general.subsumes(specific))
+        self.assertFalse(specific.subsumes(general))
+
+    def test_update(self):
+        state = ConditionState(0b011, 0b001)
+        updated = state.update(ConditionState(0b101, 0b100))
+        self.assertEqual(updated, ConditionState(0b111, 0b100))
@@ -0,0 +1,196 @@
+import unittest
+
+from planning.actions import Action
+from planning.agents import Agent
+from planning.conditions import AttributeCondition, Condition, Is
+from planning.goals import Goal
+from planning.plans import PossiblePlan, _create_initial_plan, select_plan
+from planning.snapshots import WorldSnapshot
+from planning.symmetry import SymmetryReducer, schema_conditions
+
+
+class HasSword(AttributeCondition):
+    name = 'has sword'
+    attribute = 'has_sword'
+
+
+class IsAlive(AttributeCondition):
+    name = 'is alive'
+    attribute = 'alive'
+
+
+class Kill(Action):
+    name = 'kill'
+    preconditions = [
+        (IsAlive, 'victim', True),
+        (HasSword, 'actor', True)
+    ]
+    effects = [
+        (IsAlive, 'victim', False)
+    ]
+
+
+class StealSword(Action):
+    name = 'steal sword'
+    preconditions = [
+        (HasSword, 'victim', True),
+        (HasSword, 'actor', False),
+        (Is, ('victim', 'actor'), False)
+    ]
+    effects = [
+        (HasSword, 'victim', False),
+        (HasSword, 'actor', True)
+    ]
+
+
+class Knows(Condition):
+    name = 'knows'
+    number_of_objects = 2
+
+    def evaluate(self):
+        return self.objects[1] in getattr(self.objects[0], 'known', [])
+
+
+class HasIntroduced(AttributeCondition):
+    name = 'has introduced'
+    attribute = 'has_introduced'
+    default = False
+
+
+class Introduce(Action):
+    name = 'introduce'
+    preconditions = [
+        (Knows, ('a', 'b'), True),
+        (HasIntroduced, 'actor', False)
+    ]
+    effects = [
+        (HasIntroduced, 'actor', True)
+    ]
+
+
+class CountingSnapshot(WorldSnapshot):
+    """A WorldSnapshot counting the conditions it evaluates, by class."""
+
+    def __init__(self):
+        super(CountingSnapshot, self).__init__()
+        self.evaluations = {}
+
+    def _evaluate(self, planning_tuple):
+        condition_class = planning_tuple[0]
+        self.evaluations[condition_class] = (
+            self.evaluations.get(condition_class, 0) + 1)
+        return super(CountingSnapshot, self)._evaluate(planning_tuple)
+
+
+class TestSymmetryReducer(unittest.TestCase):
+    def setUp(self):
+        self.arthur = Agent('Arthur')
+        self.lancelot = Agent('Lancelot')
+        self.lancelot.has_sword = True
+        self.guards = [Agent('Guard %d' % number) for number in range(20)]
+        self.objects = [self.arthur, self.lancelot] + self.guards
+        self.actions = [Kill, StealSword]
+
+    def test_schema_conditions(self):
+        self.assertEqual(
+            schema_conditions(self.actions), [IsAlive, HasSword, Is])
+
+    def test_reduce(self):
+        reducer = SymmetryReducer(
+            actor=self.arthur, available_actions=self.actions,
+            objects=self.objects)
+        possible_plan = PossiblePlan()
+        possible_plan.conditions = {(IsAlive, (self.guards[5],)): False}
+        self.assertEqual(
+            reducer.reduce(possible_plan),
+            [self.arthur, self.lancelot, self.guards[0], self.guards[5]]
+        )
+
+    def test_reduce_distinguishes_state(self):
+        self.guards[3].alive = False
+        reducer = SymmetryReducer(
+            actor=self.arthur, available_actions=self.actions,
+            objects=self.objects)
+        self.assertEqual(
+            reducer.reduce(PossiblePlan()),
+            [self.arthur, self.lancelot, self.guards[0], self.guards[3]]
+        )
+
+    def test_scaling(self):
+        """Each object is evaluated once, however many plans are reduced."""
+        crowd = [Agent('Peasant %d' % number) for number in range(1000)]
+        objects = self.objects + crowd
+        state = CountingSnapshot()
+        reducer = SymmetryReducer(
+            actor=self.arthur, available_actions=self.actions,
+            objects=objects, state=state)
+        for victim in crowd[:10]:
+            possible_plan = PossiblePlan()
+            possible_plan.conditions = {(IsAlive, (victim,)): False}
+            self.assertEqual(len(reducer.reduce(possible_plan)), 4)
+        self.assertEqual(
+            state.evaluations,
+            {IsAlive: len(objects), HasSword: len(objects)})
+
+    def test_binary_conditions_evaluated_once(self):
+        strangers = [Agent('Stranger %d' % number) for number in range(10)]
+        objects = [self.arthur] + strangers
+        state = CountingSnapshot()
+        reducer = SymmetryReducer(
+            actor=self.arthur, available_actions=[Introduce],
+            objects=objects, state=state)
+        reducer.reduce(PossiblePlan())
+        evaluations = state.evaluations[Knows]
+        self.assertEqual(evaluations, len(objects) ** 2)
+        for stranger in strangers:
+            possible_plan = PossiblePlan()
+            possible_plan.conditions = {(Knows, (stranger, stranger)): True}
+            reducer.reduce(possible_plan)
+        self.assertEqual(state.evaluations[Knows], evaluations)
+
+    def test_no_inputs(self):
+        self.assertRaises(ValueError, SymmetryReducer)
+
+    def test_select_plan(self):
+        goal = Goal(
+            'guard dead', condition=IsAlive(self.guards[7]), value=False)
+        reducer = SymmetryReducer(
+            actor=self.arthur, available_actions=self.actions,
+            objects=self.objects)
+        self.assertEqual(
+            len(reducer.reduce(_create_initial_plan(goal))), 4)
+        actions_sequence = select_plan(
+            actor=self.arthur, goal=goal, available_actions=self.actions,
+            objects=self.objects, reduce_symmetry=True)
+        self.assertEqual(
+            actions_sequence,
+            [
+                (self.arthur, StealSword, {'victim': self.lancelot}),
+                (self.arthur, Kill, {'victim': self.guards[7]}),
+            ]
+        )
+
+    def test_related_objects_not_collapsed(self):
+        """Objects related to each other are not interchangeable with
+        objects that are not.
+        """
+        strangers = [Agent('Stranger %d' % number) for number in range(4)]
+        strangers[2].known = [strangers[3]]
+        objects = [self.arthur] + strangers
+        goal = Goal(
+            'introduced', condition=HasIntroduced(self.arthur), value=True)
+        reducer = SymmetryReducer(
+            actor=self.arthur, available_actions=[Introduce],
+            objects=objects)
+        self.assertEqual(
+            reducer.reduce(_create_initial_plan(goal)),
+            [self.arthur] + strangers
+        )
+        actions_sequence = select_plan(
+            actor=self.arthur, goal=goal, available_actions=[Introduce],
+            objects=objects, reduce_symmetry=True)
+        self.assertEqual(
+            actions_sequence,
+            [(self.arthur, Introduce,
+              {'a': strangers[2], 'b': strangers[3]})]
+        )
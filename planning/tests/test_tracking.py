@@ -0,0 +1,130 @@
+import unittest
+
+from planning.actions import Action
+from planning.agents import Agent, TrackedAgent
+from planning.conditions import AttributeCondition, Is
+from planning.entities import EntityStore
+from planning.tracking import ChangeTracker, ConditionCache
+
+
+class HasSword(AttributeCondition):
+    name = 'has sword'
+    attribute = 'has_sword'
+
+
+class IsAlive(AttributeCondition):
+    name = 'is alive'
+    attribute = 'alive'
+
+
+class IsArmed(AttributeCondition):
+    name = 'is armed'
+    attribute = 'armed'
+
+
+class Kill(Action):
+    name = 'kill'
+    preconditions = [
+        (IsAlive, 'victim', True)
+    ]
+    effects = [
+        (IsAlive, 'victim', False)
+    ]
+
+    @classmethod
+    def apply_action(cls, actor=None, **objects):
+        victim = objects['victim']
+        victim.alive = False
+        victim.armed = False
+
+
+class TestChangeTracker(unittest.TestCase):
+    def setUp(self):
+        self.tracker = ChangeTracker()
+        self.knight = Agent('Knight')
+        self.dragon = Agent('Dragon')
+
+    def test_apply_action(self):
+        self.tracker.apply_action(Kill, actor=self.knight, victim=self.dragon)
+        self.assertFalse(self.dragon.alive)
+        self.assertTrue(self.tracker.is_dirty((IsAlive, (self.dragon,))))
+        self.assertFalse(self.tracker.is_dirty((IsAlive, (self.knight,))))
+
+    def test_apply_action_undeclared_attributes(self):
+        """Attributes the action writes beyond its effects are dirty."""
+        self.tracker.apply_action(Kill, actor=self.knight, victim=self.dragon)
+        self.assertTrue(self.tracker.is_dirty((IsArmed, (self.dragon,))))
+        self.assertTrue(self.tracker.is_dirty((HasSword, (self.dragon,))))
+        self.assertFalse(self.tracker.is_dirty((IsArmed, (self.knight,))))
+
+    def test_attribute_conditions(self):
+        self.tracker.record_attribute(self.dragon, 'has_sword')
+        self.assertTrue(self.tracker.is_dirty((HasSword, (self.dragon,))))
+        self.assertFalse(self.tracker.is_dirty((IsAlive, (self.dragon,))))
+
+    def test_other_conditions(self):
+        """Conditions that are not attribute-backed depend on any change."""
+        self.tracker.record_attribute(self.dragon, 'has_sword')
+        self.assertTrue(
+            self.tracker.is_dirty((Is, (self.knight, self.dragon))))
+        self.assertFalse(
+            self.tracker.is_dirty((Is, (self.knight, self.knight))))
+
+    def test_affects(self):
+        self.tracker.record_attribute(self.dragon, 'alive')
+        self.assertTrue(self.tracker.affects({
+            (HasSword, (self.knight,)): True,
+            (IsAlive, (self.dragon,)): True,
+        }))
+        self.assertFalse(self.tracker.affects({
+            (HasSword, (self.knight,)): True,
+        }))
+
+    def test_clear(self):
+        self.tracker.record_attribute(self.dragon, 'alive')
+        self.assertTrue(self.tracker)
+        self.tracker.clear()
+        self.assertFalse(self.tracker)
+        self.assertFalse(self.tracker.is_dirty((IsAlive, (self.dragon,))))
+
+    def test_tracked_agent(self):
+        dragon = TrackedAgent('Dragon', tracker=self.tracker)
+        self.assertFalse(self.tracker)
+        dragon.has_sword = True
+        self.assertTrue(self.tracker.is_dirty((HasSword, (dragon,))))
+        self.assertFalse(self.tracker.is_dirty((IsAlive, (dragon,))))
+
+    def test_entity_store(self):
+        store = EntityStore(tracker=self.tracker)
+        store.add_column('alive', bool, True)
+        dragon = store.create('Dragon')
+        dragon.alive = False
+        self.assertTrue(self.tracker.is_dirty((IsAlive, (dragon,))))
+
+
+class TestConditionCache(unittest.TestCase):
+    def test_invalidate(self):
+        tracker = ChangeTracker()
+        knight = TrackedAgent('Knight', tracker=tracker)
+        dragon = TrackedAgent('Dragon', tracker=tracker)
+        cache = ConditionCache()
+        self.assertTrue(cache.value((IsAlive, (dragon,))))
+        self.assertTrue(cache.value((IsAlive, (knight,))))
+
+        dragon.alive = False
+        # Stale until invalidated
+        self.assertTrue(cache.value((IsAlive, (dragon,))))
+        cache.invalidate(tracker)
+        self.assertEqual(len(cache), 1)
+        self.assertFalse(cache.value((IsAlive, (dragon,))))
+
+    def test_invalidate_after_action(self):
+        tracker = ChangeTracker()
+        knight = Agent('Knight')
+        dragon = Agent('Dragon')
+        dragon.armed = True
+        cache = ConditionCache()
+        self.assertTrue(cache.value((IsArmed, (dragon,))))
+        tracker.apply_action(Kill, actor=knight, victim=dragon)
+        cache.invalidate(tracker)
+        self.assertFalse(cache.value((IsArmed, (dragon,))))
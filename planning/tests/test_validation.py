@@ -0,0 +1,116 @@
+import unittest
+
+from planning.actions import Action
+from planning.agents import Agent
+from planning.conditions import AttributeCondition, Is
+from planning.goals import Goal
+from planning.snapshots import WorldSnapshot
+from planning.validation import simulate_steps, validate_plan, validate_plans
+
+
+class HasSword(AttributeCondition):
+    name = 'has sword'
+    attribute = 'has_sword'
+
+
+class IsAlive(AttributeCondition):
+    name = 'is alive'
+    attribute = 'alive'
+
+
+class CountingIsAlive(IsAlive):
+    """Counts how often it is evaluated on the live objects."""
+    evaluations = 0
+
+    def evaluate(self):
+        CountingIsAlive.evaluations += 1
+        return super(CountingIsAlive, self).evaluate()
+
+
+class Kill(Action):
+    name = 'kill'
+    preconditions = [
+        (CountingIsAlive, 'victim', True),
+        (HasSword, 'actor', True)
+    ]
+    effects = [
+        (CountingIsAlive, 'victim', False)
+    ]
+
+
+class StealSword(Action):
+    name = 'steal sword'
+    preconditions = [
+        (HasSword, 'victim', True),
+        (HasSword, 'actor', False),
+        (Is, ('victim', 'actor'), False)
+    ]
+    effects = [
+        (HasSword, 'victim', False),
+        (HasSword, 'actor', True)
+    ]
+
+
+class TestValidatePlan(unittest.TestCase):
+    def setUp(self):
+        self.arthur = Agent('Arthur')
+        self.lancelot = Agent('Lancelot')
+        self.lancelot.has_sword = True
+        self.guinevere = Agent('Guinevere')
+        self.plan = [
+            (self.arthur, StealSword, {'victim': self.lancelot}),
+            (self.arthur, Kill, {'victim': self.guinevere}),
+        ]
+
+    def test_valid(self):
+        result = validate_plan(self.plan)
+        self.assertTrue(result)
+        self.assertIsNone(result.failed_step)
+        goal = Goal(
+            'kill', condition=CountingIsAlive(self.guinevere), value=False)
+        self.assertTrue(result.satisfies(goal))
+        # The world itself is untouched
+        self.assertTrue(self.guinevere.alive)
+        self.assertFalse(getattr(self.arthur, 'has_sword', False))
+
+    def test_later_step_sees_earlier_effects(self):
+        """Killing twice fails on the second kill."""
+        plan = self.plan + [
+            (self.arthur, Kill, {'victim': self.guinevere})]
+        result = validate_plan(plan)
+        self.assertFalse(result)
+        self.assertEqual(result.failed_step, 2)
+
+    def test_first_step_fails(self):
+        self.lancelot.has_sword = False
+        self.assertEqual(validate_plan(self.plan).failed_step, 0)
+
+    def test_state(self):
+        state = WorldSnapshot()
+        state.apply({(HasSword, (self.lancelot,)): False})
+        self.assertEqual(validate_plan(self.plan, state=state).failed_step, 0)
+
+    def test_validate_plans(self):
+        other_plan = self.plan[:1] + [
+            (self.arthur, Kill, {'victim': self.lancelot})]
+        CountingIsAlive.evaluations = 0
+        results = validate_plans([self.plan, other_plan, self.plan[1:]])
+        self.assertEqual(
+            [result.failed_step for result in results], [None, None, 0])
+        self.assertEqual(CountingIsAlive.evaluations, 2)
+
+
+class TestSimulateSteps(unittest.TestCase):
+    def test_simulate_steps(self):
+        arthur = Agent('Arthur')
+        lancelot = Agent('Lancelot')
+        lancelot.has_sword = True
+        state = WorldSnapshot()
+        steps = [
+            (arthur, StealSword, {'victim': lancelot}),
+            (arthur, Kill, {'victim': lancelot}),
+        ]
+        end_state = simulate_steps(steps, state)
+        self.assertFalse(end_state.value((CountingIsAlive, (lancelot,))))
+        self.assertTrue(lancelot.alive)
+        self.assertIsNone(simulate_steps(list(reversed(steps)), state))
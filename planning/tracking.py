@@ -0,0 +1,106 @@
+from planning.conditions import AttributeCondition
+
+
+class ChangeTracker(object):
+    """Records what has changed in the world since the last clear().
+
+    Changes are recorded either as ground conditions, for actions applied
+    through apply_action(), or as (object, attribute) pairs, for direct
+    attribute writes on tracked objects. is_dirty() maps both onto ground
+    conditions, so caches can drop only the values that may be stale.
+    Actions can write more than their effects declare, so every condition
+    on an object of a recorded condition counts as changed.
+    """
+
+    def __init__(self):
+        self._conditions = set()
+        self._attributes = set()
+        self._objects = set()
+        # Objects of recorded conditions, whose attributes are unknown
+        self._condition_objects = set()
+
+    def __repr__(self):
+        return "<ChangeTracker. Conditions: %s, Attributes: %s>" % (
+            self._conditions, self._attributes)
+
+    def __nonzero__(self):
+        return bool(self._conditions or self._objects)
+
+    def record_condition(self, planning_tuple):
+        """Record that a ground condition may have changed."""
+        self._conditions.add(planning_tuple)
+        condition_class, objects_tuple = planning_tuple
+        self._objects.update(objects_tuple)
+        self._condition_objects.update(objects_tuple)
+
+    def record_attribute(self, obj, attribute):
+        """Record that an attribute of an object has been written."""
+        self._attributes.add((obj, attribute))
+        self._objects.add(obj)
+
+    def apply_action(self, action, actor=None, **objects):
+        """Apply an action and record the conditions it changes."""
+        effects = action.calculate_effects(actor=actor, **objects)
+        action.apply_action(actor=actor, **objects)
+        for planning_tuple in effects:
+            self.record_condition(planning_tuple)
+
+    def is_dirty(self, planning_tuple):
+        """Check if a ground condition may have changed.
+
+        Attribute conditions are dirty when their own attribute was
+        written, or when their object is in a recorded condition. Other
+        conditions can read anything from their objects, so they are dirty
+        when any of their objects has changed.
+        """
+        if planning_tuple in self._conditions:
+            return True
+        condition_class, objects_tuple = planning_tuple
+        if issubclass(condition_class, AttributeCondition):
+            obj = objects_tuple[0]
+            return (
+                obj in self._condition_objects or
+                (obj, condition_class.attribute) in self._attributes
+            )
+        return any(obj in self._objects for obj in objects_tuple)
+
+    def affects(self, planning_tuples):
+        """Check if any of the ground conditions may have changed."""
+        return any(
+            self.is_dirty(planning_tuple) for planning_tuple in planning_tuples
+        )
+
+    def clear(self):
+        """Forget every recorded change."""
+        self._conditions.clear()
+        self._attributes.clear()
+        self._objects.clear()
+        self._condition_objects.clear()
+
+
+class ConditionCache(object):
+    """Memoizes the values of ground conditions between changes."""
+
+    def __init__(self):
+        self._values = {}
+
+    def __len__(self):
+        return len(self._values)
+
+    def value(self, planning_tuple):
+        """Return the value of a ground condition, evaluating if needed."""
+        try:
+            return self._values[planning_tuple]
+        except KeyError:
+            condition_class, objects_tuple = planning_tuple
+            value = condition_class(list(objects_tuple)).evaluate()
+            self._values[planning_tuple] = value
+            return value
+
+    def invalidate(self, tracker):
+        """Drop the values of conditions the tracker marks as dirty."""
+        if not tracker:
+            return
+        for planning_tuple in self._values.keys():
+            if tracker.is_dirty(planning_tuple):
+                del self._values[planning_tuple]
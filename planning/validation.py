@@ -0,0 +1,113 @@
+from planning.snapshots import WorldSnapshot
+
+
+class ValidationResult(object):
+    """The outcome of simulating a plan.
+
+    failed_step is the index of the first step whose preconditions are not
+    met, or None if every step can be performed. state is the simulated
+    state after the last step that could be performed.
+    """
+
+    def __init__(self, failed_step, state):
+        self.failed_step = failed_step
+        self.state = state
+
+    def __repr__(self):
+        if self.failed_step is None:
+            return "<ValidationResult: valid>"
+        return "<ValidationResult: step %d fails>" % self.failed_step
+
+    def __nonzero__(self):
+        return self.is_valid
+
+    @property
+    def is_valid(self):
+        return self.failed_step is None
+
+    def satisfies(self, goal):
+        """Check if the goal holds after the plan."""
+        planning_tuple = goal.goal_condition.planning_tuple
+        return self.state.value(planning_tuple) == goal.goal_value
+
+
+def _step_key(step):
+    actor, action, objects_dict = step
+    return (actor, action, tuple(sorted(objects_dict.items())))
+
+
+def _simulate_step(step, state):
+    """Return the state after step, or None if it can not be performed."""
+    actor, action, objects_dict = step
+    if not action.preconditions_met(state, actor=actor, **objects_dict):
+        return None
+    next_state = state.copy()
+    next_state.apply(action.calculate_effects(actor=actor, **objects_dict))
+    return next_state
+
+
+def simulate_steps(steps, state):
+    """Simulate steps, returning the state after them.
+
+    Returns None if the preconditions of a step are not met.
+
+    PARAMETERS:
+    * steps - A list of tuples like (actor, action, objects_dict).
+    * state - The WorldSnapshot before the first step. It is not changed.
+    """
+    for step in steps:
+        state = _simulate_step(step, state)
+        if state is None:
+            return None
+    return state
+
+
+def validate_plan(actions_sequence, state=None):
+    """Check that every step of a plan can be performed in turn.
+
+    Each step's preconditions are checked against the state left by the
+    steps before it, which is simulated with calculate_effects() on
+    copy-on-write snapshots, so the world itself is never changed.
+
+    PARAMETERS:
+    * actions_sequence - A list of (actor, action, objects_dict) tuples.
+    * state - An optional WorldSnapshot, by default the live world.
+
+    Returns a ValidationResult.
+    """
+    return validate_plans([actions_sequence], state=state)[0]
+
+
+def validate_plans(actions_sequences, state=None):
+    """Validate many plans against the same state at once.
+
+    Plans that start with the same steps share the simulation of those
+    steps, and every condition is evaluated on the live objects at most
+    once. See validate_plan().
+
+    Returns a list of ValidationResult objects, one per plan.
+    """
+    if state is None:
+        state = WorldSnapshot()
+    # Maps a tuple of step keys to the state after those steps, or None if
+    # the last of them can not be performed
+    simulated = {(): state}
+    results = []
+    for actions_sequence in actions_sequences:
+        prefix = ()
+        current_state = state
+        failed_step = None
+        for step_number, step in enumerate(actions_sequence):
+            next_prefix = prefix + (_step_key(step),)
+            if next_prefix in simulated:
+                next_state = simulated[next_prefix]
+            else:
+                next_state = _simulate_step(step, current_state)
+                simulated[next_prefix] = next_state
+            if next_state is None:
+                failed_step = step_number
+                break
+            prefix = next_prefix
+            current_state = next_state
+        results.append(ValidationResult(failed_step, current_state))
+    return results